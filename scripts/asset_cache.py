@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Shared Tex/Text SVG cache for Manim renders
+Keeps LaTeX and Pango output in one persistent, size-bounded directory that
+every render worker reads from and publishes to with atomic renames.
+
+Usage:
+    python3 asset_cache.py prewarm   # compile every formula/title used by the bundled scenes
+    python3 asset_cache.py stats
+    python3 asset_cache.py prune
+"""
+
+import ast
+import atexit
+import fcntl
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "nexus-academy", "manim-assets")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Mirrors getTitle() in src/lib/video-generator.ts for the subjects that get videos.
+VIDEO_SUBJECTS = ["数学", "英語"]
+TITLE_TEMPLATES = ["{}の解答解説", "{}の解法", "{}のヒント", "{}の動画解説", "{}の解説"]
+
+
+class CacheDir:
+    """Size-bounded directory of immutable files shared between processes."""
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def get(self, name):
+        path = self.root / name
+        try:
+            # mtime is the LRU clock for prune().
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, name, source, move=False):
+        target = self.root / name
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-", suffix=Path(name).suffix)
+        try:
+            with os.fdopen(fd, "wb") as out, open(source, "rb") as src:
+                shutil.copyfileobj(src, out)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if move:
+            Path(source).unlink(missing_ok=True)
+        return target
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def prune(self):
+        """Evict least recently used files until the directory fits max_bytes."""
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, entry in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            if removed:
+                (self.root / ".pruned").touch()
+            return removed
+
+    def pruned_at(self):
+        """When any process last evicted from this directory (0 if never), to invalidate what it remembers."""
+        try:
+            return (self.root / ".pruned").stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _entries(self):
+        return [entry for entry in self.root.iterdir() if entry.is_file() and not entry.name.startswith(".")]
+
+
+def tex_cache_name(expression, environment=None, tex_template=None):
+    """File name manim would give the SVG for this expression (its tex_hash)."""
+    from manim import config
+    from manim.utils.tex_file_writing import tex_hash
+
+    template = tex_template or config["tex_template"]
+    if environment is not None:
+        code = template.get_texcode_for_expression_in_env(expression, environment)
+    else:
+        code = template.get_texcode_for_expression(expression)
+    return tex_hash(code) + ".svg"
+
+
+class AssetCache:
+    def __init__(self, root=None, max_bytes=None):
+        root = Path(root or os.environ.get("MANIM_ASSET_CACHE_DIR", DEFAULT_ROOT))
+        max_bytes = int(max_bytes or os.environ.get("MANIM_ASSET_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        # Tex and Text entries share the budget.
+        self.tex = CacheDir(root / "Tex", max_bytes // 2)
+        self.texts = CacheDir(root / "texts", max_bytes // 2)
+        self.scratch = Path(tempfile.mkdtemp(prefix="manim-assets-"))
+        atexit.register(shutil.rmtree, self.scratch, True)
+
+    def stats(self):
+        return {
+            "tex_hits": self.tex.hits,
+            "tex_misses": self.tex.misses,
+            "text_hits": self.texts.hits,
+            "text_misses": self.texts.misses,
+            "tex_bytes": self.tex.size(),
+            "text_bytes": self.texts.size(),
+        }
+
+    def prune(self):
+        return self.tex.prune() + self.texts.prune()
+
+    def install(self):
+        """Route manim's Tex and Text SVG generation through the shared cache."""
+        from manim import config
+        from manim.mobject.text import tex_mobject, text_mobject
+
+        # Compile into a private scratch area, then publish atomically.
+        config.tex_dir = str(self.scratch / "Tex")
+        config.text_dir = str(self.scratch / "texts")
+
+        compile_tex = tex_mobject.tex_to_svg_file
+        text2svg = text_mobject.Text._text2svg
+        cache = self
+
+        def cached_tex_to_svg_file(expression, environment=None, tex_template=None):
+            name = tex_cache_name(expression, environment, tex_template)
+            hit = cache.tex.get(name)
+            if hit is not None:
+                return hit
+            svg = compile_tex(expression, environment=environment, tex_template=tex_template)
+            return cache.tex.put(name, svg, move=True)
+
+        def cached_text2svg(text, color, *args, **kwargs):
+            name = text._text2hash(color) + ".svg"
+            hit = cache.texts.get(name)
+            if hit is not None:
+                return str(hit)
+            svg = text2svg(text, color, *args, **kwargs)
+            return str(cache.texts.put(name, svg, move=True))
+
+        tex_mobject.tex_to_svg_file = cached_tex_to_svg_file
+        text_mobject.Text._text2svg = cached_text2svg
+        return self
+
+
+def _literal(node, names):
+    if isinstance(node, ast.Name):
+        return names[node.id]
+    return ast.literal_eval(node)
+
+
+def manim_constants():
+    import manim
+
+    return {name: getattr(manim, name) for name in dir(manim) if name.isupper()}
+
+
+def script_calls(script, names, kinds=("Text", "MathTex")):
+    """Yield (kind, args, kwargs) for every call in a script whose arguments are all literals."""
+    tree = ast.parse(Path(script).read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)):
+            continue
+        if node.func.id not in kinds:
+            continue
+        try:
+            args = [_literal(arg, names) for arg in node.args]
+            kwargs = {kw.arg: _literal(kw.value, names) for kw in node.keywords}
+        except (ValueError, KeyError):
+            continue
+        yield node.func.id, args, kwargs
+
+
+def collect_scene_assets():
+    """Yield (kind, args, kwargs) for every literal Text/MathTex call in scripts/*.py and specs."""
+    names = manim_constants()
+    for script in sorted(SCRIPTS_DIR.glob("*.py")):
+        yield from script_calls(script, names)
+
+    for path in sorted((SCRIPTS_DIR / "specs").glob("*.json")):
+        spec = json.loads(path.read_text(encoding="utf-8"))
+        for element in spec["elements"]:
+            if element["type"] not in ("text", "tex"):
+                continue
+            kwargs = {"font_size": element.get("font_size", 32 if element["type"] == "text" else 36)}
+            if element.get("color"):
+                color = element["color"]
+                kwargs["color"] = color if color.startswith("#") else names[color]
+            if element.get("weight"):
+                kwargs["weight"] = element["weight"]
+            yield ("Text" if element["type"] == "text" else "MathTex"), [element["content"]], kwargs
+
+    for subject in VIDEO_SUBJECTS:
+        for template in TITLE_TEMPLATES:
+            yield "Text", [template.format(subject)], {"font_size": 48, "color": names["BLUE"]}
+
+
+def prewarm(cache):
+    import manim
+
+    built = failed = 0
+    for kind, args, kwargs in collect_scene_assets():
+        try:
+            getattr(manim, kind)(*args, **kwargs)
+            built += 1
+        except Exception as error:
+            failed += 1
+            print(f"skip {kind}{tuple(args)}: {error}", file=sys.stderr)
+    cache.prune()
+    return {"built": built, "failed": failed, **cache.stats()}
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = AssetCache()
+    if command == "prewarm":
+        cache.install()
+        print(json.dumps(prewarm(cache), indent=2))
+    elif command == "prune":
+        print(json.dumps({"removed": cache.prune(), **cache.stats()}, indent=2))
+    elif command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Concurrent asset preparation
+A step spec names every Text and MathTex up front, but StepSolutionScene built them
+one after another inside construct(), so each Pango and LaTeX call sat on the
+critical path. Here the uncached ones are generated first on a pool of warm
+processes (Text through Pango, MathTex as latex batches split across the pool) into
+the shared asset cache. The layout is then built from cache hits and handed to the
+scene, so frame rendering starts with every asset ready, and the prep time is
+reported apart from the render time.
+
+Run directly, it preps the given specs from a cold cache without and with the pool.
+
+Usage:
+    python3 asset_prep.py specs/enhanced_complex_math_problem.json [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from asset_cache import AssetCache, tex_cache_name
+from step_spec import validate_spec
+from tex_batch import MATH_ENVIRONMENT, compile_batch, spec_tex
+
+# Fewer expressions than this per latex run cost more in startup than they save.
+TEX_CHUNK_MIN = 4
+
+_pool = None
+_pool_size = 0
+_process_cache = None
+# Text elements this process has already seen in the asset cache, valid until the
+# cache is next pruned (by any process).
+_prepared = set()
+_prepared_at = None
+
+
+def _init_prep_process():
+    global _process_cache
+    _process_cache = AssetCache().install()
+
+
+def _generate_text(element):
+    # Building the Text runs Pango once and publishes the SVG to the shared cache.
+    from step_scene import build_element
+
+    build_element(element, {})
+
+
+def _compile_tex(expressions):
+    return compile_batch(_process_cache, expressions)
+
+
+def get_pool(size):
+    """Keep one pool of warm prep processes per worker, rebuilt if the size changes."""
+    global _pool, _pool_size
+    if _pool is None or _pool_size != size:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=size, mp_context=get_context("spawn"), initializer=_init_prep_process)
+        _pool_size = size
+    return _pool
+
+
+def pool_pids():
+    """PIDs of the warm prep processes, which outlive any one render."""
+    return [str(pid) for pid in (_pool._processes or {})] if _pool is not None else []
+
+
+def _text_key(element):
+    return json.dumps({key: element.get(key) for key in ("content", "font_size", "color", "weight")}, sort_keys=True)
+
+
+def prepare_spec(cache, spec, workers=0):
+    """Generate a spec's Text/MathTex SVGs on `workers` processes, then build its layout.
+
+    Returns the built mobjects by element id, for StepSolutionScene(built=...), and the
+    prep stats. With no workers only the single latex batch runs before the build.
+    """
+    from manim import config
+
+    from step_scene import build_layout
+
+    global _prepared_at
+    pruned_at = cache.texts.pruned_at()
+    if pruned_at != _prepared_at:
+        # An eviction may have removed Text SVGs remembered here; check them all again.
+        _prepared.clear()
+        _prepared_at = pruned_at
+
+    started = time.perf_counter()
+    spec = validate_spec(spec)
+    expressions = spec_tex(spec)
+    texts = [element for element in spec["elements"]
+             if element["type"] == "text" and _text_key(element) not in _prepared]
+    stats = {"workers": workers, "texts_generated": 0, "tex_chunks": 0}
+
+    if workers > 0:
+        template = config["tex_template"]
+        pending = [
+            expression for expression in dict.fromkeys(expression.strip() for expression in expressions)
+            if expression and not (cache.tex.root / tex_cache_name(expression, MATH_ENVIRONMENT, template)).exists()
+        ]
+        chunks = max(1, min(workers, len(pending) // TEX_CHUNK_MIN))
+        pool = get_pool(workers)
+        futures = [pool.submit(_compile_tex, pending[index::chunks]) for index in range(chunks) if pending[index::chunks]]
+        futures += [pool.submit(_generate_text, element) for element in texts]
+        for future in futures:
+            future.result()
+        stats["texts_generated"] = len(texts)
+        stats["tex_chunks"] = len(futures) - len(texts)
+    generated = time.perf_counter()
+
+    # Anything the pool left uncached (or everything, without workers) is compiled here in one pass.
+    stats["tex_batch"] = compile_batch(cache, expressions)
+    built = build_layout(spec)
+    _prepared.update(_text_key(element) for element in spec["elements"] if element["type"] == "text")
+    finished = time.perf_counter()
+    stats.update(generate_seconds=generated - started, build_seconds=finished - generated,
+                 seconds=finished - started)
+    return built, stats
+
+
+def run_cold(spec_paths, workers):
+    """Prep the specs in a child process with an empty asset cache; return its stats."""
+    with tempfile.TemporaryDirectory(prefix="asset-prep-") as root:
+        output = subprocess.run(
+            [sys.executable, __file__, *spec_paths, "--workers", str(workers), "--child"],
+            env={**os.environ, "MANIM_ASSET_CACHE_DIR": root}, capture_output=True, text=True, check=True,
+        ).stdout
+    # Manim may log to stdout ahead of the result.
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("specs", nargs="+", help="spec .json files")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        cache = AssetCache().install()
+        specs = [json.loads(Path(path).read_text(encoding="utf-8")) for path in args.specs]
+        runs = [prepare_spec(cache, spec, args.workers)[1] for spec in specs]
+        print(json.dumps({
+            "workers": args.workers,
+            "seconds": round(sum(run["seconds"] for run in runs), 3),
+            "specs": [{key: value for key, value in run.items() if key != "tex_batch"} for run in runs],
+        }))
+        return
+
+    spec_paths = [os.path.abspath(path) for path in args.specs]
+    results = [run_cold(spec_paths, workers) for workers in (0, args.workers)]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Progressive HLS publishing
+Remuxes each finished partial movie into an MPEG-TS segment and appends it to a
+growing EVENT playlist, so playback can start while the rest of the scene renders.
+"""
+
+import math
+import os
+import subprocess
+from pathlib import Path
+
+from manim import config
+
+PLAYLIST_NAME = "index.m3u8"
+
+
+def probe_duration(path):
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+        capture_output=True, text=True, check=True,
+    )
+    return float(output.stdout.strip())
+
+
+class HlsPublisher:
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.segments = []
+        self.elapsed = 0.0
+        self.finished = False
+        self._write_playlist()
+
+    @property
+    def playlist_path(self):
+        return self.out_dir / PLAYLIST_NAME
+
+    def add_segment(self, movie_path):
+        duration = probe_duration(movie_path)
+        name = f"seg_{len(self.segments):05d}.ts"
+        tmp = self.out_dir / f".{name}"
+        subprocess.run(
+            [config.ffmpeg_executable, "-y", "-loglevel", "error", "-i", str(movie_path),
+             "-c", "copy", "-output_ts_offset", f"{self.elapsed:.6f}", "-f", "mpegts", str(tmp)],
+            check=True,
+        )
+        os.replace(tmp, self.out_dir / name)
+        self.segments.append((name, duration))
+        self.elapsed += duration
+        self._write_playlist()
+
+    def finish(self):
+        self.finished = True
+        self._write_playlist()
+
+    def _write_playlist(self):
+        target = max([math.ceil(duration) for _, duration in self.segments] or [1])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{target}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for name, duration in self.segments:
+            lines += [f"#EXTINF:{duration:.3f},", name]
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+        tmp = self.out_dir / f".{PLAYLIST_NAME}"
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        # Players re-fetch the playlist while it grows, so never expose a partial write.
+        os.replace(tmp, self.playlist_path)
+
+
+class HlsWriterMixin:
+    """SceneFileWriter mixin that publishes every finished play() to an HlsPublisher."""
+
+    hls_publisher = None
+
+    def end_animation(self, allow_write=False):
+        super().end_animation(allow_write)
+        index = self.renderer.num_plays
+        if index < len(self.partial_movie_files):
+            movie = self.partial_movie_files[index]
+            if movie is not None and os.path.exists(movie):
+                self.hls_publisher.add_segment(movie)
+
+    def finish(self):
+        super().finish()
+        self.hls_publisher.finish()
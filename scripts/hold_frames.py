@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Hold-aware frame output
+A static self.wait() normally pipes the same raw frame to ffmpeg once per output
+frame (120-240 copies of an 8 MB frame per hold at 1080p60). Here a hold is piped
+once and its partial movie re-encoded as a still segment of the same length, and
+play() calls whose animations all ask for a lower render_fps only rasterize every
+n-th frame, repeating it in between. Output stays constant frame rate, so the
+timeline length, segment concat and HLS remuxing are unchanged.
+"""
+
+import os
+import subprocess
+import tempfile
+
+from manim import config
+
+
+class HoldRendererMixin:
+    """CairoRenderer mixin for held frames and per-animation frame rates."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frame_stride = 1
+        self.held_frame = None
+        self.frame_index = 0
+        self.hold_stats = {"holds": 0, "held_frames": 0, "skipped_rasters": 0}
+
+    def play(self, scene, *args, **kwargs):
+        self.frame_stride = None
+        self.held_frame = None
+        self.frame_index = 0
+        super().play(scene, *args, **kwargs)
+
+    def freeze_current_frame(self, duration):
+        if self.skip_animations or not hasattr(self.file_writer, "write_hold"):
+            return super().freeze_current_frame(duration)
+        dt = 1 / self.camera.frame_rate
+        num_frames = int(duration / dt)
+        if num_frames < 2:
+            return super().freeze_current_frame(duration)
+        self.time += num_frames * dt
+        self.file_writer.write_hold(self.get_frame(), num_frames)
+        self.hold_stats["holds"] += 1
+        self.hold_stats["held_frames"] += num_frames
+
+    def render(self, scene, time, moving_mobjects):
+        if self.frame_stride is None:
+            self.frame_stride = self._stride_for(scene.animations or [])
+        if self.frame_stride > 1 and self.held_frame is not None and self.frame_index % self.frame_stride:
+            self.add_frame(self.held_frame)
+            self.hold_stats["skipped_rasters"] += 1
+        else:
+            super().render(scene, time, moving_mobjects)
+            if self.frame_stride > 1:
+                self.held_frame = self.get_frame()
+        self.frame_index += 1
+
+    def _stride_for(self, animations):
+        # Any animation without render_fps needs the full frame rate.
+        rates = [getattr(animation, "render_fps", None) for animation in animations]
+        if not rates or None in rates:
+            return 1
+        return max(1, round(self.camera.frame_rate / max(rates)))
+
+
+class HoldWriterMixin:
+    """SceneFileWriter mixin that encodes a held frame as a still segment."""
+
+    pending_hold = None
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        self.pending_hold = None
+        super().begin_animation(allow_write, file_path)
+
+    def write_hold(self, frame, num_frames):
+        # One frame keeps the open pipe valid; the partial movie is replaced in end_animation.
+        self.write_frame(frame)
+        self.pending_hold = (frame, num_frames)
+
+    def end_animation(self, allow_write=False):
+        super().end_animation(allow_write)
+        hold, self.pending_hold = self.pending_hold, None
+        if hold is None or not allow_write or config.movie_file_extension != ".mp4":
+            return
+        frame, num_frames = hold
+        self.encode_still(frame, num_frames, self.partial_movie_files[self.renderer.num_plays])
+
+    def encode_still(self, frame, num_frames, output):
+        height, width = frame.shape[:2]
+        fd, raw_path = tempfile.mkstemp(suffix=".rgba")
+        with os.fdopen(fd, "wb") as raw:
+            raw.write(frame.tobytes())
+        tmp = f"{output}.hold.mp4"
+        try:
+            subprocess.run(
+                [config.ffmpeg_executable, "-y", "-loglevel", "error",
+                 "-f", "rawvideo", "-s", f"{width}x{height}", "-pix_fmt", "rgba",
+                 "-r", str(config.frame_rate), "-i", raw_path,
+                 "-vf", f"tpad=stop_mode=clone:stop={max(num_frames - 1, 0)}",
+                 "-frames:v", str(num_frames), "-an",
+                 "-vcodec", "libx264", "-pix_fmt", "yuv420p", "-tune", "stillimage", tmp],
+                check=True,
+            )
+            os.replace(tmp, output)
+        finally:
+            os.unlink(raw_path)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
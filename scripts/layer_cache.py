@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Layer-cached Cairo rendering
+Manim already rasterizes everything below the first moving mobject once per play()
+into a background image, but redraws every mobject above it on each frame to keep
+the z-order. This renderer also caches the static mobjects above the animating ones
+as a transparent foreground layer, so each frame only redraws what actually moves.
+
+Usage:
+    python3 layer_cache.py bench                       # bundled scenes, with and without the cache
+    python3 layer_cache.py bench specs/enhanced_complex_math_problem.json --quality low
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+BENCH_JOBS = [
+    {"script": "problem_174_solution_improved.py", "scene": "Problem174SolutionImproved"},
+    {"script": "enhanced_complex_manim.py", "scene": "EnhancedComplexMathProblem"},
+]
+
+
+def composite_over(frame, layer, box):
+    """Draw a premultiplied RGBA layer over frame inside box (row/column slices)."""
+    rows, cols = box
+    src = layer[rows, cols].astype(np.uint16)
+    dst = frame[rows, cols].astype(np.uint16)
+    inverse_alpha = 255 - src[..., 3:4]
+    frame[rows, cols] = (src + (dst * inverse_alpha + 127) // 255).astype(np.uint8)
+
+
+def opaque_box(layer):
+    alpha = layer[..., 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(alpha.any(axis=0))
+    return slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1)
+
+
+class LayerCacheRendererMixin:
+    """CairoRenderer mixin that keeps static mobjects above the animation in a cached layer."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.foreground_layer = None
+        self.foreground_box = None
+        # Reused for every play(): the camera caches a cairo context per pixel array.
+        self._layer_canvas = None
+        self.layer_stats = {"plays": 0, "cached_plays": 0, "cached_mobjects": 0}
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        image = super().save_static_frame_data(scene, static_mobjects)
+        self.foreground_layer = None
+        self.foreground_box = None
+        self.layer_stats["plays"] += 1
+        if self.skip_animations or scene.updaters:
+            return image
+
+        moving, foreground = self._split_moving(scene)
+        if foreground:
+            self.foreground_layer = self._rasterize_layer(foreground)
+            self.foreground_box = opaque_box(self.foreground_layer)
+            scene.moving_mobjects = moving
+            self.layer_stats["cached_plays"] += 1
+            self.layer_stats["cached_mobjects"] += len(foreground)
+        return image
+
+    def update_frame(self, scene, mobjects=None, *args, **kwargs):
+        super().update_frame(scene, mobjects, *args, **kwargs)
+        if self.foreground_box is not None and mobjects is scene.moving_mobjects:
+            composite_over(self.camera.pixel_array, self.foreground_layer, self.foreground_box)
+
+    def play(self, scene, *args, **kwargs):
+        try:
+            super().play(scene, *args, **kwargs)
+        finally:
+            self.foreground_layer = None
+            self.foreground_box = None
+
+    def _split_moving(self, scene):
+        """Split scene.moving_mobjects into what is redrawn per frame and a static layer above it."""
+        changing = set()
+        for animation in scene.animations or []:
+            changing.update(id(member) for member in animation.mobject.get_family())
+        for mobject in scene.moving_mobjects:
+            if mobject.get_family_updaters() or mobject in scene.foreground_mobjects:
+                changing.update(id(member) for member in mobject.get_family())
+
+        # Only mobjects above the topmost changing one can move to the layer
+        # without breaking the z-order.
+        last = -1
+        for index, mobject in enumerate(scene.moving_mobjects):
+            if any(id(member) in changing for member in mobject.get_family()):
+                last = index
+        if last < 0:
+            return scene.moving_mobjects, []
+        moving = scene.moving_mobjects[:last + 1]
+        drawn = {id(member) for mobject in moving for member in mobject.get_family()}
+        foreground = [mobject for mobject in scene.moving_mobjects[last + 1:] if id(mobject) not in drawn]
+        return moving, foreground
+
+    def _rasterize_layer(self, mobjects):
+        camera = self.camera
+        frame = camera.pixel_array
+        if self._layer_canvas is None or self._layer_canvas.shape != frame.shape:
+            self._layer_canvas = np.zeros_like(frame)
+        else:
+            self._layer_canvas[:] = 0
+        camera.pixel_array = self._layer_canvas
+        try:
+            camera.capture_mobjects(mobjects)
+        finally:
+            camera.pixel_array = frame
+        return self._layer_canvas
+
+
+def bench_job(source, media_dir, quality, layer_cache):
+    from manim import tempconfig
+
+    from render_jobs import build_renderer, load_scene, scene_options
+
+    if isinstance(source, dict):
+        job = {**source, "script": str(SCRIPTS_DIR / source["script"])}
+    else:
+        job = {"spec": json.loads(Path(source).read_text(encoding="utf-8"))}
+    job.update(media_dir=media_dir, quality=quality, disable_caching=True, layer_cache=layer_cache)
+
+    name, make_scene = load_scene(job)
+    with tempconfig(scene_options(job, name)):
+        renderer = build_renderer(job)
+        started = time.perf_counter()
+        make_scene(renderer=renderer).render()
+        seconds = time.perf_counter() - started
+    return name, seconds, getattr(renderer, "layer_stats", None)
+
+
+def bench(sources, quality):
+    from asset_cache import AssetCache
+
+    # Warm the SVG cache first so both passes measure rasterization, not LaTeX.
+    AssetCache().install()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="layer-bench-") as media_dir:
+        for source in sources:
+            bench_job(source, media_dir, quality, layer_cache=False)
+            name, baseline, _ = bench_job(source, media_dir, quality, layer_cache=False)
+            _, cached, stats = bench_job(source, media_dir, quality, layer_cache=True)
+            results.append({
+                "scene": name,
+                "quality": quality,
+                "baseline_seconds": round(baseline, 3),
+                "layer_cache_seconds": round(cached, 3),
+                "speedup": round(baseline / cached, 2),
+                **stats,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("sources", nargs="*", help="spec .json files (default: the bundled scenes)")
+    parser.add_argument("--quality", default="high")
+    args = parser.parse_args()
+
+    sources = [os.path.abspath(source) for source in args.sources] or BENCH_JOBS
+    print(json.dumps(bench(sources, args.quality), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
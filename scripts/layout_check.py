@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Dry-run layout check for step specs
+Builds every mobject of a spec without a scene or renderer, compiles its formulas in
+one batched LaTeX pass and measures the layout against the frame. With fix=True,
+steps that run off the bottom are moved onto a new page (the previous page is faded
+out) and elements that are too wide are scaled down, so the spec can be rendered
+as returned.
+
+Usage:
+    python3 layout_check.py specs/*.json [--fix]
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+
+from manim import RIGHT, UP, VectorizedPoint, config
+
+from step_scene import apply_placement, build_element
+from step_spec import validate_spec
+from tex_batch import compile_batch, spec_tex
+
+FRAME_MARGIN = 0.2
+HEADER_BUFF = 0.5
+INTRO_ANIMATIONS = {"write", "create", "fade_in"}
+ANCHOR_OPS = {"to_edge", "to_corner"}
+
+
+def _references(element):
+    refs = set(element.get("members", []))
+    refs.update(op["target"] for op in element.get("place", []) if "target" in op)
+    return refs
+
+
+def _header_ids(elements):
+    """Elements anchored to the frame edge, plus ones placed directly against them."""
+    anchored = {
+        element["id"] for element in elements
+        if any(op["op"] in ANCHOR_OPS for op in element.get("place", []))
+    }
+    return anchored | {
+        element["id"] for element in elements
+        if element.get("type") not in ("surround", "group") and _references(element) and _references(element) <= anchored
+    }
+
+
+def _timeline_index(timeline):
+    intro, exits = {}, {}
+    for index, entry in enumerate(timeline):
+        for animation in entry.get("play", []):
+            if animation["anim"] in INTRO_ANIMATIONS:
+                intro.setdefault(animation["target"], index)
+            elif animation["anim"] == "fade_out":
+                exits.setdefault(animation["target"], index)
+    return intro, exits
+
+
+def _overflow(mobject, bounds):
+    left, right, bottom, top = bounds
+    amounts = {
+        "left": left - mobject.get_left()[0],
+        "right": mobject.get_right()[0] - right,
+        "bottom": bottom - mobject.get_bottom()[1],
+        "top": mobject.get_top()[1] - top,
+    }
+    return {side: round(amount, 3) for side, amount in amounts.items() if amount > 1e-3}
+
+
+def _fit_width(mobject, element, bounds, fixes):
+    left, right = bounds[0] + FRAME_MARGIN, bounds[1] - FRAME_MARGIN
+    if mobject.width > right - left:
+        factor = round((right - left) / mobject.width, 4)
+        mobject.scale(factor)
+        element.setdefault("place", []).append({"op": "scale", "factor": factor})
+        fixes.append({"id": element["id"], "fix": "scale", "factor": factor})
+    dx = max(left - mobject.get_left()[0], 0) - max(mobject.get_right()[0] - right, 0)
+    if abs(dx) > 1e-3:
+        _shift(mobject, element, dx, 0)
+
+
+def _shift(mobject, element, dx, dy):
+    mobject.shift(RIGHT * dx + UP * dy)
+    element.setdefault("place", []).append({"op": "shift", "by": [round(dx, 4), round(dy, 4)]})
+
+
+def check_layout(spec, asset_cache, fix=False):
+    """Report overflow and TeX errors for a spec; with fix=True also return a paginated, scaled spec."""
+    started = time.perf_counter()
+    spec = copy.deepcopy(validate_spec(spec))
+    tex_errors = set(compile_batch(asset_cache, spec_tex(spec))["fallback"])
+
+    half_width, half_height = config.frame_width / 2, config.frame_height / 2
+    bounds = (-half_width, half_width, -half_height, half_height)
+    elements = spec["elements"]
+    header = _header_ids(elements)
+    intro, exits = _timeline_index(spec["timeline"])
+
+    built = {}
+    page_of = {}
+    page_offsets = [0.0]
+    page_members = []
+    region_top = half_height - FRAME_MARGIN
+    breaks = []
+    fixes = []
+    errors = []
+
+    for element in elements:
+        element_id = element["id"]
+        if element["type"] == "tex" and element["content"].strip() in tex_errors:
+            errors.append({"id": element_id, "content": element["content"]})
+            mobject = VectorizedPoint()
+        else:
+            mobject = build_element(element, built)
+            for op in element.get("place", []):
+                apply_placement(mobject, op, built)
+        built[element_id] = mobject
+
+        if element_id in header:
+            page_of[element_id] = None
+            # A long problem statement is part of the header; fit it before the steps are measured below it.
+            if fix:
+                _fit_width(mobject, element, bounds, fixes)
+            region_top = min(region_top, mobject.get_bottom()[1] - HEADER_BUFF)
+            continue
+
+        # Move with the page of whatever it was placed against: nothing for the
+        # header, the origin (page 0) for absolutely placed steps.
+        refs = _references(element)
+        ref_pages = [page_of[ref] for ref in refs if page_of.get(ref) is not None]
+        page = len(page_offsets) - 1
+        base = max(ref_pages) if ref_pages else (page if refs else 0)
+        dy = page_offsets[page] - page_offsets[base]
+        if fix and abs(dy) > 1e-3:
+            _shift(mobject, element, 0, dy)
+        page_of[element_id] = page
+        if not fix or element_id not in intro:
+            continue
+
+        _fit_width(mobject, element, bounds, fixes)
+        if mobject.get_bottom()[1] < bounds[2] + FRAME_MARGIN:
+            shown = [
+                member for member in page_members
+                if intro[member] < intro[element_id] and exits.get(member, len(spec["timeline"])) > intro[element_id]
+            ]
+            if shown:
+                delta = region_top - mobject.get_top()[1]
+                _shift(mobject, element, 0, delta)
+                page_offsets.append(page_offsets[-1] + delta)
+                page_of[element_id] = len(page_offsets) - 1
+                breaks.append((intro[element_id], shown))
+                fixes.append({"id": element_id, "fix": "new_page", "fade_out": shown})
+                page_members = []
+            available = region_top - (bounds[2] + FRAME_MARGIN)
+            # No room left under the header: leave the step as is and report the overflow.
+            if 0 < available < mobject.height:
+                factor = round(available / mobject.height, 4)
+                mobject.scale(factor)
+                element.setdefault("place", []).append({"op": "scale", "factor": factor})
+                _shift(mobject, element, 0, region_top - mobject.get_top()[1])
+                fixes.append({"id": element_id, "fix": "scale", "factor": factor})
+        page_members.append(element_id)
+
+    # Fade each page out before the step that starts the next one, and drop later
+    # fade-outs of those elements, which would flash them back in.
+    fade_at = dict(breaks)
+    faded = set()
+    timeline = []
+    for index, entry in enumerate(spec["timeline"]):
+        if index in fade_at:
+            timeline.append({"play": [{"anim": "fade_out", "target": member} for member in fade_at[index]]})
+            faded.update(fade_at[index])
+        play = [a for a in entry.get("play", []) if not (a["anim"] == "fade_out" and a["target"] in faded)]
+        rest = {key: value for key, value in entry.items() if key != "play"}
+        if play or rest.get("wait"):
+            timeline.append({**({"play": play} if play else {}), **rest})
+    spec["timeline"] = timeline
+
+    visible = set(intro) | {a["to"] for entry in spec["timeline"] for a in entry.get("play", []) if "to" in a}
+    overflow = []
+    for element in elements:
+        if element["id"] in visible:
+            sides = _overflow(built[element["id"]], bounds)
+            if sides:
+                overflow.append({"id": element["id"], **sides})
+
+    report = {
+        "ok": not overflow and not errors,
+        "overflow": overflow,
+        "tex_errors": errors,
+        "pages": len(page_offsets),
+        "fixes": fixes,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    if fix:
+        report["spec"] = spec
+    return report
+
+
+def main():
+    from asset_cache import AssetCache
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("specs", nargs="+")
+    parser.add_argument("--fix", action="store_true", help="paginate and scale instead of only reporting")
+    args = parser.parse_args()
+
+    asset_cache = AssetCache().install()
+    failed = False
+    for path in args.specs:
+        with open(path, encoding="utf-8") as f:
+            report = check_layout(json.load(f), asset_cache, fix=args.fix)
+        report.pop("spec", None)
+        failed = failed or not report["ok"]
+        print(path, json.dumps(report, ensure_ascii=False))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
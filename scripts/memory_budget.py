@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Memory-budgeted rendering
+A 1080p60 render holds several full-resolution RGBA buffers, and scenes keep every
+faded-out mobject alive through construct()'s locals. With a budget, mobjects that
+leave the scene and static mobjects are stored as float32 points without their
+parsed SVG paths, the encoder's frame queue and lookahead are kept short, and the
+render is stopped at the next play() once the worker and its ffmpeg children go over
+budget. Peak RSS is sampled for every render, with or without a budget. The warm
+prep and segment pool processes are reported apart and left out of the budget: they
+stay alive between renders, so counting them would charge their imports to every one.
+"""
+
+import gc
+import os
+import threading
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+SAMPLE_INTERVAL = 0.05
+
+# Encoder settings for single_encoder.encoder_settings(): a two-frame input queue and a
+# short x264 lookahead instead of ffmpeg's and x264's defaults (8 and up to 60 frames).
+BUDGET_ENCODER_SETTINGS = {"thread_queue_size": 2, "rc_lookahead": 10, "threads": 2}
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    pass
+
+
+def rss_bytes(pid="self"):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def child_pids():
+    pids = []
+    try:
+        tasks = os.listdir("/proc/self/task")
+    except OSError:
+        return pids
+    for task in tasks:
+        try:
+            with open(f"/proc/self/task/{task}/children") as f:
+                pids.extend(f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+class RssSampler:
+    """Background thread tracking peak RSS of this process and its children (ffmpeg, latex).
+
+    `pool_pids` returns the children that are warm pool processes; they are tracked
+    separately and do not count toward the budget.
+    """
+
+    def __init__(self, budget_bytes=None, interval=SAMPLE_INTERVAL, pool_pids=None):
+        self.budget_bytes = budget_bytes
+        self.interval = interval
+        self.pool_pids = pool_pids or list
+        self.peak_rss_bytes = 0
+        self.peak_children_rss_bytes = 0
+        self.peak_pool_rss_bytes = 0
+        self.peak_total_bytes = 0
+        self.exceeded = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def __enter__(self):
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def sample(self):
+        own = rss_bytes()
+        pool = set(self.pool_pids())
+        children = sum(rss_bytes(pid) for pid in child_pids() if pid not in pool)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, own)
+        self.peak_children_rss_bytes = max(self.peak_children_rss_bytes, children)
+        self.peak_pool_rss_bytes = max(self.peak_pool_rss_bytes, sum(rss_bytes(pid) for pid in pool))
+        self.peak_total_bytes = max(self.peak_total_bytes, own + children)
+        if self.budget_bytes and own + children > self.budget_bytes:
+            self.exceeded = True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def report(self):
+        return {
+            "budget_bytes": self.budget_bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "peak_children_rss_bytes": self.peak_children_rss_bytes,
+            "peak_pool_rss_bytes": self.peak_pool_rss_bytes,
+            "peak_total_bytes": self.peak_total_bytes,
+            "exceeded": self.exceeded,
+        }
+
+
+def compact(mobjects):
+    """Store points as float32 and drop the parsed SVG path kept by VMobjectFromSVGPath."""
+    freed = 0
+    for mobject in mobjects:
+        for member in mobject.get_family():
+            points = member.points
+            if points.dtype.name == "float64" and points.size:
+                member.points = points.astype("float32")
+                freed += points.nbytes // 2
+            if getattr(member, "path_obj", None) is not None:
+                # Only read while the points are generated in __init__.
+                member.path_obj = None
+    return freed
+
+
+class MemoryBudgetRendererMixin:
+    """CairoRenderer mixin that compacts what is no longer animated and enforces the budget."""
+
+    rss_sampler = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memory_stats = {"released_mobjects": 0, "compacted_bytes": 0}
+
+    def play(self, scene, *args, **kwargs):
+        if self.rss_sampler.exceeded:
+            raise MemoryBudgetExceeded(
+                f"render went over its memory budget of {self.rss_sampler.budget_bytes // (1024 * 1024)} MiB"
+            )
+        before = list(scene.mobjects)
+        super().play(scene, *args, **kwargs)
+
+        # What FadeOut/Uncreate took off the scene is only kept alive by construct()'s locals.
+        remaining = {id(mobject) for mobject in scene.mobjects}
+        removed = [mobject for mobject in before if id(mobject) not in remaining]
+        if removed:
+            self.memory_stats["released_mobjects"] += len(removed)
+            self.memory_stats["compacted_bytes"] += compact(removed)
+            gc.collect()
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        # Mobjects that don't change during this play are only read from here on.
+        self.memory_stats["compacted_bytes"] += compact(static_mobjects)
+        return super().save_static_frame_data(scene, static_mobjects)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Render metrics scrape check
+Scrapes /api/metrics (src/lib/render-metrics.ts) the way Prometheus would and checks
+the text exposition format: every sample belongs to a family with HELP and TYPE,
+counters are non-negative, histogram buckets are cumulative and end in +Inf equal to
+_count, and every render metric family is present. Prints a short summary (renders,
+failures by cause, cache hit ratios) and exits non-zero if anything is off.
+
+Usage:
+    npm run dev &
+    python3 metrics_scrape.py [http://localhost:3000/api/metrics]
+    curl -s localhost:3000/api/metrics | python3 metrics_scrape.py --file -
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import urllib.request
+from collections import defaultdict
+
+REQUIRED = [
+    "render_duration_seconds",
+    "render_prep_seconds",
+    "render_queue_wait_seconds",
+    "render_jobs_total",
+    "render_failures_total",
+    "render_timeouts_total",
+    "render_frames_total",
+    "render_bytes_written_total",
+    "render_asset_cache_lookups_total",
+    "render_asset_cache_hit_ratio",
+    "video_cache_lookups_total",
+    "video_cache_hit_ratio",
+    "video_cache_evictions_total",
+]
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+
+
+def parse(text):
+    """Families by name: {"help", "type", "samples": [(name, labels, value)]}; problems found while parsing."""
+    families = {}
+    problems = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            parts = line.split(" ", 3)
+            if len(parts) < 4:
+                problems.append(f"line {number}: malformed {parts[1]}")
+                continue
+            family = families.setdefault(parts[2], {"help": None, "type": None, "samples": []})
+            family["help" if parts[1] == "HELP" else "type"] = parts[3]
+            continue
+        if line.startswith("#"):
+            continue
+        match = SAMPLE.match(line)
+        if not match:
+            problems.append(f"line {number}: not a sample: {line!r}")
+            continue
+        name, raw_labels, raw_value = match.groups()
+        labels = dict(LABEL.findall(raw_labels or ""))
+        try:
+            value = float(raw_value.replace("+Inf", "inf").replace("-Inf", "-inf"))
+        except ValueError:
+            problems.append(f"line {number}: bad value {raw_value!r}")
+            continue
+        base = re.sub(r"_(bucket|sum|count)$", "", name)
+        family = families.get(name) or families.get(base)
+        if family is None:
+            problems.append(f"line {number}: {name} has no HELP/TYPE")
+            continue
+        family["samples"].append((name, labels, value))
+    return families, problems
+
+
+def check(families):
+    problems = []
+    for name in REQUIRED:
+        if name not in families:
+            problems.append(f"missing family {name}")
+    for name, family in families.items():
+        if family["help"] is None or family["type"] is None:
+            problems.append(f"{name}: missing HELP or TYPE")
+        if family["type"] == "counter":
+            problems += [f"{name}{labels}: negative counter" for _, labels, value in family["samples"] if value < 0]
+        if family["type"] == "histogram":
+            problems += check_histogram(name, family["samples"])
+    return problems
+
+
+def check_histogram(name, samples):
+    problems = []
+    series = defaultdict(lambda: {"buckets": [], "count": None})
+    for sample_name, labels, value in samples:
+        key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        if sample_name.endswith("_bucket"):
+            series[key]["buckets"].append((float(labels["le"].replace("+Inf", "inf")), value))
+        elif sample_name.endswith("_count"):
+            series[key]["count"] = value
+    for key, entry in series.items():
+        buckets = sorted(entry["buckets"])
+        counts = [count for _, count in buckets]
+        if not buckets or not math.isinf(buckets[-1][0]):
+            problems.append(f"{name}{dict(key)}: no +Inf bucket")
+        elif counts != sorted(counts):
+            problems.append(f"{name}{dict(key)}: buckets are not cumulative")
+        elif entry["count"] != counts[-1]:
+            problems.append(f"{name}{dict(key)}: +Inf bucket != _count")
+    return problems
+
+
+def summary(families):
+    def values(name, suffix=""):
+        return [(labels, value) for sample_name, labels, value in families.get(name, {}).get("samples", [])
+                if sample_name == name + suffix]
+
+    return {
+        "renders": {f"{l.get('op')}/{l.get('quality')}/{l.get('outcome')}": v for l, v in values("render_jobs_total")},
+        "failures": {f"{l.get('op')}/{l.get('reason')}": v for l, v in values("render_failures_total")},
+        "frames": sum(v for _, v in values("render_frames_total")),
+        "bytes_written": sum(v for _, v in values("render_bytes_written_total")),
+        "asset_cache_hit_ratio": {l.get("cache"): round(v, 3) for l, v in values("render_asset_cache_hit_ratio")},
+        "video_cache_hit_ratio": next((round(v, 3) for _, v in values("video_cache_hit_ratio")), None),
+    }
+
+
+def fetch(url, token):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"} if token else {})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        content_type = response.headers.get("Content-Type", "")
+        if not content_type.startswith("text/plain"):
+            raise SystemExit(f"unexpected Content-Type {content_type!r}")
+        return response.read().decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("url", nargs="?", default="http://localhost:3000/api/metrics")
+    parser.add_argument("--file", help="check a saved scrape instead ('-' for stdin)")
+    parser.add_argument("--token", default=os.environ.get("METRICS_TOKEN"))
+    args = parser.parse_args()
+
+    if args.file:
+        text = sys.stdin.read() if args.file == "-" else open(args.file, encoding="utf-8").read()
+    else:
+        text = fetch(args.url, args.token)
+    families, problems = parse(text)
+    problems += check(families)
+    print(json.dumps(summary(families), indent=2))
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Parallel per-section rendering
+Splits a scene at play() boundaries into contiguous segments, renders the segments
+on a process pool (each one fast-forwards through the earlier plays to rebuild
+its starting state) and joins them with an ffmpeg concat stream copy.
+
+Usage:
+    python3 parallel_render.py specs/enhanced_complex_math_problem.json --segments 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from manim import config, tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+
+from asset_cache import AssetCache
+from render_jobs import build_renderer, job_tex, load_scene, scene_options
+from tex_batch import compile_batch
+
+_pool = None
+_pool_size = 0
+
+
+class PlanningRenderer(CairoRenderer):
+    """Skips every animation but records how long each play() lasts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+
+    def play(self, scene, *args, **kwargs):
+        super().play(scene, *args, **kwargs)
+        self.durations.append(scene.duration)
+
+
+def plan_plays(job, workdir):
+    """Durations of every play() in the scene, found without rendering any frames."""
+    name, make_scene = load_scene(job)
+    planning_job = {**job, "media_dir": str(workdir / "plan")}
+    with tempconfig(scene_options(planning_job, name, save_last_frame=True, write_to_movie=False)):
+        renderer = PlanningRenderer()
+        make_scene(renderer=renderer).render()
+    return renderer.durations
+
+
+def split_segments(durations, count):
+    """Contiguous (first, last) play ranges with roughly equal screen time."""
+    count = max(1, min(count, len(durations)))
+    target = sum(durations) / count
+    segments = []
+    start = 0
+    elapsed = 0.0
+    for index, duration in enumerate(durations):
+        elapsed += duration
+        remaining_plays = len(durations) - index - 1
+        remaining_segments = count - len(segments) - 1
+        if remaining_segments and (elapsed >= target * (len(segments) + 1) or remaining_plays == remaining_segments):
+            segments.append((start, index))
+            start = index + 1
+    segments.append((start, len(durations) - 1))
+    return segments
+
+
+def _init_segment_process():
+    AssetCache().install()
+
+
+def _render_segment(job, index, first, last):
+    name, make_scene = load_scene(job)
+    segment_job = {**job, "media_dir": os.path.join(job["media_dir"], f"segment_{index:03d}")}
+    overrides = {"from_animation_number": first, "upto_animation_number": last}
+    with tempconfig(scene_options(segment_job, f"{name}_{index:03d}", **overrides)):
+        scene = make_scene(renderer=build_renderer(segment_job))
+        scene.render()
+        return str(scene.renderer.file_writer.movie_file_path)
+
+
+def concat_stream_copy(parts, output):
+    list_file = Path(output).with_suffix(".txt")
+    list_file.write_text("".join(f"file 'file:{part}'\n" for part in parts), encoding="utf-8")
+    subprocess.run(
+        [config.ffmpeg_executable, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+         "-i", str(list_file), "-c", "copy", "-movflags", "+faststart", str(output)],
+        check=True,
+    )
+    list_file.unlink()
+    return output
+
+
+def get_pool(size):
+    """Keep one pool of warm segment processes per worker, rebuilt if the size changes."""
+    global _pool, _pool_size
+    if _pool is None or _pool_size != size:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=size, mp_context=get_context("spawn"), initializer=_init_segment_process)
+        _pool_size = size
+    return _pool
+
+
+def pool_pids():
+    """PIDs of the warm segment processes, which outlive any one render."""
+    return [str(pid) for pid in (_pool._processes or {})] if _pool is not None else []
+
+
+def render_parallel(job, asset_cache, segments=None):
+    """Render a job on a process pool; returns the final movie path and timings."""
+    segments = segments or job.get("parallel") or os.cpu_count()
+    started = time.perf_counter()
+    tex_batch = compile_batch(asset_cache, job_tex(job))
+    with tempfile.TemporaryDirectory(prefix="render-plan-") as workdir:
+        durations = plan_plays(job, Path(workdir))
+    planned = time.perf_counter()
+
+    ranges = split_segments(durations, segments)
+    # Sized by the setting, not this scene: a short scene with fewer ranges just leaves
+    # processes idle instead of respawning the pool (and re-importing manim).
+    pool = get_pool(segments)
+    futures = [pool.submit(_render_segment, job, index, first, last) for index, (first, last) in enumerate(ranges)]
+    parts = [future.result() for future in futures]
+    rendered = time.perf_counter()
+
+    name, _ = load_scene(job)
+    output = Path(job["media_dir"]) / f"{name}.mp4"
+    concat_stream_copy(parts, output)
+    return {
+        "path": str(output),
+        "segments": ranges,
+        "plan_seconds": planned - started,
+        "segment_seconds": rendered - planned,
+        "concat_seconds": time.perf_counter() - rendered,
+        "tex_batch": tex_batch,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="spec .json or scene .py")
+    parser.add_argument("--scene", help="scene class when rendering a .py script")
+    parser.add_argument("--segments", type=int, default=os.cpu_count())
+    parser.add_argument("--quality", default="high")
+    parser.add_argument("--media-dir", default="media_parallel")
+    args = parser.parse_args()
+
+    job = {"quality": args.quality, "media_dir": os.path.abspath(args.media_dir)}
+    if args.source.endswith(".json"):
+        job["spec"] = json.loads(Path(args.source).read_text(encoding="utf-8"))
+    else:
+        job.update(script=os.path.abspath(args.source), scene=args.scene)
+    print(json.dumps(render_parallel(job, AssetCache().install(), args.segments), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Render benchmark for the bundled scenes
+Renders every bundled scene plus a few specs shaped like the ones video-generator.ts
+builds, at a fixed quality, first with empty (cold) and then with populated (warm)
+asset and segment caches. Each run is a fresh process, so import time and peak RSS
+are per render. Wall time is split into import, layout, TeX compile, Text/Pango,
+frame rasterization, encoding, file I/O and everything else.
+
+Usage:
+    python3 render_bench.py run [--quality medium] [--repeat 1] [-o results.json] [--baseline baseline.json]
+    python3 render_bench.py compare baseline.json results.json [--threshold 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BENCH_VERSION = 1
+
+SCENES = [
+    {"case": "MathProblemSolution", "script": "test_manim.py", "scene": "MathProblemSolution"},
+    {"case": "ComplexMathProblem", "script": "test_complex_manim.py", "scene": "ComplexMathProblem"},
+    {"case": "EnhancedComplexMathProblem", "script": "enhanced_complex_manim.py", "scene": "EnhancedComplexMathProblem"},
+    {"case": "Problem174Solution", "script": "problem_174_solution.py", "scene": "Problem174Solution"},
+    {"case": "Problem174SolutionImproved", "script": "problem_174_solution_improved.py", "scene": "Problem174SolutionImproved"},
+]
+
+# Inputs for generated_spec(), standing in for Gemini answers of different lengths.
+GENERATED = [
+    ("generated_short", "x^2 - 4 = 0 を解け", ["左辺を因数分解する", "(x - 2)(x + 2) = 0", "答えは x = 2, -2"]),
+    ("generated_medium", "連立方程式 x + y = 5, x - y = 1 を解け", [
+        "二つの式を足す", "2x = 6", "x = 3", "一つ目の式に代入する", "3 + y = 5", "y = 2", "答えは x = 3, y = 2",
+    ]),
+    ("generated_long", "1 から 100 までの整数の和を求めよ", [
+        "求める和を S とおく", "S = 1 + 2 + ... + 100", "逆順に並べる", "S = 100 + 99 + ... + 1",
+        "二つの式を足す", "2S = 101 × 100", "2S = 10100", "両辺を 2 で割る", "S = 5050", "答えは 5050",
+    ]),
+]
+
+PHASES = ["import", "layout", "tex", "text", "rasterize", "encode", "file_io", "other"]
+# Differences smaller than this are noise, whatever the ratio.
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA = 16 * 1024 * 1024
+
+
+def generated_spec(name, problem, steps):
+    """The spec buildSolutionSpec() in src/lib/video-generator.ts makes for a solution."""
+    elements = [
+        {"id": "title", "type": "text", "content": "数学の動画解説", "font_size": 48, "color": "BLUE",
+         "place": [{"op": "to_edge", "edge": "UP"}]},
+        {"id": "problem", "type": "text", "content": problem, "font_size": 32, "color": "WHITE",
+         "place": [{"op": "next_to", "target": "title", "direction": "DOWN", "buff": 1}]},
+    ]
+    timeline = [
+        {"play": [{"anim": "write", "target": "title"}], "wait": 1},
+        {"play": [{"anim": "write", "target": "problem"}], "wait": 2},
+    ]
+    y_position = -1
+    for index, step in enumerate(steps):
+        elements.append({
+            "id": f"step{index}", "type": "text", "content": step, "font_size": 28, "color": "GREEN",
+            "place": [{"op": "shift", "by": [0, -y_position]}],
+        })
+        timeline.append({"play": [{"anim": "write", "target": f"step{index}"}], "wait": 2})
+        y_position += 0.8
+    timeline.append({"wait": 3})
+    return {"version": 1, "name": name, "elements": elements, "timeline": timeline}
+
+
+def bench_cases():
+    cases = [dict(scene) for scene in SCENES]
+    for path in sorted((SCRIPTS_DIR / "specs").glob("*.json")):
+        cases.append({"case": f"spec:{path.stem}", "spec_path": str(path)})
+    for name, problem, steps in GENERATED:
+        cases.append({"case": name, "spec": generated_spec(name, problem, steps)})
+    return cases
+
+
+class PhaseTimer:
+    """Exclusive wall time per phase: a nested phase pauses the one it was called from."""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.stack = []
+        self.mark = None
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            self.seconds[self.stack[-1]] += now - self.mark
+        self.stack.append(phase)
+        self.calls[phase] += 1
+        self.mark = now
+
+    def exit(self):
+        now = time.perf_counter()
+        self.seconds[self.stack.pop()] += now - self.mark
+        self.mark = now
+
+    def wrap(self, phase, function):
+        def timed(*args, **kwargs):
+            self.enter(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.exit()
+
+        return timed
+
+    def patch(self, owner, name, phase):
+        setattr(owner, name, self.wrap(phase, getattr(owner, name)))
+
+
+def run_case(case, quality):
+    """Render one case in this process and return its measurements."""
+    started = time.perf_counter()
+    import manim  # noqa: F401
+
+    import render_jobs
+    import tex_batch
+    from asset_cache import AssetCache, CacheDir
+    from layout_check import check_layout
+    from manim import tempconfig
+    from manim.mobject.text import tex_mobject, text_mobject
+    import_seconds = time.perf_counter() - started
+
+    timer = PhaseTimer()
+    timer.seconds["import"] = import_seconds
+    asset_cache = AssetCache().install()
+    timer.patch(tex_mobject, "tex_to_svg_file", "tex")
+    timer.patch(tex_batch, "compile_batch", "tex")
+    timer.patch(text_mobject.Text, "_text2svg", "text")
+    timer.patch(CacheDir, "get", "file_io")
+    timer.patch(CacheDir, "put", "file_io")
+
+    job = {"quality": quality}
+    if "script" in case:
+        job.update(script=str(SCRIPTS_DIR / case["script"]), scene=case["scene"])
+    else:
+        spec = case.get("spec") or json.loads(Path(case["spec_path"]).read_text(encoding="utf-8"))
+        # Production renders fit the layout first (render_worker.fit_layout).
+        timer.enter("layout")
+        try:
+            job["spec"] = check_layout(spec, asset_cache, fix=True)["spec"]
+        finally:
+            timer.exit()
+
+    media_dir = tempfile.mkdtemp(prefix="render-bench-")
+    try:
+        job["media_dir"] = media_dir
+        name, make_scene = render_jobs.load_scene(job)
+        with tempconfig(render_jobs.scene_options(job, name)):
+            tex_batch.compile_batch(asset_cache, render_jobs.job_tex(job))
+            renderer = build_timed_renderer(job, timer)
+            timer.enter("other")
+            try:
+                scene = make_scene(renderer=renderer)
+                scene.render()
+            finally:
+                timer.exit()
+            movie = Path(scene.renderer.file_writer.movie_file_path)
+            output_bytes = movie.stat().st_size
+        wall_seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(media_dir, ignore_errors=True)
+
+    # Time outside any wrapped call (construct(), mobject updates, manim bookkeeping).
+    timer.seconds["other"] += max(0.0, wall_seconds - sum(timer.seconds.values()))
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "phases": {phase: round(seconds, 4) for phase, seconds in timer.seconds.items()},
+        "frames": renderer.frames_written,
+        "output_bytes": output_bytes,
+        # ru_maxrss is in KiB on Linux.
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "peak_child_rss_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024,
+        "asset_cache": asset_cache.stats(),
+    }
+
+
+def build_timed_renderer(job, timer):
+    from render_jobs import build_renderer
+
+    renderer = build_renderer(job)
+    renderer.frames_written = 0
+    for name in ("update_frame", "save_static_frame_data", "get_frame"):
+        timer.patch(renderer, name, "rasterize")
+
+    writer_class = renderer._file_writer_class
+
+    class TimedFileWriter(writer_class):
+        def write_frame(self, frame):
+            renderer.frames_written += 1
+            return super().write_frame(frame)
+
+    for name in ("begin_animation", "write_frame", "end_animation", "combine_to_movie"):
+        setattr(TimedFileWriter, name, timer.wrap("encode", getattr(TimedFileWriter, name)))
+    renderer._file_writer_class = TimedFileWriter
+    return renderer
+
+
+def run_in_subprocess(case, quality, cache_root):
+    env = {
+        **os.environ,
+        "MANIM_ASSET_CACHE_DIR": str(cache_root / "assets"),
+        "MANIM_SEGMENT_CACHE_DIR": str(cache_root / "segments"),
+    }
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "case", json.dumps(case, ensure_ascii=False), "--quality", quality],
+        cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_suite(quality, repeat, only=None):
+    results = []
+    for case in bench_cases():
+        if only and case["case"] not in only:
+            continue
+        runs = {"cold": [], "warm": []}
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(prefix="render-bench-cache-") as cache_root:
+                cache_root = Path(cache_root)
+                # The cold run fills the caches the warm run then reads.
+                runs["cold"].append(run_in_subprocess(case, quality, cache_root))
+                runs["warm"].append(run_in_subprocess(case, quality, cache_root))
+        for cache, measured in runs.items():
+            ok = [run for run in measured if "error" not in run]
+            entry = {"case": case["case"], "cache": cache}
+            if ok:
+                # The run with the median wall time, so phases and RSS come from one render.
+                ok.sort(key=lambda run: run["wall_seconds"])
+                entry.update(ok[len(ok) // 2])
+                entry["wall_seconds_runs"] = [run["wall_seconds"] for run in ok]
+            else:
+                entry["error"] = measured[0]["error"]
+            results.append(entry)
+            print(f"{case['case']} ({cache}): {entry.get('wall_seconds', entry.get('error'))}", file=sys.stderr)
+    return {
+        "version": BENCH_VERSION,
+        "quality": quality,
+        "repeat": repeat,
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Regressions of current against baseline, matched by case and cache state."""
+    if baseline.get("quality") != current.get("quality"):
+        raise SystemExit(f"quality differs: baseline {baseline.get('quality')}, current {current.get('quality')}")
+    previous = {(entry["case"], entry["cache"]): entry for entry in baseline["results"]}
+    rows = []
+    for entry in current["results"]:
+        before = previous.get((entry["case"], entry["cache"]))
+        if before is None or "error" in before:
+            continue
+        row = {"case": entry["case"], "cache": entry["cache"], "regressions": []}
+        if "error" in entry:
+            row["regressions"].append({"metric": "error", "current": entry["error"]})
+            rows.append(row)
+            continue
+        metrics = [("wall_seconds", entry["wall_seconds"], before["wall_seconds"], MIN_SECONDS_DELTA),
+                   ("peak_rss_bytes", entry["peak_rss_bytes"], before["peak_rss_bytes"], MIN_RSS_DELTA)]
+        metrics += [(f"phases.{phase}", entry["phases"][phase], before["phases"][phase], MIN_SECONDS_DELTA)
+                    for phase in PHASES]
+        for metric, now, then, floor in metrics:
+            change = (now - then) / then if then else 0.0
+            if now - then > floor and change > threshold:
+                row["regressions"].append({"metric": metric, "baseline": then, "current": now, "change": round(change, 3)})
+        row["wall_change"] = round((entry["wall_seconds"] - before["wall_seconds"]) / before["wall_seconds"], 3)
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows, stream=sys.stdout):
+    regressed = [row for row in rows if row["regressions"]]
+    report = {"compared": len(rows), "regressed": len(regressed), "rows": rows}
+    print(json.dumps(report, indent=2, ensure_ascii=False), file=stream)
+    return bool(regressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run")
+    run.add_argument("--quality", default="medium")
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--case", action="append", help="only run these cases")
+    run.add_argument("-o", "--output", default="-")
+    run.add_argument("--baseline", help="flag regressions against a saved result file")
+    run.add_argument("--threshold", type=float, default=0.15)
+    comparison = sub.add_parser("compare")
+    comparison.add_argument("baseline")
+    comparison.add_argument("current")
+    comparison.add_argument("--threshold", type=float, default=0.15)
+    case = sub.add_parser("case", help=argparse.SUPPRESS)
+    case.add_argument("spec")
+    case.add_argument("--quality", default="medium")
+    args = parser.parse_args()
+
+    if args.command == "case":
+        # Child process: manim logs to stdout, so only the last line is the result.
+        print(json.dumps(run_case(json.loads(args.spec), args.quality), ensure_ascii=False))
+        return
+
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+        sys.exit(1 if print_comparison(compare(baseline, current, args.threshold)) else 0)
+
+    results = run_suite(args.quality, args.repeat, args.case)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text, encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        # Results may already be on stdout.
+        regressed = print_comparison(compare(baseline, results, args.threshold), sys.stderr)
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
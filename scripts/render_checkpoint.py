@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Render checkpoints
+A render killed by the job timeout or a crash loses every play() it had finished,
+because the partial movies live in the per-render media directory that is deleted
+afterwards. With job["checkpoint_dir"], each finished partial movie is also kept
+there, next to a progress.json naming the completed plays. A retry of the same job
+fast-forwards through those plays (manim's from_animation_number, as in
+parallel_render.py), splices the kept segments back in and renders only the rest.
+The directory is removed once the render succeeds.
+
+`check` kills a render mid-scene, resumes it, and compares the result frame by frame
+with an uninterrupted render of the same job.
+
+Usage:
+    python3 render_checkpoint.py check [specs/*.json] [--quality low]
+    python3 render_checkpoint.py prune
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from step_spec import spec_hash, validate_spec
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_ROOT = os.path.join(tempfile.gettempdir(), "render-checkpoints")
+MAX_AGE_SECONDS = 24 * 3600
+PROGRESS_FILE = "progress.json"
+
+CHECK_JOBS = [{"spec": "specs/enhanced_complex_math_problem.json"}]
+
+
+def checkpoint_root():
+    return os.environ.get("RENDER_CHECKPOINT_DIR", DEFAULT_ROOT)
+
+
+def job_fingerprint(job):
+    """What the kept segments depend on; a checkpoint from a different job is discarded."""
+    if "spec" in job:
+        source = spec_hash(validate_spec(job["spec"]))
+    else:
+        source = hashlib.sha256(Path(job["script"]).read_bytes()).hexdigest() + ":" + job["scene"]
+    options = {key: job.get(key) for key in ("quality", "hold_frames", "layer_cache", "memory_budget_mb")}
+    canonical = json.dumps({"source": source, **options}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """The contiguous prefix of finished plays of one job, as movie files plus progress.json."""
+
+    def __init__(self, directory, fingerprint):
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+        self.segments = self._load()
+        if not self.segments:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Plays below this index are skipped and spliced in from the checkpoint.
+        self.resumed = len(self.segments)
+
+    def _load(self):
+        try:
+            progress = json.loads((self.directory / PROGRESS_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        if progress.get("fingerprint") != self.fingerprint:
+            return []
+        segments = progress.get("segments", [])
+        if not all((self.directory / name).is_file() for name in segments):
+            return []
+        return segments
+
+    def segment_path(self, index):
+        return self.directory / self.segments[index]
+
+    def record(self, index, movie):
+        """Keep the movie of play `index` once every play before it is kept."""
+        if index != len(self.segments):
+            return
+        movie = Path(movie)
+        target = self.directory / f"play_{index:05d}{movie.suffix}"
+        tmp = self.directory / f".{target.name}"
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(movie, tmp)
+        except OSError:
+            shutil.copyfile(movie, tmp)
+        os.replace(tmp, target)
+        self.segments.append(target.name)
+        self._write()
+
+    def _write(self):
+        progress = {"fingerprint": self.fingerprint, "completed": len(self.segments), "segments": self.segments,
+                    "updated_at": time.time()}
+        tmp = self.directory / f".{PROGRESS_FILE}"
+        tmp.write_text(json.dumps(progress), encoding="utf-8")
+        # A kill between the two writes leaves the previous, still valid progress.
+        os.replace(tmp, self.directory / PROGRESS_FILE)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def open_checkpoint(job):
+    """The job's Checkpoint, or None when it has no checkpoint_dir or renders without partial movies."""
+    if not job.get("checkpoint_dir") or job.get("output_path"):
+        return None
+    return Checkpoint(job["checkpoint_dir"], job_fingerprint(job))
+
+
+def prune_checkpoints(root=None, max_age=MAX_AGE_SECONDS):
+    """Remove checkpoints of jobs that were never retried."""
+    root = Path(root or checkpoint_root())
+    removed = 0
+    if not root.is_dir():
+        return removed
+    cutoff = time.time() - max_age
+    for directory in root.iterdir():
+        try:
+            stale = directory.is_dir() and directory.stat().st_mtime < cutoff
+        except OSError:
+            continue
+        if stale:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class CheckpointWriterMixin:
+    """SceneFileWriter mixin that keeps finished partial movies and splices them back in on resume."""
+
+    checkpoint = None
+
+    def add_partial_movie_file(self, hash_animation):
+        index = self.renderer.num_plays
+        if hash_animation is None and index < self.checkpoint.resumed:
+            # Skipped through from_animation_number; combine_to_movie uses the kept segment.
+            self.partial_movie_files.append(str(self.checkpoint.segment_path(index)))
+            return
+        super().add_partial_movie_file(hash_animation)
+
+    def end_animation(self, allow_write=False):
+        super().end_animation(allow_write)
+        index = self.renderer.num_plays
+        if self.checkpoint.resumed <= index < len(self.partial_movie_files):
+            movie = self.partial_movie_files[index]
+            if movie is not None and os.path.exists(movie):
+                self.checkpoint.record(index, movie)
+
+
+class WorkerProcess:
+    """A render_worker.py child, driven over its JSON-lines protocol."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, str(SCRIPTS_DIR / "render_worker.py")],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        ready = json.loads(self.proc.stdout.readline())
+        if ready.get("event") != "ready":
+            raise RuntimeError(f"worker did not start: {ready}")
+
+    def send(self, job):
+        self.proc.stdin.write(json.dumps({**job, "id": "check"}) + "\n")
+        self.proc.stdin.flush()
+
+    def reply(self):
+        reply = json.loads(self.proc.stdout.readline())
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply["result"]
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+
+
+def frame_hashes(movie):
+    """MD5 of every decoded frame."""
+    from manim import config
+
+    output = subprocess.run(
+        [config.ffmpeg_executable, "-loglevel", "error", "-i", str(movie), "-map", "0:v", "-f", "framemd5", "-"],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in output.splitlines() if line and not line.startswith("#")]
+
+
+def check_job(job, workdir):
+    """Render uninterrupted, then kill a checkpointed render halfway and resume it; compare frames."""
+    # The shared segment store would make the resumed render a cache hit and prove nothing.
+    job = {**job, "segment_cache": False, "disable_caching": True}
+    checkpoint_dir = workdir / "checkpoint"
+
+    worker = WorkerProcess()
+    try:
+        worker.send({**job, "media_dir": str(workdir / "uninterrupted")})
+        expected = worker.reply()
+    finally:
+        worker.close()
+    expected_frames = frame_hashes(expected["path"])
+
+    # Play count, from the uninterrupted render's own checkpoint-free partial movie list.
+    plays = len(list((workdir / "uninterrupted").rglob("partial_movie_files/**/*.mp4")))
+    kill_after = max(1, plays // 2)
+    worker = WorkerProcess()
+    worker.send({**job, "media_dir": str(workdir / "killed"), "checkpoint_dir": str(checkpoint_dir)})
+    progress_file = checkpoint_dir / PROGRESS_FILE
+    completed = 0
+    while worker.proc.poll() is None:
+        try:
+            completed = json.loads(progress_file.read_text(encoding="utf-8"))["completed"]
+        except (OSError, ValueError, KeyError):
+            completed = 0
+        if completed >= kill_after:
+            worker.proc.send_signal(signal.SIGKILL)
+            worker.proc.wait()
+            break
+        time.sleep(0.01)
+    else:
+        raise RuntimeError("the render finished before it could be killed")
+
+    worker = WorkerProcess()
+    try:
+        worker.send({**job, "media_dir": str(workdir / "resumed"), "checkpoint_dir": str(checkpoint_dir)})
+        resumed = worker.reply()
+    finally:
+        worker.close()
+    resumed_frames = frame_hashes(resumed["path"])
+
+    mismatched = sum(a != b for a, b in zip(expected_frames, resumed_frames))
+    return {
+        "plays": plays,
+        "killed_after_plays": completed,
+        "resumed_plays": (resumed.get("checkpoint") or {}).get("resumed_plays"),
+        "frames": len(expected_frames),
+        "resumed_frames": len(resumed_frames),
+        "mismatched_frames": mismatched + abs(len(expected_frames) - len(resumed_frames)),
+        "uninterrupted_seconds": round(expected["render_seconds"], 3),
+        "resumed_seconds": round(resumed["render_seconds"], 3),
+        "checkpoint_removed": not checkpoint_dir.exists(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check")
+    check.add_argument("specs", nargs="*", help="spec .json files (default: a bundled spec)")
+    check.add_argument("--quality", default="low")
+    sub.add_parser("prune")
+    args = parser.parse_args()
+
+    if args.command == "prune":
+        print(json.dumps({"removed": prune_checkpoints()}))
+        return
+
+    paths = [Path(spec).resolve() for spec in args.specs] or [SCRIPTS_DIR / entry["spec"] for entry in CHECK_JOBS]
+    results = []
+    for path in paths:
+        job = {"spec": json.loads(path.read_text(encoding="utf-8")), "quality": args.quality}
+        with tempfile.TemporaryDirectory(prefix="checkpoint-check-") as workdir:
+            results.append({"spec": path.name, **check_job(job, Path(workdir))})
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if any(result["mismatched_frames"] or not result["resumed_plays"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
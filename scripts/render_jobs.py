@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Render job helpers shared by the render worker and its helper processes
+A job is a dict with either a StepSolutionScene "spec" or a "script" + "scene" pair.
+"""
+
+import runpy
+
+from manim.constants import QUALITIES as MANIM_QUALITIES
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+
+from hls_publisher import HlsPublisher, HlsWriterMixin
+from hold_frames import HoldRendererMixin, HoldWriterMixin
+from layer_cache import LayerCacheRendererMixin
+from memory_budget import MemoryBudgetRendererMixin
+from render_checkpoint import CheckpointWriterMixin
+from render_trace import TraceRendererMixin, TraceWriterMixin
+from segment_store import SegmentStoreWriterMixin, get_segment_store
+from single_encoder import (
+    SingleEncoderRendererMixin,
+    SingleEncoderWriterMixin,
+    encoder_outputs,
+    rendition_resolution,
+)
+from step_scene import StepSolutionScene
+from step_spec import validate_spec
+from tex_batch import script_tex, spec_tex
+
+QUALITIES = {
+    "low": "low_quality",
+    "medium": "medium_quality",
+    "high": "high_quality",
+    "production": "production_quality",
+}
+
+
+def load_scene(job):
+    """Build the scene for a job: a StepSolutionScene spec, or a class from a script."""
+    if "spec" in job:
+        spec = validate_spec(job["spec"])
+        return spec["name"], lambda **kwargs: StepSolutionScene(spec, **kwargs)
+    namespace = runpy.run_path(job["script"], run_name="render_job")
+    return job["scene"], namespace[job["scene"]]
+
+
+def job_tex(job):
+    if "spec" in job:
+        return spec_tex(job["spec"])
+    return script_tex(job["script"])
+
+
+def scene_options(job, name, **overrides):
+    """tempconfig options for rendering a job into job["media_dir"]."""
+    options = {
+        "media_dir": job["media_dir"],
+        "output_file": name,
+        "quality": QUALITIES.get(job.get("quality", "high"), "high_quality"),
+        # A single-encoder render has no partial movies, so hashing each play() is wasted work.
+        "disable_caching": job.get("disable_caching", False) or bool(job.get("output_path")),
+        "verbosity": "WARNING",
+        "progress_bar": "none",
+    }
+    if job.get("renditions"):
+        pixel_height = MANIM_QUALITIES[options["quality"]]["pixel_height"]
+        options["pixel_width"], options["pixel_height"] = rendition_resolution(job, pixel_height)
+    options.update(overrides)
+    return options
+
+
+def build_renderer(job, trace=None, rss_sampler=None, checkpoint=None):
+    """Cairo renderer and file writer composed from the mixins the job asks for."""
+    renderer_mixins = []
+    renderer_attrs = {"trace": trace}
+    memory_budget = bool(job.get("memory_budget_mb")) and rss_sampler is not None
+    if memory_budget:
+        renderer_mixins.append(MemoryBudgetRendererMixin)
+        renderer_attrs["rss_sampler"] = rss_sampler
+    # The layer cache keeps an extra full-frame canvas per render, so a budget turns it off by default.
+    if job.get("layer_cache", not memory_budget):
+        renderer_mixins.append(LayerCacheRendererMixin)
+
+    writer_mixins = []
+    writer_attrs = {}
+    single_encoder = bool(job.get("output_path"))
+    if single_encoder:
+        # One ffmpeg process for the whole render: there are no partial movies to
+        # stream, share through the segment store or re-encode as holds.
+        writer_mixins.append(SingleEncoderWriterMixin)
+        writer_attrs["outputs"] = encoder_outputs(job)
+    else:
+        if job.get("stream_dir"):
+            writer_mixins.append(HlsWriterMixin)
+            writer_attrs["hls_publisher"] = HlsPublisher(job["stream_dir"])
+        if job.get("segment_cache", True) and not job.get("disable_caching", False):
+            writer_mixins.append(SegmentStoreWriterMixin)
+            writer_attrs["segment_store"] = get_segment_store()
+    if job.get("hold_frames", True):
+        renderer_mixins.append(HoldRendererMixin)
+        if not single_encoder:
+            # Last, so a hold is re-encoded before it is stored or published.
+            writer_mixins.append(HoldWriterMixin)
+    if checkpoint is not None and not single_encoder:
+        # Outside the hold, store and stream mixins, so what is kept is the finished partial movie.
+        writer_mixins.insert(0, CheckpointWriterMixin)
+        writer_attrs["checkpoint"] = checkpoint
+    if single_encoder:
+        renderer_mixins.append(SingleEncoderRendererMixin)
+
+    if trace is not None:
+        # Outermost, so the timings include every other mixin.
+        renderer_mixins.insert(0, TraceRendererMixin)
+        writer_mixins.insert(0, TraceWriterMixin)
+
+    file_writer_class = type("JobFileWriter", (*writer_mixins, SceneFileWriter), writer_attrs)
+    renderer_class = type("JobRenderer", (*renderer_mixins, CairoRenderer), renderer_attrs)
+    return renderer_class(file_writer_class=file_writer_class)
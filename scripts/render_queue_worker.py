@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+BullMQ render queue consumer
+Takes `renderQueue` jobs from Redis (see src/lib/queue.ts) and runs them on warm
+render_worker.py processes, killing and replacing a process that misses the job timeout.
+
+Usage:
+    pip install bullmq
+    REDIS_URL=redis://localhost:6379 python3 render_queue_worker.py
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+from pathlib import Path
+
+from bullmq import Worker
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+QUEUE_NAME = "renderQueue"
+
+
+class RenderProcess:
+    """One render_worker.py child speaking the JSON-lines protocol."""
+
+    def __init__(self, max_jobs):
+        self.max_jobs = max_jobs
+        self.proc = None
+        self.jobs_completed = 0
+        self.next_id = 0
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            os.environ.get("RENDER_PYTHON", sys.executable), str(SCRIPTS_DIR / "render_worker.py"),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, cwd=SCRIPTS_DIR,
+            # The protocol can carry whole specs, so raise the default line limit.
+            limit=16 * 1024 * 1024,
+        )
+        ready = json.loads(await self.proc.stdout.readline() or b"{}")
+        if ready.get("event") != "ready":
+            await self.kill()
+            raise RuntimeError("Render worker exited before it was ready")
+
+    async def kill(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
+        self.proc = None
+
+    async def run(self, job, timeout):
+        if self.proc is None or self.proc.returncode is not None:
+            await self.start()
+        self.next_id += 1
+        message_id = str(self.next_id)
+        self.proc.stdin.write((json.dumps({**job, "id": message_id}, ensure_ascii=False) + "\n").encode())
+        await self.proc.stdin.drain()
+        try:
+            line = await asyncio.wait_for(self.proc.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            await self.kill()
+            raise RuntimeError(f"Render timed out after {timeout:.0f}s")
+        if not line:
+            await self.kill()
+            raise RuntimeError("Render worker exited")
+
+        reply = json.loads(line)
+        self.jobs_completed += 1
+        if self.jobs_completed >= self.max_jobs:
+            # Recycle to bound memory growth, like the Node render pool does.
+            await self.kill()
+            self.jobs_completed = 0
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error") or "Render failed")
+        return reply["result"]
+
+
+class RenderSlots:
+    """A fixed set of render processes handed out one job at a time."""
+
+    def __init__(self, size, max_jobs):
+        self.idle = asyncio.Queue()
+        for _ in range(size):
+            self.idle.put_nowait(RenderProcess(max_jobs))
+
+    async def run(self, job, timeout):
+        process = await self.idle.get()
+        try:
+            return await process.run(job, timeout)
+        finally:
+            self.idle.put_nowait(process)
+
+    async def close(self):
+        while not self.idle.empty():
+            await self.idle.get_nowait().kill()
+
+
+def publish(source, output_path):
+    """Copy a finished movie into the video cache under its final name atomically."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.stem}.", suffix=".mp4")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, output_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_rendition_manifest(data, renditions):
+    """Same shape as RenditionManifest in src/lib/video-generator.ts; returns its URL."""
+    base_url = data["url"].rsplit("/", 1)[0]
+    manifest = {
+        "key": data["key"],
+        "tier": data["tier"],
+        "renditions": [
+            {**{k: v for k, v in file.items() if k != "path"},
+             "url": data["url"] if file["name"] == "main" else f"{base_url}/{os.path.basename(file['path'])}"}
+            for file in renditions
+        ],
+    }
+    target = Path(data["renditionsPath"])
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.stem}.", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, target)
+    return f"{base_url}/{target.name}"
+
+
+def make_processor(slots, single_encoder, memory_budget_mb, checkpoint_root, prep_workers):
+    async def process(job, token):
+        data = job.data
+        media_dir = tempfile.mkdtemp(prefix=f"media_{data['key'][:16]}_{data['tier']}_")
+        try:
+            await job.updateProgress(10)
+            result = await slots.run({
+                "op": "render",
+                "spec": data["spec"],
+                "media_dir": media_dir,
+                "quality": data["quality"],
+                "parallel": data.get("parallel", 0),
+                # The single encoder renames its output into place itself.
+                "output_path": data["outputPath"] if single_encoder else None,
+                # Renditions come out of the single encoder's ffmpeg process.
+                "renditions": data.get("renditions", []) if single_encoder else [],
+                "memory_budget_mb": memory_budget_mb,
+                "prep_workers": prep_workers,
+                # A retried attempt resumes from the plays the timed-out one finished.
+                "checkpoint_dir": None if single_encoder else os.path.join(checkpoint_root, f"{data['key']}-{data['tier']}"),
+                "fit_layout": True,
+            }, data["timeoutMs"] / 1000)
+            await job.updateProgress(90)
+            if not single_encoder:
+                publish(result["path"], data["outputPath"])
+            renditions_url = write_rendition_manifest(data, result["renditions"]) if result.get("renditions") else None
+        finally:
+            shutil.rmtree(media_dir, ignore_errors=True)
+        peak_rss = (result.get("memory") or {}).get("peak_total_bytes", 0)
+        print(f"Rendered {data['tier']} video {data['key']} in {result['render_seconds']:.1f}s "
+              f"after {result.get('prep_seconds', 0):.1f}s of asset prep, "
+              f"peak RSS {peak_rss / 2**20:.0f} MiB", file=sys.stderr)
+        return {
+            "key": data["key"],
+            "tier": data["tier"],
+            "url": data["url"],
+            "renditionsUrl": renditions_url,
+            "renderSeconds": result["render_seconds"],
+            "prepSeconds": result.get("prep_seconds"),
+            "peakRssBytes": peak_rss,
+        }
+
+    return process
+
+
+async def main():
+    # Same variables as queueSettings.renderQueue in src/lib/queue.ts.
+    concurrency = int(os.environ.get("RENDER_QUEUE_CONCURRENCY", "2"))
+    max_jobs = int(os.environ.get("RENDER_MAX_JOBS_PER_WORKER", "50"))
+    slots = RenderSlots(concurrency, max_jobs)
+    single_encoder = os.environ.get("VIDEO_SINGLE_ENCODER") == "1"
+    memory_budget_mb = int(os.environ.get("RENDER_MEMORY_BUDGET_MB", "0")) or None
+    checkpoint_root = os.environ.get("RENDER_CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "render-checkpoints"))
+    prep_workers = int(os.environ.get("RENDER_PREP_WORKERS", "0"))
+    worker = Worker(QUEUE_NAME, make_processor(slots, single_encoder, memory_budget_mb, checkpoint_root, prep_workers), {
+        "connection": os.environ.get("REDIS_URL", "redis://localhost:6379"),
+        "concurrency": concurrency,
+    })
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"Consuming {QUEUE_NAME} with concurrency {concurrency}", file=sys.stderr)
+    await stop.wait()
+    await worker.close()
+    await slots.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
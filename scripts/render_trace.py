@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Per-animation render trace
+Records every play() and wait() of a render (mobjects on screen, frames, time spent
+rasterizing and encoding, segment cache hit or miss) and every Text/MathTex
+construction as Chrome trace events. Open the JSON in chrome://tracing or Perfetto
+to see which step of a slow render the time went to.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from manim import config
+
+
+class RenderTrace:
+    """Chrome trace "complete" events, timed from when the trace was created."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+
+    def complete(self, name, category, started, ended, args=None):
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self.origin) * 1e6, 1),
+            "dur": round((ended - started) * 1e6, 1),
+            "pid": self.pid,
+            "tid": 0,
+            "args": args or {},
+        })
+
+    @contextmanager
+    def span(self, name, category, **args):
+        started = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.complete(name, category, started, time.perf_counter(), args)
+
+    def parallel_phases(self, started, result):
+        """Phase events for a parallel_render.py result; its plays run in other processes."""
+        planned = started + result["plan_seconds"]
+        rendered = planned + result["segment_seconds"]
+        # Planning includes the TeX batch.
+        self.complete("plan", "plan", started, planned)
+        self.complete("render_segments", "segment", planned, rendered, {"segments": result["segments"]})
+        self.complete("concat", "encode", rendered, rendered + result["concat_seconds"])
+
+    @contextmanager
+    def mobject_construction(self):
+        """Time every Text/MarkupText/MathTex/Tex built while the block runs."""
+        from manim import MarkupText, MathTex, Tex, Text
+
+        trace = self
+        depth = [0]
+        originals = {}
+
+        def timed_init(cls, init):
+            def __init__(mobject, *args, **kwargs):
+                # Tex builds through MathTex.__init__; only the outermost call is an event.
+                if depth[0]:
+                    return init(mobject, *args, **kwargs)
+                depth[0] += 1
+                started = time.perf_counter()
+                try:
+                    return init(mobject, *args, **kwargs)
+                finally:
+                    depth[0] -= 1
+                    content = " ".join(str(arg) for arg in args if isinstance(arg, str))
+                    trace.complete(f"{cls.__name__}({content[:40]})", "mobject", started, time.perf_counter(),
+                                   {"class": cls.__name__, "content": content})
+            return __init__
+
+        for cls in (Text, MarkupText, MathTex, Tex):
+            originals[cls] = cls.__dict__["__init__"]
+            cls.__init__ = timed_init(cls, originals[cls])
+        try:
+            yield self
+        finally:
+            for cls, init in originals.items():
+                cls.__init__ = init
+
+    def write(self, path, **metadata):
+        """Write the trace atomically, so a reader never sees a partial file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".trace-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": metadata},
+                          f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return path
+
+
+class TraceRendererMixin:
+    """CairoRenderer mixin that emits one trace event per play() or wait()."""
+
+    trace = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.play_stats = None
+        self._raster_depth = 0
+
+    def play(self, scene, *args, **kwargs):
+        self.play_stats = {"rasterize_ms": 0.0, "rasterized_frames": 0}
+        self.file_writer.trace_stats = {"encode_ms": 0.0, "frames_piped": 0, "cache": None}
+        index = self.num_plays
+        started = time.perf_counter()
+        try:
+            super().play(scene, *args, **kwargs)
+        finally:
+            ended = time.perf_counter()
+            animations = scene.animations or []
+            names = [type(animation).__name__ for animation in animations]
+            writer_stats = self.file_writer.trace_stats
+            cache = writer_stats["cache"] or ("skipped" if self.skip_animations else "disabled")
+            args = {
+                "index": index,
+                "animations": names,
+                "duration": round(scene.duration, 4),
+                "mobjects": len(scene.mobjects),
+                "family_mobjects": sum(len(mobject.get_family()) for mobject in scene.mobjects),
+                "frames": 0 if self.skip_animations else int(scene.duration * config.frame_rate),
+                "rasterized_frames": self.play_stats["rasterized_frames"],
+                "rasterize_ms": round(self.play_stats["rasterize_ms"], 3),
+                "encode_ms": round(writer_stats["encode_ms"], 3),
+                "frames_piped": writer_stats["frames_piped"],
+                "cache": cache,
+            }
+            kind = "wait" if names and all(name == "Wait" for name in names) else "play"
+            label = f"{kind} {index}: {', '.join(names) if kind == 'play' else f'{scene.duration:g}s'}"
+            self.trace.complete(label, kind, started, ended, args)
+            self.play_stats = None
+
+    def update_frame(self, *args, **kwargs):
+        return self._rasterizing(super().update_frame, *args, **kwargs)
+
+    def save_static_frame_data(self, *args, **kwargs):
+        return self._rasterizing(super().save_static_frame_data, *args, **kwargs)
+
+    def _rasterizing(self, method, *args, **kwargs):
+        # save_static_frame_data() draws through update_frame(); count the outer call only.
+        if self.play_stats is None or self._raster_depth:
+            return method(*args, **kwargs)
+        self._raster_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._raster_depth -= 1
+            self.play_stats["rasterize_ms"] += (time.perf_counter() - started) * 1000
+            self.play_stats["rasterized_frames"] += 1
+
+
+class TraceWriterMixin:
+    """SceneFileWriter mixin that reports encode time and cache lookups to the trace."""
+
+    trace_stats = None
+
+    def is_already_cached(self, hash_invocation):
+        hit = super().is_already_cached(hash_invocation)
+        if self.trace_stats is not None:
+            self.trace_stats["cache"] = "hit" if hit else "miss"
+        return hit
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        return self._encoding(super().begin_animation, allow_write, file_path)
+
+    def write_frame(self, frame):
+        if self.trace_stats is not None:
+            self.trace_stats["frames_piped"] += 1
+        return self._encoding(super().write_frame, frame)
+
+    def end_animation(self, allow_write=False):
+        return self._encoding(super().end_animation, allow_write)
+
+    def combine_to_movie(self):
+        trace = self.renderer.trace
+        with trace.span("combine_to_movie", "encode"):
+            return super().combine_to_movie()
+
+    def _encoding(self, method, *args):
+        if self.trace_stats is None or getattr(self, "_encode_depth", 0):
+            return method(*args)
+        self._encode_depth = 1
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._encode_depth = 0
+            self.trace_stats["encode_ms"] += (time.perf_counter() - started) * 1000
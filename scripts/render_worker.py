@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Long-lived Manim render worker
+Imports manim once and serves render jobs as JSON lines over stdin/stdout
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+# Manim logs through rich to stdout, so keep the real stdout for the protocol
+# and point fd 1 at stderr before manim is imported.
+protocol_out = os.fdopen(os.dup(1), "w", buffering=1)
+os.dup2(2, 1)
+sys.stdout = sys.stderr
+
+import_started = time.perf_counter()
+from manim import config, tempconfig
+from asset_cache import AssetCache
+from asset_prep import pool_pids as prep_pool_pids, prepare_spec
+from layout_check import check_layout
+from memory_budget import MemoryBudgetExceeded, RssSampler
+from parallel_render import pool_pids as segment_pool_pids, render_parallel
+from render_checkpoint import open_checkpoint, prune_checkpoints
+from render_jobs import build_renderer, job_tex, load_scene, scene_options
+from render_trace import RenderTrace
+from segment_store import get_segment_store, store_stats
+from step_spec import SpecError, spec_hash, validate_spec
+from tex_batch import compile_batch
+from timeline_export import export_timeline
+import_seconds = time.perf_counter() - import_started
+
+asset_cache = AssetCache().install()
+
+
+def send(message):
+    protocol_out.write(json.dumps(message, ensure_ascii=False) + "\n")
+    protocol_out.flush()
+
+
+def cache_lookups(before):
+    """TeX and Text cache hits and misses since `before` (an asset_cache.stats() snapshot)."""
+    after = asset_cache.stats()
+    return {name: after[name] - before[name] for name in ("tex_hits", "tex_misses", "text_hits", "text_misses")}
+
+
+def prune_caches():
+    asset_cache.prune()
+    get_segment_store().prune()
+    prune_checkpoints()
+
+
+def fit_layout(job):
+    """Paginate/scale a spec job before rendering; reject it if the layout still can't fit."""
+    report = check_layout(job["spec"], asset_cache, fix=True)
+    fitted = report.pop("spec")
+    if not report["ok"]:
+        raise SpecError(f"layout check failed: {json.dumps(report, ensure_ascii=False)}")
+    return {**job, "spec": fitted}, report
+
+
+def pool_pids():
+    return prep_pool_pids() + segment_pool_pids()
+
+
+def render(job, prune=True):
+    lookups_before = asset_cache.stats()
+    layout = None
+    if job.get("fit_layout") and "spec" in job:
+        job, layout = fit_layout(job)
+
+    # Sampled for every render, so peak RSS is reported whether or not there is a budget.
+    budget_mb = job.get("memory_budget_mb")
+    sampler = RssSampler(budget_mb * 1024 * 1024 if budget_mb else None, pool_pids=pool_pids)
+
+    if job.get("parallel", 0) > 1 and not job.get("output_path"):
+        # Segments render in parallel_render.py's pool processes, which keep no checkpoint,
+        # skip asset prep and are traced by phase only.
+        ignored = [key for key in ("checkpoint_dir", "prep_workers") if job.get(key)]
+        if ignored:
+            print(f"Parallel render ignores {', '.join(ignored)}", file=sys.stderr)
+        trace = RenderTrace() if job.get("trace_path") else None
+        started = time.perf_counter()
+        with sampler:
+            result = render_parallel(job, asset_cache)
+        render_seconds = time.perf_counter() - started
+        if trace:
+            trace.parallel_phases(started, result)
+            trace.write(job["trace_path"], scene=os.path.splitext(os.path.basename(result["path"]))[0],
+                        quality=job.get("quality", "high"), render_seconds=round(render_seconds, 3),
+                        parallel_segments=len(result["segments"]), layout=layout)
+        if prune:
+            prune_caches()
+        return {
+            **result,
+            "render_seconds": render_seconds,
+            "trace_path": job["trace_path"] if trace else None,
+            "checkpoint": None,
+            "prep": None,
+            "asset_cache": asset_cache.stats(),
+            "segment_cache": store_stats(get_segment_store()),
+            "memory": sampler.report(),
+            "bytes_written": os.path.getsize(result["path"]),
+            "cache_lookups": cache_lookups(lookups_before),
+            "layout": layout,
+        }
+
+    name, make_scene = load_scene(job)
+    checkpoint = open_checkpoint(job)
+    # Plays a killed attempt already finished are fast-forwarded and spliced in from the checkpoint.
+    resume = {"from_animation_number": checkpoint.resumed} if checkpoint and checkpoint.resumed else {}
+    options = scene_options(job, name, **resume)
+    trace = RenderTrace() if job.get("trace_path") else None
+    started = time.perf_counter()
+    with sampler, tempconfig(options), (trace.mobject_construction() if trace else contextlib.nullcontext()):
+        # Every Text/MathTex asset is ready before construct() runs; see asset_prep.py.
+        with (trace.span("asset_prep", "prep") if trace else contextlib.nullcontext()):
+            if "spec" in job:
+                built, prep = prepare_spec(asset_cache, job["spec"], job.get("prep_workers", 0))
+                tex_batch = prep.pop("tex_batch")
+                scene_kwargs = {"built": built}
+            else:
+                # Script scenes build their own mobjects; only their formulas can be batched.
+                tex_batch, prep, scene_kwargs = compile_batch(asset_cache, job_tex(job)), None, {}
+        prep_seconds = time.perf_counter() - started
+        scene = make_scene(renderer=build_renderer(job, trace, sampler, checkpoint), **scene_kwargs)
+        scene.render()
+        movie_path = str(scene.renderer.file_writer.movie_file_path)
+        # renderer.time only advances for frames actually written, held frames included.
+        frames = round(scene.renderer.time * config.frame_rate)
+    render_seconds = time.perf_counter() - started - prep_seconds
+    if checkpoint:
+        checkpoint.clear()
+    if trace:
+        trace.write(job["trace_path"], scene=name, quality=job.get("quality", "high"),
+                    render_seconds=round(render_seconds, 3), prep_seconds=round(prep_seconds, 3), layout=layout)
+    if prune:
+        prune_caches()
+    renditions = getattr(scene.renderer.file_writer, "rendition_files", None)
+    return {
+        "path": movie_path,
+        "render_seconds": render_seconds,
+        "prep_seconds": prep_seconds,
+        "prep": prep,
+        "encode": getattr(scene.renderer.file_writer, "encode_stats", None),
+        "renditions": renditions,
+        "trace_path": job["trace_path"] if trace else None,
+        "asset_cache": asset_cache.stats(),
+        "segment_cache": store_stats(get_segment_store()),
+        "tex_batch": tex_batch,
+        "memory": {**sampler.report(), **getattr(scene.renderer, "memory_stats", {})},
+        "frames": frames,
+        "bytes_written": sum(r["bytes"] for r in renditions) if renditions else os.path.getsize(movie_path),
+        "cache_lookups": cache_lookups(lookups_before),
+        "checkpoint": {"resumed_plays": checkpoint.resumed} if checkpoint else None,
+        "layout": layout,
+    }
+
+
+def publish(source, target):
+    """Copy a finished file to `target` atomically, so a reader never sees a partial file."""
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".publish-", suffix=os.path.splitext(target)[1])
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def batch(job):
+    """Render job["jobs"] back to back in this process, e.g. every explanation on a worksheet.
+
+    TeX for the whole batch is compiled in one latex pass, and the caches are pruned
+    once at the end instead of between renders, so formulas and Text shared across
+    problems are built once. A failed item does not stop the rest. An item with a
+    publish_path is copied there as soon as it finishes, so it survives the batch
+    being killed later on.
+    """
+    started = time.perf_counter()
+    tex_batch = compile_batch(asset_cache, [tex for item in job["jobs"] for tex in job_tex(item)])
+    items = []
+    for item in job["jobs"]:
+        try:
+            result = render(item, prune=False)
+            if item.get("publish_path"):
+                publish(result["path"], item["publish_path"])
+            items.append({"id": item.get("id"), "ok": True, "result": result})
+        except SpecError as error:
+            items.append({"id": item.get("id"), "ok": False, "error": str(error), "reason": "invalid_spec"})
+        except MemoryBudgetExceeded as error:
+            items.append({"id": item.get("id"), "ok": False, "error": str(error), "reason": "memory_budget"})
+        except Exception as error:
+            traceback.print_exc()
+            items.append({"id": item.get("id"), "ok": False, "error": str(error)})
+    prune_caches()
+    return {
+        "items": items,
+        "render_seconds": time.perf_counter() - started,
+        "tex_batch": tex_batch,
+        "asset_cache": asset_cache.stats(),
+    }
+
+
+def poster(job):
+    """Write the scene state after `step` steps (default: the end) as a PNG, without any frames.
+
+    A step of a spec job is one entry of its timeline, play and wait together; a step
+    of a script job is one play() (wait() counts as one).
+    """
+    step = job.get("step")
+    if step is not None and "spec" in job:
+        # Tag the spec's own entries, so the cut below still falls between the same
+        # steps after fit_layout has inserted page fade-outs.
+        spec = validate_spec(job["spec"])
+        timeline = [{**entry, "_step": index} for index, entry in enumerate(spec["timeline"])]
+        job = {**job, "spec": {**spec, "timeline": timeline}}
+
+    layout = None
+    if job.get("fit_layout") and "spec" in job:
+        job, layout = fit_layout(job)
+
+    overrides = {"save_last_frame": True, "write_to_movie": False}
+    if step is not None and "spec" in job:
+        # Keep everything up to the last entry of step `step - 1`. A fade-out inserted
+        # for a later step's new page comes after it and is dropped.
+        timeline = job["spec"]["timeline"]
+        ends = [index for index, entry in enumerate(timeline) if entry.get("_step", int(step)) < int(step)]
+        job = {**job, "spec": {**job["spec"], "timeline": timeline[:ends[-1] + 1] if ends else []}}
+    elif step is not None and int(step) > 0:
+        # upto_animation_number is inclusive: manim stops after play number `step - 1`,
+        # so the last frame is the state after `step` plays.
+        overrides["upto_animation_number"] = int(step) - 1
+    elif step is not None:
+        # Manim has no bound for "no plays" (-1 means unbounded).
+        raise ValueError("a poster of step 0 needs a spec job")
+    name, make_scene = load_scene(job)
+    started = time.perf_counter()
+    with tempconfig(scene_options(job, name, **overrides)):
+        compile_batch(asset_cache, job_tex(job))
+        scene = make_scene()
+        scene.render()
+        image_path = str(scene.renderer.file_writer.image_file_path)
+    return {"path": image_path, "render_seconds": time.perf_counter() - started, "layout": layout}
+
+
+def timeline(job):
+    """Export the scene as SVG paths plus an animation timeline for the browser player."""
+    layout = None
+    if job.get("fit_layout") and "spec" in job:
+        job, layout = fit_layout(job)
+
+    started = time.perf_counter()
+    compile_batch(asset_cache, job_tex(job))
+    data = export_timeline(job)
+    os.makedirs(job["media_dir"], exist_ok=True)
+    path = os.path.join(job["media_dir"], f"{data['name']}.timeline.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    return {"path": path, "render_seconds": time.perf_counter() - started, "layout": layout}
+
+
+def handle(job):
+    op = job.get("op", "render")
+    if op == "ping":
+        return {"pid": os.getpid()}
+    if op == "render":
+        return render(job)
+    if op == "batch":
+        return batch(job)
+    if op == "poster":
+        return poster(job)
+    if op == "timeline":
+        return timeline(job)
+    if op == "validate":
+        return {"hash": spec_hash(validate_spec(job["spec"]))}
+    if op == "layout":
+        return check_layout(job["spec"], asset_cache, fix=job.get("fix", False))
+    raise ValueError(f"Unknown op: {op}")
+
+
+def main():
+    send({"event": "ready", "pid": os.getpid(), "import_seconds": import_seconds})
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        try:
+            send({"id": job.get("id"), "ok": True, "result": handle(job)})
+        except SpecError as error:
+            send({"id": job.get("id"), "ok": False, "error": str(error), "reason": "invalid_spec"})
+        except MemoryBudgetExceeded as error:
+            send({"id": job.get("id"), "ok": False, "error": str(error), "reason": "memory_budget"})
+        except Exception as error:
+            traceback.print_exc()
+            send({"id": job.get("id"), "ok": False, "error": str(error)})
+
+
+if __name__ == "__main__":
+    main()
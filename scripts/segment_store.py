@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Shared animation segment store
+Manim names every partial movie by a hash of (camera config, animations, mobjects on
+screen before the play), but keeps them in a per-render media directory. This store
+keeps them across renders and workers, so an identical play() (the opening
+Write(title), a shared problem intro, the unchanged steps of a regenerated solution)
+is spliced in instead of rendered again.
+
+Usage:
+    python3 segment_store.py stats
+    python3 segment_store.py prune
+"""
+
+import json
+import os
+import shutil
+import sys
+
+from asset_cache import CacheDir
+
+DEFAULT_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "nexus-academy", "manim-segments")
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+_store = None
+
+
+def get_segment_store():
+    global _store
+    if _store is None:
+        _store = CacheDir(
+            os.environ.get("MANIM_SEGMENT_CACHE_DIR", DEFAULT_ROOT),
+            int(os.environ.get("MANIM_SEGMENT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+    return _store
+
+
+def store_stats(store):
+    return {"hits": store.hits, "misses": store.misses, "bytes": store.size()}
+
+
+class SegmentStoreWriterMixin:
+    """SceneFileWriter mixin that looks up and publishes partial movies in a shared store."""
+
+    segment_store = None
+
+    def is_already_cached(self, hash_invocation):
+        if super().is_already_cached(hash_invocation):
+            return True
+        hit = self.segment_store.get(self._segment_name(hash_invocation))
+        if hit is None:
+            return False
+        local = os.path.join(self.partial_movie_directory, hit.name)
+        try:
+            os.link(hit, local)
+        except OSError:
+            shutil.copyfile(hit, local)
+        return True
+
+    def end_animation(self, allow_write=False):
+        super().end_animation(allow_write)
+        if not allow_write:
+            return
+        movie = self.partial_movie_files[self.renderer.num_plays]
+        # Uncached plays are named by position, not content, so they can't be shared.
+        if movie is None or os.path.basename(movie).startswith("uncached_") or not os.path.exists(movie):
+            return
+        self.segment_store.put(os.path.basename(movie), movie)
+
+    def _segment_name(self, hash_invocation):
+        from manim import config
+
+        return f"{hash_invocation}{config.movie_file_extension}"
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    store = get_segment_store()
+    if command == "prune":
+        print(json.dumps({"removed": store.prune(), **store_stats(store)}, indent=2))
+    elif command == "stats":
+        print(json.dumps(store_stats(store), indent=2))
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Single-encoder output
+By default every play() and wait() is piped into its own ffmpeg process and written
+as a partial movie, the partials are concatenated into the scene movie, and the Node
+side then copies that file into the video cache. Here one ffmpeg process is opened
+per render, each frame is written to its stdin straight from the camera's pixel
+array (no tobytes() or get_frame() copies), and the encode goes to a temporary file
+next to job["output_path"] that is renamed over it once ffmpeg exits. x264 settings
+come from ENCODER_PRESETS by quality tier and can be overridden with job["encoder"].
+
+job["renditions"] adds outputs from RENDITIONS (360p WebM, 720p, 1080p) to the same
+ffmpeg process: frames are rasterized and piped once, at the largest size asked
+for, and split and scaled inside ffmpeg, so construct() never runs twice.
+
+`bench` renders the bundled scenes both ways and reports bytes written and encode time.
+
+Usage:
+    python3 single_encoder.py bench [specs/*.json] [--quality high]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from manim import config
+
+from memory_budget import BUDGET_ENCODER_SETTINGS
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Keyed by render_jobs.QUALITIES; gop_seconds sets the keyframe interval.
+ENCODER_PRESETS = {
+    "low": {"preset": "veryfast", "crf": 28, "gop_seconds": 4},
+    "medium": {"preset": "faster", "crf": 24, "gop_seconds": 4},
+    "high": {"preset": "medium", "crf": 21, "gop_seconds": 2},
+    "production": {"preset": "slow", "crf": 18, "gop_seconds": 2},
+}
+
+BENCH_JOBS = [
+    {"script": "problem_174_solution.py", "scene": "Problem174Solution"},
+    {"script": "enhanced_complex_manim.py", "scene": "EnhancedComplexMathProblem"},
+]
+
+
+# Extra outputs encoded from the same frames; heights above the tier's resolution
+# raise the render resolution instead of upscaling.
+RENDITIONS = {
+    "360p-webm": {"height": 360, "codec": "vp9", "crf": 36, "speed": 6, "gop_seconds": 4},
+    "720p": {"height": 720, "codec": "h264"},
+    "1080p": {"height": 1080, "codec": "h264"},
+}
+
+CONTAINERS = {"h264": ("mp4", "video/mp4"), "vp9": ("webm", "video/webm")}
+
+
+def encoder_settings(job):
+    settings = dict(ENCODER_PRESETS.get(job.get("quality", "high"), ENCODER_PRESETS["high"]))
+    if job.get("memory_budget_mb"):
+        settings.update(BUDGET_ENCODER_SETTINGS)
+    settings.update(job.get("encoder") or {})
+    return settings
+
+
+def encoder_outputs(job):
+    """The main output plus any job["renditions"] ({name, path}), with their encoder settings."""
+    outputs = [{"name": "main", "path": job["output_path"], "codec": "h264", "height": None, **encoder_settings(job)}]
+    for rendition in job.get("renditions") or []:
+        if rendition["name"] not in RENDITIONS:
+            raise ValueError(f"unknown rendition {rendition['name']!r}")
+        outputs.append({
+            **encoder_settings(job), **RENDITIONS[rendition["name"]],
+            "name": rendition["name"], "path": rendition["path"],
+        })
+    return outputs
+
+
+def rendition_resolution(job, pixel_height):
+    """Pixel size to rasterize at: the tier's, or the tallest rendition if that is larger."""
+    height = max([pixel_height] + [RENDITIONS[r["name"]]["height"] for r in job.get("renditions") or []])
+    return round(height * 16 / 9 / 2) * 2, height
+
+
+def _codec_args(output, fps):
+    gop = str(max(1, round(output["gop_seconds"] * fps)))
+    if output["codec"] == "vp9":
+        return ["-c:v", "libvpx-vp9", "-pix_fmt", "yuv420p", "-b:v", "0", "-crf", str(output["crf"]),
+                "-deadline", "realtime", "-cpu-used", str(output["speed"]), "-row-mt", "1", "-g", gop,
+                "-f", "webm"]
+    args = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", output["preset"], "-crf", str(output["crf"]),
+            "-g", gop, "-movflags", "+faststart", "-f", "mp4"]
+    # Each lookahead frame and frame thread holds a full-size picture inside x264.
+    if "rc_lookahead" in output:
+        args[-2:-2] = ["-x264-params", f"rc-lookahead={output['rc_lookahead']}"]
+    if "threads" in output:
+        args[-2:-2] = ["-threads", str(output["threads"])]
+    return args
+
+
+class SingleEncoderRendererMixin:
+    """CairoRenderer mixin that hands the camera's pixel array to the writer without copying it."""
+
+    def render(self, scene, time, moving_mobjects):
+        self.update_frame(scene, moving_mobjects)
+        # write_frame() finishes with the buffer before the next frame is drawn into it.
+        self.add_frame(self.camera.pixel_array)
+
+
+class SingleEncoderWriterMixin:
+    """SceneFileWriter mixin that pipes every frame of a render into one ffmpeg process."""
+
+    outputs = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoder = None
+        self.encoder_tmps = []
+        self.rendition_files = []
+        self.encode_stats = {"frames": 0, "bytes_piped": 0, "bytes_written": 0, "encode_seconds": 0.0}
+
+    def is_already_cached(self, hash_invocation):
+        # There are no partial movies to splice in.
+        return False
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        if allow_write and self.encoder is None:
+            self.open_encoder()
+
+    def end_animation(self, allow_write=False):
+        pass
+
+    def open_encoder(self):
+        fps = config.frame_rate
+        command = [
+            config.ffmpeg_executable, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-s", f"{config.pixel_width}x{config.pixel_height}", "-pix_fmt", "rgba",
+            "-r", str(fps),
+        ]
+        if "thread_queue_size" in self.outputs[0]:
+            # Frames ffmpeg buffers between reading stdin and encoding them.
+            command += ["-thread_queue_size", str(self.outputs[0]["thread_queue_size"])]
+        command += ["-i", "-", "-an"]
+        # Every output reads the same decoded frames; only the scale differs.
+        labels = [f"[v{index}]" for index in range(len(self.outputs))]
+        branches = [
+            f"{label}scale=-2:{output['height']}[o{index}]"
+            if output["height"] and output["height"] != config.pixel_height else f"{label}null[o{index}]"
+            for index, (label, output) in enumerate(zip(labels, self.outputs))
+        ]
+        command += ["-filter_complex", f"[0:v]split={len(labels)}{''.join(labels)};{';'.join(branches)}"]
+
+        for index, output in enumerate(self.outputs):
+            path = Path(output["path"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix)
+            os.close(fd)
+            self.encoder_tmps.append(tmp)
+            command += ["-map", f"[o{index}]", *_codec_args(output, fps), tmp]
+        self.encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write_frame(self, frame):
+        started = time.perf_counter()
+        self.encoder.stdin.write(memoryview(frame).cast("B"))
+        self.encode_stats["encode_seconds"] += time.perf_counter() - started
+        self.encode_stats["frames"] += 1
+        self.encode_stats["bytes_piped"] += frame.nbytes
+
+    def write_hold(self, frame, num_frames):
+        # Called by HoldRendererMixin; the same buffer is piped again rather than re-encoded.
+        for _ in range(num_frames):
+            self.write_frame(frame)
+
+    def combine_to_movie(self):
+        if self.encoder is None:
+            raise RuntimeError("Scene produced no frames to encode")
+        started = time.perf_counter()
+        try:
+            self.encoder.stdin.close()
+            if self.encoder.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with status {self.encoder.returncode}")
+            for tmp, output in zip(self.encoder_tmps, self.outputs):
+                os.replace(tmp, output["path"])
+        finally:
+            for tmp in self.encoder_tmps:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+        self.encode_stats["encode_seconds"] += time.perf_counter() - started
+
+        for output in self.outputs:
+            height = output["height"] or config.pixel_height
+            size = os.path.getsize(output["path"])
+            self.encode_stats["bytes_written"] += size
+            self.rendition_files.append({
+                "name": output["name"],
+                "path": str(output["path"]),
+                "width": round(config.pixel_width * height / config.pixel_height / 2) * 2,
+                "height": height,
+                "codec": output["codec"],
+                "mimeType": CONTAINERS[output["codec"]][1],
+                "bytes": size,
+            })
+        self.movie_file_path = self.outputs[0]["path"]
+
+
+class EncodeTimingWriterMixin:
+    """Times the stock per-animation encode path, for the benchmark baseline."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encode_stats = {"encode_seconds": 0.0}
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.encode_stats["encode_seconds"] += time.perf_counter() - started
+
+    def write_frame(self, frame):
+        return self._timed(super().write_frame, frame)
+
+    def end_animation(self, allow_write=False):
+        return self._timed(super().end_animation, allow_write)
+
+    def combine_to_movie(self):
+        return self._timed(super().combine_to_movie)
+
+
+def bench_job(source, media_dir, quality, single_encoder):
+    import shutil
+
+    from manim import tempconfig
+
+    from render_jobs import build_renderer, load_scene, scene_options
+
+    if isinstance(source, dict):
+        job = {**source, "script": str(SCRIPTS_DIR / source["script"])}
+    else:
+        job = {"spec": json.loads(Path(source).read_text(encoding="utf-8"))}
+    job_dir = os.path.join(media_dir, "single" if single_encoder else "partial")
+    job.update(media_dir=job_dir, quality=quality, disable_caching=True)
+    cache_path = os.path.join(media_dir, "cache", f"{'single' if single_encoder else 'partial'}.mp4")
+    if single_encoder:
+        job["output_path"] = cache_path
+
+    name, make_scene = load_scene(job)
+    with tempconfig(scene_options(job, name)):
+        renderer = build_renderer(job)
+        if not single_encoder:
+            writer_class = renderer._file_writer_class
+            renderer._file_writer_class = type(writer_class.__name__, (EncodeTimingWriterMixin, writer_class), {})
+        started = time.perf_counter()
+        scene = make_scene(renderer=renderer)
+        scene.render()
+        writer = scene.renderer.file_writer
+        if not single_encoder:
+            # The copy video-generator.ts makes into public/videos.
+            copy_started = time.perf_counter()
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            shutil.copyfile(writer.movie_file_path, cache_path)
+            writer.encode_stats["encode_seconds"] += time.perf_counter() - copy_started
+        seconds = time.perf_counter() - started
+
+    # Partial movies, the concatenated movie and the cache copy all count.
+    bytes_written = sum(path.stat().st_size for path in Path(media_dir).rglob("*.mp4") if path.is_file())
+    output_bytes = os.path.getsize(cache_path)
+    shutil.rmtree(job_dir, ignore_errors=True)
+    os.unlink(cache_path)
+    return name, {
+        "seconds": round(seconds, 3),
+        "encode_seconds": round(writer.encode_stats["encode_seconds"], 3),
+        "bytes_written": bytes_written,
+        "output_bytes": output_bytes,
+    }
+
+
+def bench(sources, quality):
+    from asset_cache import AssetCache
+
+    AssetCache().install()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="encoder-bench-") as media_dir:
+        for source in sources:
+            # First pass warms the SVG cache so both runs measure the same work.
+            bench_job(source, media_dir, quality, single_encoder=False)
+            name, partial = bench_job(source, media_dir, quality, single_encoder=False)
+            _, single = bench_job(source, media_dir, quality, single_encoder=True)
+            results.append({
+                "scene": name,
+                "quality": quality,
+                "encoder": encoder_settings({"quality": quality}),
+                "partial_movies": partial,
+                "single_encoder": single,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("sources", nargs="*", help="spec .json files (default: the bundled scenes)")
+    parser.add_argument("--quality", default="high")
+    args = parser.parse_args()
+
+    sources = [os.path.abspath(source) for source in args.sources] or BENCH_JOBS
+    print(json.dumps(bench(sources, args.quality), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
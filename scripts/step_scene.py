@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Data-driven step solution scene
+Renders a validated JSON spec (see step_spec.py) without generating Python source
+"""
+
+import sys
+
+from manim import *
+
+from step_spec import load_spec, validate_spec
+
+DIRECTION_VECTORS = {
+    "UP": UP, "DOWN": DOWN, "LEFT": LEFT, "RIGHT": RIGHT,
+    "UL": UL, "UR": UR, "DL": DL, "DR": DR,
+}
+
+
+def resolve_color(value, default=WHITE):
+    if value is None:
+        return default
+    if value.startswith("#"):
+        return value
+    return globals()[value]
+
+
+def build_element(element, built):
+    kind = element["type"]
+    color = resolve_color(element.get("color"))
+    if kind == "text":
+        return Text(
+            element["content"],
+            font_size=element.get("font_size", 32),
+            color=color,
+            weight=element.get("weight", NORMAL),
+        )
+    if kind == "tex":
+        return MathTex(element["content"], font_size=element.get("font_size", 36), color=color)
+    if kind == "rectangle":
+        return Rectangle(
+            width=element["width"],
+            height=element["height"],
+            color=color,
+            fill_opacity=element.get("fill_opacity", 0),
+            stroke_width=element.get("stroke_width", DEFAULT_STROKE_WIDTH),
+        )
+    if kind == "surround":
+        return SurroundingRectangle(
+            VGroup(*[built[member] for member in element["members"]]),
+            color=resolve_color(element.get("color"), YELLOW),
+            buff=element.get("buff", SMALL_BUFF),
+        )
+    if kind == "star":
+        return Star(color=color, fill_opacity=element.get("fill_opacity", 0))
+    return VGroup(*[built[member] for member in element["members"]])
+
+
+def apply_placement(mobject, op, built):
+    name = op["op"]
+    if name == "to_edge":
+        mobject.to_edge(DIRECTION_VECTORS[op["edge"]], buff=op.get("buff", DEFAULT_MOBJECT_TO_EDGE_BUFFER))
+    elif name == "to_corner":
+        mobject.to_corner(DIRECTION_VECTORS[op["corner"]], buff=op.get("buff", DEFAULT_MOBJECT_TO_EDGE_BUFFER))
+    elif name == "next_to":
+        mobject.next_to(
+            built[op["target"]],
+            DIRECTION_VECTORS[op.get("direction", "DOWN")],
+            buff=op.get("buff", DEFAULT_MOBJECT_TO_MOBJECT_BUFFER),
+        )
+    elif name == "move_to":
+        target = built[op["target"]]
+        point = {
+            "top": target.get_top,
+            "bottom": target.get_bottom,
+            "left": target.get_left,
+            "right": target.get_right,
+            "center": target.get_center,
+        }[op.get("point", "center")]()
+        offset = op.get("offset", [0, 0])
+        mobject.move_to(point + RIGHT * offset[0] + UP * offset[1])
+    elif name == "shift":
+        mobject.shift(RIGHT * op["by"][0] + UP * op["by"][1])
+    elif name == "set_width":
+        mobject.set_width(op["width"])
+    elif name == "scale":
+        mobject.scale(op["factor"])
+
+
+def build_layout(spec):
+    """Build and place every element of a spec, without adding anything to a scene."""
+    built = {}
+    for element in spec["elements"]:
+        mobject = build_element(element, built)
+        for op in element.get("place", []):
+            apply_placement(mobject, op, built)
+        built[element["id"]] = mobject
+    return built
+
+
+def build_animation(animation, built):
+    built_animation = _build_animation(animation, built)
+    if animation.get("fps"):
+        # Read by HoldRendererMixin: rasterize this animation at a lower frame rate.
+        built_animation.render_fps = animation["fps"]
+    return built_animation
+
+
+def _build_animation(animation, built):
+    target = built[animation["target"]]
+    name = animation["anim"]
+    if name == "write":
+        return Write(target)
+    if name == "create":
+        return Create(target)
+    if name == "fade_in":
+        return FadeIn(target)
+    if name == "fade_out":
+        return FadeOut(target)
+    if name == "transform":
+        return Transform(target, built[animation["to"]])
+    return Flash(target)
+
+
+class StepSolutionScene(Scene):
+    def __init__(self, spec, built=None, **kwargs):
+        self.spec = validate_spec(spec)
+        # Mobjects already built by asset_prep.prepare_spec(), keyed by element id.
+        self.built = built
+        super().__init__(**kwargs)
+
+    def construct(self):
+        if self.spec.get("background"):
+            self.camera.background_color = resolve_color(self.spec["background"])
+
+        built = self.built or build_layout(self.spec)
+        for entry in self.spec["timeline"]:
+            if entry.get("play"):
+                self.play(*[build_animation(animation, built) for animation in entry["play"]])
+            if entry.get("wait"):
+                self.wait(entry["wait"])
+
+
+if __name__ == "__main__":
+    spec = load_spec(sys.argv[1])
+    with tempconfig({"output_file": spec["name"]}):
+        scene = StepSolutionScene(spec)
+        scene.render()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Step solution specs
+Validation and hashing for the JSON specs rendered by StepSolutionScene
+(kept free of manim imports so specs can be checked without a renderer)
+"""
+
+import hashlib
+import json
+import sys
+
+SCENE_TEMPLATE_VERSION = 1
+
+ELEMENT_TYPES = {"text", "tex", "rectangle", "surround", "star", "group"}
+ANIMATIONS = {"write", "create", "fade_in", "fade_out", "transform", "flash"}
+DIRECTIONS = {"UP", "DOWN", "LEFT", "RIGHT", "UL", "UR", "DL", "DR"}
+CORNERS = {"UL", "UR", "DL", "DR"}
+POINTS = {"top", "bottom", "left", "right", "center"}
+COLORS = {
+    "WHITE", "BLACK", "GRAY", "BLUE", "GREEN", "RED", "YELLOW", "GOLD",
+    "ORANGE", "PURPLE", "PINK", "TEAL", "MAROON",
+}
+PLACE_OPS = {"to_edge", "to_corner", "next_to", "move_to", "shift", "set_width", "scale"}
+
+
+class SpecError(ValueError):
+    pass
+
+
+def _check_color(value, where):
+    if value is None:
+        return
+    if isinstance(value, str) and (value in COLORS or (value.startswith("#") and len(value) in (4, 7))):
+        return
+    raise SpecError(f"{where}: unknown color {value!r}")
+
+
+def _check_vector(value, where):
+    if not (isinstance(value, list) and len(value) == 2 and all(isinstance(v, (int, float)) for v in value)):
+        raise SpecError(f"{where}: expected [x, y], got {value!r}")
+
+
+def _check_place(op, known, where):
+    name = op.get("op")
+    if name not in PLACE_OPS:
+        raise SpecError(f"{where}: unknown placement op {name!r}")
+    if name == "to_edge" and op.get("edge") not in {"UP", "DOWN", "LEFT", "RIGHT"}:
+        raise SpecError(f"{where}: to_edge needs edge UP/DOWN/LEFT/RIGHT")
+    if name == "to_corner" and op.get("corner") not in CORNERS:
+        raise SpecError(f"{where}: to_corner needs corner UL/UR/DL/DR")
+    if name in ("next_to", "move_to"):
+        if op.get("target") not in known:
+            raise SpecError(f"{where}: {name} target {op.get('target')!r} is not defined earlier")
+    if name == "next_to" and op.get("direction", "DOWN") not in DIRECTIONS:
+        raise SpecError(f"{where}: unknown direction {op.get('direction')!r}")
+    if name == "move_to":
+        if op.get("point", "center") not in POINTS:
+            raise SpecError(f"{where}: unknown point {op.get('point')!r}")
+        if "offset" in op:
+            _check_vector(op["offset"], where)
+    if name == "shift":
+        _check_vector(op.get("by"), where)
+    if name == "set_width" and not isinstance(op.get("width"), (int, float)):
+        raise SpecError(f"{where}: set_width needs a numeric width")
+    if name == "scale" and not isinstance(op.get("factor"), (int, float)):
+        raise SpecError(f"{where}: scale needs a numeric factor")
+
+
+def _check_element(element, known, index):
+    where = f"elements[{index}]"
+    element_id = element.get("id")
+    if not isinstance(element_id, str) or not element_id:
+        raise SpecError(f"{where}: missing id")
+    if element_id in known:
+        raise SpecError(f"{where}: duplicate id {element_id!r}")
+    kind = element.get("type")
+    if kind not in ELEMENT_TYPES:
+        raise SpecError(f"{where}: unknown element type {kind!r}")
+    if kind in ("text", "tex") and not isinstance(element.get("content"), str):
+        raise SpecError(f"{where}: {kind} element needs string content")
+    if kind == "rectangle" and not all(isinstance(element.get(k), (int, float)) for k in ("width", "height")):
+        raise SpecError(f"{where}: rectangle needs width and height")
+    if kind in ("surround", "group"):
+        members = element.get("members")
+        if not isinstance(members, list) or not members:
+            raise SpecError(f"{where}: {kind} needs a non-empty members list")
+        for member in members:
+            if member not in known:
+                raise SpecError(f"{where}: member {member!r} is not defined earlier")
+    _check_color(element.get("color"), where)
+    for op in element.get("place", []):
+        _check_place(op, known, where)
+
+
+def _check_timeline(timeline, known):
+    if not isinstance(timeline, list):
+        raise SpecError("timeline must be a list")
+    for index, entry in enumerate(timeline):
+        where = f"timeline[{index}]"
+        if "play" not in entry and "wait" not in entry:
+            raise SpecError(f"{where}: needs play and/or wait")
+        for animation in entry.get("play", []):
+            name = animation.get("anim")
+            if name not in ANIMATIONS:
+                raise SpecError(f"{where}: unknown animation {name!r}")
+            if animation.get("target") not in known:
+                raise SpecError(f"{where}: unknown target {animation.get('target')!r}")
+            if name == "transform" and animation.get("to") not in known:
+                raise SpecError(f"{where}: transform needs a known 'to' element")
+            fps = animation.get("fps")
+            if fps is not None and not (isinstance(fps, (int, float)) and 0 < fps <= 120):
+                raise SpecError(f"{where}: fps must be a number in (0, 120]")
+        wait = entry.get("wait", 0)
+        if not isinstance(wait, (int, float)) or wait < 0:
+            raise SpecError(f"{where}: wait must be a non-negative number")
+
+
+def validate_spec(spec):
+    """Check a spec and return it unchanged, raising SpecError on the first problem."""
+    if not isinstance(spec, dict):
+        raise SpecError("spec must be an object")
+    if spec.get("version", 1) != SCENE_TEMPLATE_VERSION:
+        raise SpecError(f"unsupported spec version {spec.get('version')!r}")
+    if not isinstance(spec.get("name"), str) or not spec["name"].isidentifier():
+        raise SpecError("spec name must be a valid identifier")
+    _check_color(spec.get("background"), "background")
+    elements = spec.get("elements")
+    if not isinstance(elements, list) or not elements:
+        raise SpecError("spec needs a non-empty elements list")
+    known = set()
+    for index, element in enumerate(elements):
+        _check_element(element, known, index)
+        known.add(element["id"])
+    _check_timeline(spec.get("timeline"), known)
+    return spec
+
+
+def spec_hash(spec):
+    """Stable content hash of a spec, ignoring its output name."""
+    content = {key: value for key, value in spec.items() if key != "name"}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{SCENE_TEMPLATE_VERSION}:{canonical}".encode("utf-8")).hexdigest()
+
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        return validate_spec(json.load(f))
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        try:
+            print(f"{path}: ok {spec_hash(load_spec(path))[:16]}")
+        except SpecError as error:
+            print(f"{path}: {error}")
+            sys.exit(1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Batched LaTeX compilation
+Compiles every uncached MathTex of a scene or spec in one latex + dvisvgm pass
+and splits the pages back into per-expression entries of the shared asset cache.
+
+Usage:
+    python3 tex_batch.py specs/enhanced_complex_math_problem.json problem_174_solution_improved.py
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from asset_cache import AssetCache, manim_constants, script_calls, tex_cache_name
+
+MATH_ENVIRONMENT = "align*"
+
+
+def spec_tex(spec):
+    return [element["content"] for element in spec["elements"] if element["type"] == "tex"]
+
+
+def script_tex(script):
+    expressions = []
+    for _, args, kwargs in script_calls(script, manim_constants(), kinds=("MathTex",)):
+        if kwargs.get("substrings_to_isolate") or kwargs.get("tex_to_color_map"):
+            continue
+        expressions.append(kwargs.get("arg_separator", " ").join(args))
+    return expressions
+
+
+def _batch_document(expressions, template):
+    """One document with a cropped page per expression, built from manim's own texcode."""
+    header = None
+    pages = []
+    for expression in expressions:
+        code = template.get_texcode_for_expression_in_env(expression, MATH_ENVIRONMENT)
+        start = code.index(r"\begin{document}")
+        end = code.rindex(r"\end{document}")
+        header = code[:start]
+        body = code[start + len(r"\begin{document}"):end]
+        pages.append(f"\\begin{{manimpage}}{body}\\end{{manimpage}}")
+    header = header.replace(template.documentclass, r"\documentclass[preview,multi=manimpage]{standalone}", 1)
+    return "\n".join([
+        header,
+        r"\newenvironment{manimpage}{}{}",
+        r"\begin{document}",
+        *pages,
+        r"\end{document}",
+        "",
+    ])
+
+
+def _compile_pages(expressions, template, workdir):
+    """Compile expressions as one document; return per-page SVG paths or None on failure."""
+    workdir.mkdir(parents=True, exist_ok=True)
+    tex_file = workdir / "batch.tex"
+    tex_file.write_text(_batch_document(expressions, template), encoding="utf-8")
+    compiled = subprocess.run(
+        [template.tex_compiler, "-interaction=batchmode", "-halt-on-error",
+         f"-output-directory={workdir}", str(tex_file)],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    dvi_file = tex_file.with_suffix(template.output_format)
+    if compiled.returncode != 0 or not dvi_file.exists():
+        return None
+
+    subprocess.run(
+        ["dvisvgm", "--page=1-", "-n", "-v", "0", "-o", str(workdir / "page-%4p.svg"), str(dvi_file)],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    pages = sorted(workdir.glob("page-*.svg"))
+    if len(pages) != len(expressions):
+        return None
+    return pages
+
+
+def _compile_into_cache(expressions, cache, template, workdir, stats):
+    pages = _compile_pages(expressions, template, workdir)
+    if pages is not None:
+        for expression, page in zip(expressions, pages):
+            cache.tex.put(tex_cache_name(expression, MATH_ENVIRONMENT, template), page)
+        stats["compiled"] += len(expressions)
+        stats["latex_runs"] += 1
+        return
+    stats["latex_runs"] += 1
+    if len(expressions) == 1:
+        # Leave it uncached: MathTex compiles it on its own and reports the real error.
+        stats["fallback"].append(expressions[0])
+        return
+    middle = len(expressions) // 2
+    _compile_into_cache(expressions[:middle], cache, template, workdir / "a", stats)
+    _compile_into_cache(expressions[middle:], cache, template, workdir / "b", stats)
+
+
+def compile_batch(cache, expressions, tex_template=None):
+    """Precompile the uncached expressions so later MathTex calls are all cache hits."""
+    from manim import config
+
+    template = tex_template or config["tex_template"]
+    stats = {"requested": 0, "cached": 0, "compiled": 0, "latex_runs": 0, "fallback": []}
+    pending = []
+    seen = set()
+    for expression in expressions:
+        expression = expression.strip()
+        if not expression or expression in seen:
+            continue
+        seen.add(expression)
+        stats["requested"] += 1
+        if (cache.tex.root / tex_cache_name(expression, MATH_ENVIRONMENT, template)).exists():
+            stats["cached"] += 1
+        else:
+            pending.append(expression)
+
+    if pending:
+        with tempfile.TemporaryDirectory(prefix="tex-batch-") as workdir:
+            _compile_into_cache(pending, cache, template, Path(workdir), stats)
+    return stats
+
+
+def main():
+    cache = AssetCache()
+    for arg in sys.argv[1:]:
+        if arg.endswith(".json"):
+            expressions = spec_tex(json.loads(Path(arg).read_text(encoding="utf-8")))
+        else:
+            expressions = script_tex(arg)
+        print(arg, json.dumps(compile_batch(cache, expressions), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Vector timeline export
+Runs a scene with every animation skipped and records the SVG paths of everything
+on screen plus a keyed timeline of its animations (Write/Create/FadeIn/FadeOut/
+Transform/Flash with start, duration and rate function). The browser plays it back
+with src/components/TimelinePlayer.tsx instead of downloading an mp4.
+
+`check` renders each bundled scene to mp4 as well, draws the exported state at the
+end of every play with cairo and reports the PSNR against the matching video frame.
+
+Usage:
+    python3 timeline_export.py export specs/math_problem_solution.json -o timeline.json
+    python3 timeline_export.py export problem_174_solution.py --scene Problem174Solution -o timeline.json
+    python3 timeline_export.py check [--quality low] [--min-psnr 28]
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from manim import config, tempconfig
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.utils.color import color_to_rgb, rgb_to_hex
+
+from render_jobs import load_scene, scene_options
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+TIMELINE_VERSION = 1
+# Cairo draws stroke widths in hundredths of a frame unit.
+STROKE_WIDTH_UNIT = 0.01
+
+INTRO_TYPES = {
+    "Write": "write",
+    "AddTextLetterByLetter": "write",
+    "DrawBorderThenFill": "write",
+    "Create": "create",
+    "ShowCreation": "create",
+    "FadeIn": "fade_in",
+    "GrowFromCenter": "fade_in",
+}
+OUTRO_TYPES = {"FadeOut": "fade_out", "Uncreate": "fade_out", "Unwrite": "fade_out"}
+
+CHECK_JOBS = [
+    {"spec": "specs/math_problem_solution.json"},
+    {"spec": "specs/enhanced_complex_math_problem.json"},
+    {"script": "problem_174_solution.py", "scene": "Problem174Solution"},
+    {"script": "problem_174_solution_improved.py", "scene": "Problem174SolutionImproved"},
+]
+
+
+def _fmt(value):
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def path_data(mobject):
+    """SVG path data for a VMobject in frame units, with y pointing down."""
+    commands = []
+    for subpath in mobject.get_subpaths():
+        if len(subpath) < 4:
+            continue
+        points = [(_fmt(x), _fmt(-y)) for x, y, _ in subpath]
+        commands.append(f"M{points[0][0]} {points[0][1]}")
+        for index in range(0, len(points) - 3, 4):
+            h1, h2, end = points[index + 1:index + 4]
+            commands.append(f"C{h1[0]} {h1[1]} {h2[0]} {h2[1]} {end[0]} {end[1]}")
+        if np.allclose(subpath[0], subpath[-1]):
+            commands.append("Z")
+    return "".join(commands)
+
+
+def _hex(color):
+    return rgb_to_hex(color_to_rgb(color))
+
+
+def shape(mobject):
+    return {
+        "d": path_data(mobject),
+        "fill": _hex(mobject.get_fill_color()),
+        "fillOpacity": round(float(mobject.get_fill_opacity()), 4),
+        "stroke": _hex(mobject.get_stroke_color()),
+        "strokeOpacity": round(float(mobject.get_stroke_opacity()), 4),
+        "strokeWidth": round(float(mobject.get_stroke_width()) * STROKE_WIDTH_UNIT, 5),
+    }
+
+
+def leaves(mobject):
+    return [member for member in mobject.get_family() if member.has_points() and hasattr(member, "get_subpaths")]
+
+
+def fingerprint(leaf):
+    return hash((
+        leaf.points.tobytes(),
+        str(leaf.get_fill_color()), float(leaf.get_fill_opacity()),
+        str(leaf.get_stroke_color()), float(leaf.get_stroke_opacity()), float(leaf.get_stroke_width()),
+    ))
+
+
+class TimelineRecorder(CairoRenderer):
+    """Skips every frame and records the scene as vector shapes plus timed events."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keys = {}
+        # What the player shows after the events so far: key -> fingerprint, in draw order.
+        self.shown = {}
+        self.events = []
+        self.clock = 0.0
+        self.skipped_mobjects = 0
+
+    def key(self, mobject):
+        entry = self.keys.get(id(mobject))
+        if entry is None:
+            # Hold a reference so a collected mobject's id can't be reused for another key.
+            entry = self.keys[id(mobject)] = (f"m{len(self.keys)}", mobject)
+        return entry[0]
+
+    def snapshot(self, mobjects):
+        shapes = {}
+        for leaf in mobjects:
+            shapes[self.key(leaf)] = shape(leaf)
+            self.shown[self.key(leaf)] = fingerprint(leaf)
+        return shapes
+
+    def hide(self, keys):
+        for key in keys:
+            self.shown.pop(key, None)
+        return keys
+
+    def sync(self, scene, at):
+        """Instant set/remove events for whatever changed on screen outside of an animation."""
+        current = []
+        self.skipped_mobjects = 0
+        for mobject in scene.mobjects:
+            current.extend(leaves(mobject))
+            self.skipped_mobjects += sum(
+                1 for member in mobject.get_family() if member.has_points() and not hasattr(member, "get_subpaths")
+            )
+        current_keys = {self.key(leaf) for leaf in current}
+        removed = [key for key in self.shown if key not in current_keys]
+        if removed:
+            self.events.append({"type": "remove", "start": at, "duration": 0, "targets": self.hide(removed)})
+        changed = [leaf for leaf in current if self.shown.get(self.key(leaf)) != fingerprint(leaf)]
+        if changed:
+            self.events.append({"type": "set", "start": at, "duration": 0, "shapes": self.snapshot(changed)})
+
+    def play(self, scene, *args, **kwargs):
+        start = round(self.clock, 4)
+        self.sync(scene, start)
+        super().play(scene, *args, **kwargs)
+        duration = round(scene.duration, 4)
+        for animation in scene.animations or []:
+            self.record(animation, start, duration)
+        self.clock += scene.duration
+        # Catches what animations replace or leave behind, e.g. ReplacementTransform.
+        self.sync(scene, round(self.clock, 4))
+
+    def record(self, animation, start, duration):
+        name = type(animation).__name__
+        if name == "Wait":
+            return
+        if hasattr(animation, "animations") and name != "Flash":
+            for child in animation.animations:
+                self.record(child, start, duration)
+            return
+        event = {
+            "start": start,
+            "duration": duration,
+            "rateFunc": getattr(animation.rate_func, "__name__", "smooth"),
+            "lagRatio": round(float(getattr(animation, "lag_ratio", 0) or 0), 4),
+        }
+        targets = leaves(animation.mobject)
+        if name == "Flash":
+            event.update(type="flash", shapes={self.key(leaf): shape(leaf) for leaf in targets})
+        elif name in INTRO_TYPES:
+            event.update(type=INTRO_TYPES[name], shapes=self.snapshot(targets))
+        elif name in OUTRO_TYPES:
+            event.update(type="fade_out", targets=self.hide([self.key(leaf) for leaf in targets]))
+        else:
+            # Transform and anything else that moves or reshapes what is on screen. The
+            # aligned starting copy has matching point counts, so the player can morph;
+            # without it the player cross-fades from what it currently shows.
+            event.update(type="transform", shapes=self.snapshot(targets))
+            starting = getattr(animation, "starting_mobject", None)
+            sources = leaves(starting) if starting is not None else []
+            if len(sources) == len(targets):
+                event["from"] = {self.key(leaf): shape(source) for leaf, source in zip(targets, sources)}
+        self.events.append(event)
+
+
+def export_timeline(job):
+    """Record a job's scene as a timeline dict without rendering any frames."""
+    name, make_scene = load_scene(job)
+    with tempfile.TemporaryDirectory(prefix="timeline-") as media_dir:
+        options = scene_options({**job, "media_dir": media_dir}, name, write_to_movie=False, disable_caching=True)
+        with tempconfig(options):
+            recorder = TimelineRecorder(skip_animations=True)
+            scene = make_scene(renderer=recorder)
+            scene.render()
+            return {
+                "version": TIMELINE_VERSION,
+                "name": name,
+                "frame": {"width": config.frame_width, "height": config.frame_height},
+                "background": _hex(scene.camera.background_color),
+                "duration": round(recorder.clock, 4),
+                "events": recorder.events,
+                "unsupportedMobjects": recorder.skipped_mobjects,
+            }
+
+
+def state_at(timeline, t):
+    """Shapes on screen once every event that finished by time t has run, in draw order."""
+    shown = {}
+    for event in timeline["events"]:
+        if event["start"] + event["duration"] > t + 1e-6:
+            break
+        if event["type"] in ("remove", "fade_out"):
+            for key in event["targets"]:
+                shown.pop(key, None)
+        elif event["type"] != "flash":
+            shown.update(event["shapes"])
+    return list(shown.values())
+
+
+PATH_TOKEN = re.compile(r"[MCZ]|-?\d+(?:\.\d+)?")
+
+
+def draw_state(shapes, timeline, width, height):
+    """Rasterize shapes with cairo the way the browser player draws them."""
+    import cairo
+
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+    ctx = cairo.Context(surface)
+    scale = width / timeline["frame"]["width"]
+    ctx.scale(scale, scale)
+    ctx.translate(timeline["frame"]["width"] / 2, timeline["frame"]["height"] / 2)
+    ctx.set_source_rgb(*_rgb(timeline["background"]))
+    ctx.paint()
+    for item in shapes:
+        tokens = PATH_TOKEN.findall(item["d"])
+        index = 0
+        ctx.new_path()
+        while index < len(tokens):
+            command = tokens[index]
+            if command == "M":
+                ctx.move_to(float(tokens[index + 1]), float(tokens[index + 2]))
+                index += 3
+            elif command == "C":
+                ctx.curve_to(*[float(token) for token in tokens[index + 1:index + 7]])
+                index += 7
+            else:
+                ctx.close_path()
+                index += 1
+        if item["fillOpacity"] > 0:
+            ctx.set_source_rgba(*_rgb(item["fill"]), item["fillOpacity"])
+            ctx.fill_preserve()
+        if item["strokeOpacity"] > 0 and item["strokeWidth"] > 0:
+            ctx.set_source_rgba(*_rgb(item["stroke"]), item["strokeOpacity"])
+            ctx.set_line_width(item["strokeWidth"])
+            ctx.stroke()
+        ctx.new_path()
+    data = np.ndarray((height, width, 4), dtype=np.uint8, buffer=surface.get_data())
+    # FORMAT_RGB24 is stored as BGRX.
+    return data[..., 2::-1].copy()
+
+
+def _rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def video_frame(movie, t, width, height):
+    raw = subprocess.run(
+        [config.ffmpeg_executable, "-loglevel", "error", "-ss", f"{t:.4f}", "-i", str(movie),
+         "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-"],
+        capture_output=True, check=True,
+    ).stdout
+    return np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def check_job(job, quality, media_dir):
+    """Export and render one job; compare the exported state with the video after every play."""
+    timeline = export_timeline(job)
+    name, make_scene = load_scene(job)
+    with tempconfig(scene_options({**job, "media_dir": media_dir, "quality": quality}, name)):
+        scene = make_scene()
+        scene.render()
+        movie = scene.renderer.file_writer.movie_file_path
+        width, height = config.pixel_width, config.pixel_height
+        frame_time = 1 / config.frame_rate
+
+    ends = sorted({round(event["start"] + event["duration"], 4) for event in timeline["events"]})
+    # Sample one frame before each event ends, where the video shows that final state.
+    samples = []
+    for end in ends:
+        t = max(end - 2 * frame_time, 0)
+        expected = draw_state(state_at(timeline, end), timeline, width, height)
+        samples.append(round(psnr(expected, video_frame(movie, t, width, height)), 2))
+
+    payload = json.dumps(timeline, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    finite = [value for value in samples if math.isfinite(value)]
+    return {
+        "scene": name,
+        "events": len(timeline["events"]),
+        "unsupported_mobjects": timeline["unsupportedMobjects"],
+        "timeline_bytes": len(payload),
+        "timeline_gzip_bytes": len(gzip.compress(payload)),
+        "mp4_bytes": os.path.getsize(movie),
+        "min_psnr": min(finite) if finite else math.inf,
+        "mean_psnr": round(sum(finite) / len(finite), 2) if finite else math.inf,
+    }
+
+
+def source_job(source, scene=None):
+    path = Path(source)
+    if not path.is_absolute():
+        path = (Path.cwd() / path) if path.exists() else SCRIPTS_DIR / path
+    if path.suffix == ".json":
+        return {"spec": json.loads(path.read_text(encoding="utf-8"))}
+    return {"script": str(path), "scene": scene}
+
+
+def main():
+    from asset_cache import AssetCache
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export")
+    export.add_argument("source", help="spec .json or scene .py")
+    export.add_argument("--scene")
+    export.add_argument("-o", "--output", default="-")
+    check = sub.add_parser("check")
+    check.add_argument("--quality", default="low")
+    check.add_argument("--min-psnr", type=float, default=28.0)
+    args = parser.parse_args()
+
+    AssetCache().install()
+    if args.command == "export":
+        timeline = export_timeline(source_job(args.source, args.scene))
+        text = json.dumps(timeline, ensure_ascii=False, separators=(",", ":"))
+        if args.output == "-":
+            print(text)
+        else:
+            Path(args.output).write_text(text, encoding="utf-8")
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="timeline-check-") as media_dir:
+        for entry in CHECK_JOBS:
+            job = source_job(entry.get("spec") or entry["script"], entry.get("scene"))
+            results.append(check_job({**job, "disable_caching": True}, args.quality, media_dir))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if any(result["min_psnr"] < args.min_psnr for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
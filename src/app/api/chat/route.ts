@@ -1,8 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { getCurrentUser } from '@/lib/auth';
 import { query } from '@/lib/db';
-import { generateMathVideo } from '@/lib/video-generator';
+import { generateMathVideo, generateVideoPoster, generateVideoTimeline, VideoGenerationResult } from '@/lib/video-generator';
 import { getAIProvider } from '@/lib/ai-providers';
+import type { RenderJobIds } from '@/lib/queue';
 
 export async function POST(request: NextRequest) {
   try {
@@ -102,15 +103,38 @@ export async function POST(request: NextRequest) {
     console.log('Gemini API response received, length:', response.length);
     
     let videoUrl = null;
+    let video: VideoGenerationResult | null = null;
+    let videoJob: RenderJobIds | null = null;
+    let posterUrl: string | null = null;
+    let timelineUrl: string | null = null;
     if (responseType === '動画解説' && (subject === '数学' || subject === '英語')) {
       try {
         const problemText = message || (subject === '英語' ? 'English problem' : '数学の問題');
-        videoUrl = await generateMathVideo({
+        const videoRequest = {
           problem: problemText,
           solution: response,
           subject,
           responseType
-        });
+        };
+        if (process.env.VIDEO_FORMAT === 'timeline') {
+          // Vector playback in the browser; no frames are rendered or encoded.
+          timelineUrl = await generateVideoTimeline(videoRequest, { plan: user.plan });
+        } else if (process.env.RENDER_QUEUE === '1') {
+          // Rendering happens in scripts/render_queue_worker.py; the client polls the job ids.
+          // No poster here: it would start a Manim worker in this process, which queue mode avoids.
+          const { addRenderJobs } = await import('@/lib/queue');
+          videoJob = await addRenderJobs(videoRequest);
+          videoUrl = videoJob.url;
+        } else {
+          // The poster is a single still, so it is ready long before the video.
+          const poster = generateVideoPoster(videoRequest, undefined, { plan: user.plan }).catch((error) => {
+            console.error('Video poster failed:', error);
+            return null;
+          });
+          video = await generateMathVideo(videoRequest, { plan: user.plan });
+          videoUrl = video.url;
+          posterUrl = await poster;
+        }
       } catch (error) {
         console.error('Video generation failed:', error);
       }
@@ -136,7 +160,11 @@ export async function POST(request: NextRequest) {
     return NextResponse.json({
       success: true,
       response: formattedResponse,
-      videoUrl
+      videoUrl,
+      posterUrl,
+      timelineUrl,
+      video,
+      videoJob
     });
   } catch (error) {
     console.error('Solution Navi error details:', {
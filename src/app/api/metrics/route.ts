@@ -0,0 +1,23 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getRenderMetrics } from '@/lib/render-metrics';
+import { getVideoCache } from '@/lib/video-cache';
+
+// Read on every scrape, never prerendered.
+export const dynamic = 'force-dynamic';
+
+export async function GET(request: NextRequest) {
+  // Off unless a token is configured: the metrics describe load and usage.
+  const token = process.env.METRICS_TOKEN;
+  if (!token) {
+    return NextResponse.json({ error: 'Metrics are disabled' }, { status: 404 });
+  }
+  if (request.headers.get('authorization') !== `Bearer ${token}`) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
+  }
+
+  // Registers the video cache gauges even before the first video request.
+  getVideoCache();
+  return new NextResponse(getRenderMetrics().render(), {
+    headers: { 'Content-Type': 'text/plain; version=0.0.4; charset=utf-8' },
+  });
+}
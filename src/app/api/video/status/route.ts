@@ -0,0 +1,32 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getVideoStatus } from '@/lib/video-generator';
+
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const jobId = searchParams.get('jobId');
+    const key = searchParams.get('key');
+    
+    if (jobId) {
+      if (!/^[0-9a-f]{64}-(preview|full)$/.test(jobId)) {
+        return NextResponse.json({ error: 'Valid job ID is required' }, { status: 400 });
+      }
+      const { getJobStatus, renderQueue } = await import('@/lib/queue');
+      return NextResponse.json(await getJobStatus(jobId, renderQueue));
+    }
+    
+    if (!key || !/^[0-9a-f]{64}$/.test(key)) {
+      return NextResponse.json({ error: 'Valid video key is required' }, { status: 400 });
+    }
+
+    const status = await getVideoStatus(key);
+    if (!status) {
+      return NextResponse.json({ error: 'Video not found' }, { status: 404 });
+    }
+
+    return NextResponse.json(status);
+  } catch (error) {
+    console.error('Video status error:', error);
+    return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
+  }
+}
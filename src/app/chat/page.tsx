@@ -3,6 +3,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import Layout from '@/components/Layout';
 import UpgradeModal from '@/components/UpgradeModal';
+import TimelinePlayer from '@/components/TimelinePlayer';
 
 interface Message {
   id: string;
@@ -10,6 +11,10 @@ interface Message {
   content: string;
   image?: string;
   videoUrl?: string;
+  videoKey?: string;
+  videoTier?: 'preview' | 'full';
+  posterUrl?: string;
+  timelineUrl?: string;
   timestamp: Date;
 }
 
@@ -123,9 +128,19 @@ export default function ChatPage() {
           type: 'assistant',
           content: data.response,
           videoUrl: data.videoUrl,
+          videoKey: data.video?.key,
+          videoTier: data.video?.tier,
+          posterUrl: data.posterUrl || undefined,
+          timelineUrl: data.timelineUrl || undefined,
           timestamp: new Date()
         };
         setMessages(prev => [...prev, assistantMessage]);
+        if (data.video?.tier === 'preview') {
+          pollVideoUpgrade(assistantMessage.id, data.video.key);
+        } else if (data.videoJob?.jobId) {
+          const { jobId, upgradeJobId } = data.videoJob;
+          pollRenderJob(assistantMessage.id, jobId, () => pollRenderJob(assistantMessage.id, upgradeJobId));
+        }
         setUsageCount(prev => prev + 1);
       } else {
         const error = await response.json();
@@ -144,6 +159,57 @@ export default function ChatPage() {
     }
   };
 
+  const pollVideoUpgrade = (messageId: string, videoKey: string) => {
+    const timer = setInterval(async () => {
+      try {
+        const response = await fetch(`/api/video/status?key=${videoKey}`);
+        if (!response.ok) {
+          clearInterval(timer);
+          return;
+        }
+        const status = await response.json();
+        if (status.tier === 'full') {
+          clearInterval(timer);
+          setMessages(prev => prev.map(message =>
+            message.id === messageId ? { ...message, videoUrl: status.url, videoTier: 'full' } : message
+          ));
+        } else if (status.upgradeFailed) {
+          clearInterval(timer);
+        }
+      } catch (error) {
+        console.error('Video status error:', error);
+        clearInterval(timer);
+      }
+    }, 5000);
+  };
+
+  const pollRenderJob = (messageId: string, jobId: string, onCompleted?: () => void) => {
+    const timer = setInterval(async () => {
+      try {
+        const response = await fetch(`/api/video/status?jobId=${jobId}`);
+        if (!response.ok) {
+          clearInterval(timer);
+          return;
+        }
+        const job = await response.json();
+        if (job.status === 'completed') {
+          clearInterval(timer);
+          setMessages(prev => prev.map(message =>
+            message.id === messageId
+              ? { ...message, videoUrl: job.result.url, videoKey: job.result.key, videoTier: job.result.tier }
+              : message
+          ));
+          onCompleted?.();
+        } else if (job.status === 'failed' || job.status === 'not_found') {
+          clearInterval(timer);
+        }
+      } catch (error) {
+        console.error('Video job status error:', error);
+        clearInterval(timer);
+      }
+    }, 2000);
+  };
+
   const handleKeyPress = (e: React.KeyboardEvent) => {
     if (e.key === 'Enter' && !e.shiftKey) {
       e.preventDefault();
@@ -238,9 +304,30 @@ export default function ChatPage() {
                     />
                   )}
                   <div className="whitespace-pre-wrap">{message.content}</div>
+                  {!message.videoUrl && message.posterUrl && (
+                    <div className="mt-3">
+                      <img
+                        src={message.posterUrl}
+                        alt="動画を準備しています"
+                        className="w-full rounded-lg"
+                        style={{ maxWidth: '400px' }}
+                      />
+                    </div>
+                  )}
+                  {message.timelineUrl && (
+                    <div className="mt-3">
+                      <TimelinePlayer
+                        src={message.timelineUrl}
+                        className="w-full rounded-lg"
+                        style={{ maxWidth: '400px' }}
+                      />
+                    </div>
+                  )}
                   {message.videoUrl && (
                     <div className="mt-3">
                       <video 
+                        key={message.videoUrl}
+                        poster={message.posterUrl}
                         controls 
                         className="w-full rounded-lg"
                         style={{ maxWidth: '400px' }}
@@ -0,0 +1,311 @@
+'use client';
+
+import React, { useEffect, useRef, useState } from 'react';
+
+// Format written by scripts/timeline_export.py.
+interface TimelineShape {
+  d: string;
+  fill: string;
+  fillOpacity: number;
+  stroke: string;
+  strokeOpacity: number;
+  strokeWidth: number;
+}
+
+interface TimelineEvent {
+  type: 'set' | 'remove' | 'write' | 'create' | 'fade_in' | 'fade_out' | 'transform' | 'flash';
+  start: number;
+  duration: number;
+  rateFunc?: string;
+  lagRatio?: number;
+  shapes?: Record<string, TimelineShape>;
+  from?: Record<string, TimelineShape>;
+  targets?: string[];
+}
+
+export interface Timeline {
+  version: number;
+  name: string;
+  frame: { width: number; height: number };
+  background: string;
+  duration: number;
+  events: TimelineEvent[];
+}
+
+interface Drawn {
+  shape: TimelineShape;
+  mode: 'static' | 'write' | 'create' | 'fade' | 'flash' | 'crossfade';
+  progress: number;
+  previous?: TimelineShape;
+}
+
+interface TimelinePlayerProps {
+  src: string;
+  autoPlay?: boolean;
+  className?: string;
+  style?: React.CSSProperties;
+}
+
+function sigmoid(x: number): number {
+  return 1 / (1 + Math.exp(-x));
+}
+
+function clamp(value: number): number {
+  return Math.min(Math.max(value, 0), 1);
+}
+
+// Ports of the manim rate functions the bundled scenes use.
+function smooth(t: number): number {
+  const error = sigmoid(-5);
+  return clamp((sigmoid(10 * (t - 0.5)) - error) / (1 - 2 * error));
+}
+
+const RATE_FUNCS: Record<string, (t: number) => number> = {
+  linear: (t) => t,
+  smooth,
+  rush_into: (t) => 2 * smooth(t / 2),
+  rush_from: (t) => 2 * smooth(t / 2 + 0.5) - 1,
+  there_and_back: (t) => (t < 0.5 ? smooth(2 * t) : smooth(2 * (1 - t))),
+  double_smooth: (t) => (t < 0.5 ? 0.5 * smooth(2 * t) : 0.5 * (1 + smooth(2 * t - 1))),
+  ease_in_out_sine: (t) => -(Math.cos(Math.PI * t) - 1) / 2
+};
+
+function subAlpha(event: TimelineEvent, alpha: number, index: number, count: number): number {
+  const rate = RATE_FUNCS[event.rateFunc || 'smooth'] || smooth;
+  const lag = event.lagRatio || 0;
+  const full = (count - 1) * lag + 1;
+  return rate(clamp(alpha * full - index * lag));
+}
+
+const PATH_TOKEN = /[MCZ]|-?\d+(?:\.\d+)?/g;
+
+function lerpPath(from: string, to: string, alpha: number): string | null {
+  const a = from.match(PATH_TOKEN) || [];
+  const b = to.match(PATH_TOKEN) || [];
+  if (a.length !== b.length) return null;
+  const out: string[] = [];
+  for (let i = 0; i < a.length; i++) {
+    const isCommand = a[i] === 'M' || a[i] === 'C' || a[i] === 'Z';
+    if (isCommand !== (b[i] === 'M' || b[i] === 'C' || b[i] === 'Z') || (isCommand && a[i] !== b[i])) return null;
+    out.push(isCommand ? a[i] : (parseFloat(a[i]) + (parseFloat(b[i]) - parseFloat(a[i])) * alpha).toFixed(4));
+  }
+  return out.join(' ');
+}
+
+function lerpColor(from: string, to: string, alpha: number): string {
+  const a = parseInt(from.slice(1), 16);
+  const b = parseInt(to.slice(1), 16);
+  const channel = (shift: number) =>
+    Math.round(((a >> shift) & 255) + (((b >> shift) & 255) - ((a >> shift) & 255)) * alpha);
+  return `rgb(${channel(16)}, ${channel(8)}, ${channel(0)})`;
+}
+
+function lerpShape(from: TimelineShape, to: TimelineShape, alpha: number): TimelineShape | null {
+  const d = lerpPath(from.d, to.d, alpha);
+  if (d === null) return null;
+  return {
+    d,
+    fill: lerpColor(from.fill, to.fill, alpha),
+    fillOpacity: from.fillOpacity + (to.fillOpacity - from.fillOpacity) * alpha,
+    stroke: lerpColor(from.stroke, to.stroke, alpha),
+    strokeOpacity: from.strokeOpacity + (to.strokeOpacity - from.strokeOpacity) * alpha,
+    strokeWidth: from.strokeWidth + (to.strokeWidth - from.strokeWidth) * alpha
+  };
+}
+
+/** What is on screen at time t, in draw order. */
+function stateAt(timeline: Timeline, t: number): Map<string, Drawn> {
+  const drawn = new Map<string, Drawn>();
+  for (const event of timeline.events) {
+    if (event.start > t) break;
+    const alpha = event.duration > 0 ? clamp((t - event.start) / event.duration) : 1;
+    const keys = event.type === 'remove' || event.type === 'fade_out' ? event.targets || [] : Object.keys(event.shapes || {});
+
+    keys.forEach((key, index) => {
+      const progress = subAlpha(event, alpha, index, keys.length);
+      const shape = event.shapes?.[key];
+      switch (event.type) {
+        case 'set':
+          drawn.delete(key);
+          drawn.set(key, { shape: shape!, mode: 'static', progress: 1 });
+          break;
+        case 'remove':
+          drawn.delete(key);
+          break;
+        case 'write':
+        case 'create':
+        case 'fade_in':
+          drawn.delete(key);
+          drawn.set(key, { shape: shape!, mode: event.type === 'fade_in' ? 'fade' : event.type, progress });
+          break;
+        case 'fade_out': {
+          const current = drawn.get(key);
+          if (alpha >= 1) drawn.delete(key);
+          else if (current) drawn.set(key, { shape: current.shape, mode: 'fade', progress: 1 - progress });
+          break;
+        }
+        case 'transform': {
+          const from = event.from?.[key];
+          const morphed = from && (progress >= 1 ? shape! : lerpShape(from, shape!, progress));
+          if (morphed) {
+            drawn.set(key, { shape: morphed, mode: 'static', progress: 1 });
+          } else {
+            // No matching start shape: cross-fade from whatever is shown now.
+            const previous = drawn.get(key)?.shape;
+            drawn.set(key, { shape: shape!, mode: 'crossfade', progress, previous });
+          }
+          break;
+        }
+        case 'flash':
+          if (alpha < 1) drawn.set(key, { shape: shape!, mode: 'flash', progress });
+          else drawn.delete(key);
+          break;
+      }
+    });
+  }
+  return drawn;
+}
+
+function ShapePath({ shape, opacity = 1, reveal, fillScale = 1 }: {
+  shape: TimelineShape;
+  opacity?: number;
+  reveal?: number;
+  fillScale?: number;
+}) {
+  const outline = reveal !== undefined && shape.strokeWidth === 0;
+  return (
+    <path
+      d={shape.d}
+      fill={shape.fill}
+      fillOpacity={shape.fillOpacity * fillScale}
+      stroke={outline ? shape.fill : shape.stroke}
+      strokeOpacity={outline ? shape.fillOpacity : shape.strokeOpacity}
+      strokeWidth={outline ? 0.02 : shape.strokeWidth}
+      opacity={opacity}
+      pathLength={reveal !== undefined ? 1 : undefined}
+      strokeDasharray={reveal !== undefined ? 1 : undefined}
+      strokeDashoffset={reveal !== undefined ? 1 - reveal : undefined}
+    />
+  );
+}
+
+function renderDrawn(key: string, item: Drawn) {
+  const { shape, mode, progress } = item;
+  switch (mode) {
+    case 'write':
+      // Like DrawBorderThenFill: outline in the first half, fill in the second.
+      return <ShapePath key={key} shape={shape} reveal={Math.min(1, 2 * progress)} fillScale={clamp(2 * progress - 1)} />;
+    case 'create':
+      return <ShapePath key={key} shape={shape} reveal={progress} fillScale={progress} />;
+    case 'fade':
+      return <ShapePath key={key} shape={shape} opacity={progress} />;
+    case 'flash':
+      return <ShapePath key={key} shape={shape} reveal={progress} opacity={1 - progress} />;
+    case 'crossfade':
+      return (
+        <g key={key}>
+          {item.previous && <ShapePath shape={item.previous} opacity={1 - progress} />}
+          <ShapePath shape={shape} opacity={progress} />
+        </g>
+      );
+    default:
+      return <ShapePath key={key} shape={shape} />;
+  }
+}
+
+export default function TimelinePlayer({ src, autoPlay = true, className, style }: TimelinePlayerProps) {
+  const [timeline, setTimeline] = useState<Timeline | null>(null);
+  const [time, setTime] = useState(0);
+  const [playing, setPlaying] = useState(autoPlay);
+  const [error, setError] = useState(false);
+  const frameRef = useRef<number | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    setTimeline(null);
+    setTime(0);
+    fetch(src)
+      .then((response) => {
+        if (!response.ok) throw new Error(`Timeline request failed: ${response.status}`);
+        return response.json();
+      })
+      .then((data: Timeline) => {
+        if (!cancelled) setTimeline(data);
+      })
+      .catch((fetchError) => {
+        console.error('Timeline load error:', fetchError);
+        if (!cancelled) setError(true);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [src]);
+
+  useEffect(() => {
+    if (!timeline || !playing) return;
+    let last = performance.now();
+    const tick = (now: number) => {
+      const dt = (now - last) / 1000;
+      last = now;
+      setTime((current) => {
+        const next = current + dt;
+        if (next >= timeline.duration) {
+          setPlaying(false);
+          return timeline.duration;
+        }
+        return next;
+      });
+      frameRef.current = requestAnimationFrame(tick);
+    };
+    frameRef.current = requestAnimationFrame(tick);
+    return () => {
+      if (frameRef.current !== null) cancelAnimationFrame(frameRef.current);
+    };
+  }, [timeline, playing]);
+
+  if (error) {
+    return <div className="text-sm text-red-600">アニメーションを読み込めませんでした。</div>;
+  }
+  if (!timeline) {
+    return <div className="text-sm text-gray-500">読み込み中...</div>;
+  }
+
+  const { width, height } = timeline.frame;
+  const drawn = stateAt(timeline, time);
+
+  const togglePlay = () => {
+    if (!playing && time >= timeline.duration) setTime(0);
+    setPlaying(!playing);
+  };
+
+  return (
+    <div className={className} style={style}>
+      <svg
+        viewBox={`${-width / 2} ${-height / 2} ${width} ${height}`}
+        className="w-full h-auto rounded-lg"
+        style={{ background: timeline.background }}
+        strokeLinecap="round"
+        strokeLinejoin="round"
+      >
+        {Array.from(drawn.entries()).map(([key, item]) => renderDrawn(key, item))}
+      </svg>
+      <div className="flex items-center gap-2 mt-1">
+        <button
+          onClick={togglePlay}
+          className="px-2 py-1 text-xs rounded bg-gray-200 hover:bg-gray-300"
+        >
+          {playing ? '一時停止' : '再生'}
+        </button>
+        <input
+          type="range"
+          min={0}
+          max={timeline.duration}
+          step={0.01}
+          value={time}
+          onChange={(event) => setTime(parseFloat(event.target.value))}
+          className="flex-1"
+        />
+      </div>
+    </div>
+  );
+}
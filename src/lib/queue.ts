@@ -2,14 +2,74 @@ import { Queue, Worker, Job } from 'bullmq';
 import Redis from 'ioredis';
 import { getAIProvider } from './ai-providers';
 import { GoogleWorkspaceIntegration } from './google-workspace';
+import { getVideoCache } from './video-cache';
+import {
+  buildSolutionSpec,
+  renderVideoBatch,
+  renditionsManifestPath,
+  renditionTargets,
+  requestKey,
+  StepSolutionSpec,
+  TIER_QUALITY,
+  VideoBatchManifest,
+  videoBatchEntries,
+  VideoGenerationRequest,
+  videoBatchManifestUrl,
+  VideoTier,
+  writeVideoBatchManifest
+} from './video-generator';
 
 const redis = new Redis(process.env.REDIS_URL || 'redis://localhost:6379', {
   maxRetriesPerRequest: null,
   enableReadyCheck: false,
 });
 
+export interface QueueSettings {
+  concurrency: number;
+  attempts: number;
+  backoffMs: number;
+  timeoutMs: number;
+}
+
+// renderQueue is consumed by scripts/render_queue_worker.py, which reads the
+// same RENDER_QUEUE_* variables for its concurrency.
+export const queueSettings: Record<'generateQueue' | 'renderQueue', QueueSettings> = {
+  generateQueue: {
+    concurrency: parseInt(process.env.GENERATE_QUEUE_CONCURRENCY || '2', 10),
+    attempts: parseInt(process.env.GENERATE_QUEUE_ATTEMPTS || '1', 10),
+    backoffMs: parseInt(process.env.GENERATE_QUEUE_BACKOFF_MS || '5000', 10),
+    // 0: no timeout, as before the setting existed.
+    timeoutMs: parseInt(process.env.GENERATE_QUEUE_TIMEOUT_MS || '0', 10),
+  },
+  renderQueue: {
+    concurrency: parseInt(process.env.RENDER_QUEUE_CONCURRENCY || '2', 10),
+    attempts: parseInt(process.env.RENDER_QUEUE_ATTEMPTS || '2', 10),
+    backoffMs: parseInt(process.env.RENDER_QUEUE_BACKOFF_MS || '2000', 10),
+    timeoutMs: parseInt(process.env.RENDER_QUEUE_TIMEOUT_MS || '60000', 10),
+  },
+};
+
+function defaultJobOptions(settings: QueueSettings) {
+  return {
+    attempts: settings.attempts,
+    backoff: { type: 'exponential', delay: settings.backoffMs },
+  };
+}
+
 export const generateQueue = new Queue('generateQueue', {
   connection: redis,
+  defaultJobOptions: defaultJobOptions(queueSettings.generateQueue),
+});
+
+export const renderQueue = new Queue('renderQueue', {
+  connection: redis,
+  defaultJobOptions: {
+    ...defaultJobOptions(queueSettings.renderQueue),
+    // Job ids are derived from the video key, so finished records must expire
+    // for an evicted video to be rendered again.
+    removeOnComplete: { age: 3600 },
+    removeOnFail: { age: 3600 },
+  },
 });
 
 export interface GenerateJobData {
@@ -35,12 +95,60 @@ export interface GenerateJobResult {
   }>;
   spreadsheetUrl?: string;
   documentUrl?: string;
+  // Written once every explanation video is rendered (GENERATE_PRERENDER_VIDEOS=1).
+  videoManifestUrl?: string;
+}
+
+export interface RenderJobData {
+  key: string;
+  tier: VideoTier;
+  spec: StepSolutionSpec;
+  quality: string;
+  parallel: number;
+  outputPath: string;
+  url: string;
+  // Extra encodes, written only when the consumer runs with VIDEO_SINGLE_ENCODER=1.
+  renditions: Array<{ name: string; path: string }>;
+  renditionsPath: string;
+  timeoutMs: number;
+}
+
+export interface RenderJobResult {
+  key: string;
+  tier: VideoTier;
+  url: string;
+  renditionsUrl: string | null;
+  renderSeconds: number;
+}
+
+/**
+ * Fail a job once it has run for `timeoutMs`. This is a soft timeout: a step already
+ * in flight, such as the AI call, keeps running and its result is dropped. The
+ * processor gets a signal that aborts at the timeout, so it can skip the steps that
+ * have not started yet instead of saving documents for a failed job.
+ */
+function withSoftTimeout<D, R>(processor: (job: Job<D>, signal: AbortSignal) => Promise<R>, timeoutMs: number) {
+  return (job: Job<D>): Promise<R> => {
+    const controller = new AbortController();
+    if (timeoutMs <= 0) {
+      return processor(job, controller.signal);
+    }
+    let timer: NodeJS.Timeout;
+    const timeout = new Promise<never>((_, reject) => {
+      timer = setTimeout(() => {
+        controller.abort();
+        reject(new Error(`Job ${job.id} timed out after ${timeoutMs}ms`));
+      }, timeoutMs);
+    });
+    return Promise.race([processor(job, controller.signal), timeout]).finally(() => clearTimeout(timer));
+  };
 }
 
 export const createGenerateWorker = () => {
+  const settings = queueSettings.generateQueue;
   return new Worker<GenerateJobData, GenerateJobResult>(
     'generateQueue',
-    async (job: Job<GenerateJobData>) => {
+    withSoftTimeout(async (job: Job<GenerateJobData>, signal: AbortSignal) => {
       const { userId, payload } = job.data;
       
       await job.updateProgress(25);
@@ -58,6 +166,7 @@ export const createGenerateWorker = () => {
       
       await job.updateProgress(75);
       
+      signal.throwIfAborted();
       const parsedContent = parseGeneratedContent(response);
       const formattedContent = formatMathResponse(parsedContent);
       
@@ -85,14 +194,30 @@ export const createGenerateWorker = () => {
         console.error('Google Workspace integration error:', error);
       }
       
+      signal.throwIfAborted();
+      if (process.env.GENERATE_PRERENDER_VIDEOS === '1' && result.problems.length > 0) {
+        const requests = problemVideoRequests(result);
+        result.videoManifestUrl = videoBatchManifestUrl(requests);
+        if (process.env.RENDER_QUEUE === '1') {
+          // Rendered and retried by scripts/render_queue_worker.py, one job per video.
+          await addVideoBatchJobs(requests);
+        } else {
+          // Far longer than this job may run, so the batch finishes on its own and the
+          // manifest shows up at a URL known now.
+          renderVideoBatch(requests).catch((error) => {
+            console.error(`Explanation video batch failed for ${result.title}:`, error);
+          });
+        }
+      }
+      
       await job.updateProgress(100);
       
       console.log(`Generation job completed for user ${userId}: ${result.title}`);
       return result;
-    },
+    }, settings.timeoutMs),
     {
       connection: redis,
-      concurrency: 2,
+      concurrency: settings.concurrency,
     }
   );
 };
@@ -102,8 +227,106 @@ export async function addGenerateJob(userId: string, payload: GenerateJobData['p
   return job.id;
 }
 
-export async function getJobStatus(jobId: string) {
-  const job = await generateQueue.getJob(jobId);
+export interface RenderJobIds {
+  key: string;
+  jobId: string | null;
+  upgradeJobId: string | null;
+  url: string | null;
+}
+
+// Preview jobs jump ahead of full-quality upgrades (lower number = higher priority).
+const TIER_PRIORITY: Record<VideoTier, number> = {
+  preview: 1,
+  full: 10
+};
+// Pre-rendered problem sets: nobody is waiting on them.
+const BATCH_PRIORITY = 20;
+// A 1080p60 render takes far longer than a preview; full-tier jobs get the same
+// limit as upgrades on the in-process render pool.
+const TIER_TIMEOUT_MS: Record<VideoTier, number> = {
+  preview: queueSettings.renderQueue.timeoutMs,
+  full: parseInt(process.env.RENDER_UPGRADE_DEADLINE_MS || '600000', 10)
+};
+
+async function addRenderJob(
+  request: VideoGenerationRequest,
+  key: string,
+  tier: VideoTier,
+  priority = TIER_PRIORITY[tier]
+): Promise<string> {
+  const cache = getVideoCache();
+  const cacheKey = `${key}-${tier}`;
+  const jobId = cacheKey;
+
+  // A deterministic job id makes concurrent requests for the same video share one job.
+  const existing = await renderQueue.getJob(jobId);
+  if (existing) {
+    const state = await existing.getState();
+    if (state !== 'failed' && (state !== 'completed' || await cache.lookup(cacheKey))) {
+      return jobId;
+    }
+    await existing.remove();
+  }
+
+  const videoId = `math_${key.slice(0, 16)}_${tier}`;
+  const data: RenderJobData = {
+    key,
+    tier,
+    spec: buildSolutionSpec(request.problem, request.solution, request.subject, request.responseType, videoId),
+    quality: TIER_QUALITY[tier],
+    parallel: tier === 'full' ? parseInt(process.env.RENDER_PARALLEL_SEGMENTS || '0', 10) : 0,
+    outputPath: cache.pathFor(cacheKey),
+    url: cache.urlFor(cacheKey),
+    renditions: renditionTargets(key, tier),
+    renditionsPath: renditionsManifestPath(key, tier),
+    timeoutMs: TIER_TIMEOUT_MS[tier],
+  };
+  await renderQueue.add('render', data, { jobId, priority });
+  return jobId;
+}
+
+/**
+ * Queue a render job for every uncached video of a problem set, behind interactive
+ * renders. Each job is retried on its own and publishes its video into the cache as
+ * soon as it is done. The manifest at videoBatchManifestUrl() lists the job ids.
+ */
+export async function addVideoBatchJobs(
+  requests: VideoGenerationRequest[],
+  tier: VideoTier = 'full'
+): Promise<VideoBatchManifest> {
+  const startedAt = Date.now();
+  const videos = await videoBatchEntries(requests, tier);
+  await getVideoCache().prune();
+  for (const video of videos) {
+    if (!video.cached) {
+      video.jobId = await addRenderJob(requests[video.index], video.key, tier, BATCH_PRIORITY);
+    }
+  }
+  return writeVideoBatchManifest(requests, tier, videos, startedAt);
+}
+
+/**
+ * Queue the preview and full-quality renders for a video instead of rendering inline.
+ * Poll getJobStatus(jobId, renderQueue) for the preview, then upgradeJobId for 1080p60.
+ */
+export async function addRenderJobs(request: VideoGenerationRequest): Promise<RenderJobIds> {
+  const key = requestKey(request);
+
+  const cache = getVideoCache();
+  const fullUrl = await cache.serve(`${key}-full`, 'mp4', true);
+  if (fullUrl) {
+    return { key, jobId: null, upgradeJobId: null, url: fullUrl };
+  }
+
+  // Workers write straight into the cache directory, so keep it within budget here.
+  await cache.prune();
+  const jobId = await addRenderJob(request, key, 'preview');
+  const upgradeJobId = await addRenderJob(request, key, 'full');
+  return { key, jobId, upgradeJobId, url: null };
+}
+
+export async function getJobStatus(jobId: string, queue: Queue = generateQueue) {
+  const job = await queue.getJob(jobId);
   if (!job) {
     return { status: 'not_found' };
   }
@@ -136,6 +359,14 @@ export async function getJobStatus(jobId: string) {
   }
 }
 
+function problemVideoRequests(result: GenerateJobResult): VideoGenerationRequest[] {
+  return result.problems.map(problem => ({
+    problem: problem.question,
+    solution: `${problem.explanation}\n${problem.answer}`,
+    subject: result.subject,
+    responseType: '動画解説'
+  }));
+}
 
 function parseGeneratedContent(content: string): { problems: Array<{ question: string; answer: string; explanation: string; }> } {
   const problems: Array<{ question: string; answer: string; explanation: string; }> = [];
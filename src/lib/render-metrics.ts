@@ -0,0 +1,191 @@
+type Labels = Record<string, string>;
+
+const DURATION_BUCKETS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600];
+const WAIT_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300];
+
+function labelKey(labels: Labels): string {
+  return Object.keys(labels).sort().map(name => `${name}="${escapeLabel(labels[name])}"`).join(',');
+}
+
+function escapeLabel(value: string): string {
+  return value.replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+}
+
+function formatValue(value: number): string {
+  if (value === Infinity) return '+Inf';
+  if (value === -Infinity) return '-Inf';
+  return Number.isNaN(value) ? 'NaN' : String(value);
+}
+
+function sample(name: string, key: string, value: number): string {
+  return `${name}${key ? `{${key}}` : ''} ${formatValue(value)}`;
+}
+
+export class Counter {
+  private values = new Map<string, number>();
+
+  constructor(readonly name: string, readonly help: string) {}
+
+  inc(labels: Labels = {}, value = 1) {
+    const key = labelKey(labels);
+    this.values.set(key, (this.values.get(key) ?? 0) + value);
+  }
+
+  get(labels: Labels = {}): number {
+    return this.values.get(labelKey(labels)) ?? 0;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const [key, value] of this.values) lines.push(sample(this.name, key, value));
+    return lines;
+  }
+}
+
+export class Histogram {
+  private series = new Map<string, { counts: number[]; sum: number; count: number }>();
+
+  constructor(readonly name: string, readonly help: string, private buckets: number[]) {}
+
+  observe(labels: Labels, value: number) {
+    const key = labelKey(labels);
+    let entry = this.series.get(key);
+    if (!entry) {
+      entry = { counts: this.buckets.map(() => 0), sum: 0, count: 0 };
+      this.series.set(key, entry);
+    }
+    this.buckets.forEach((bound, index) => {
+      if (value <= bound) entry!.counts[index]++;
+    });
+    entry.sum += value;
+    entry.count++;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const [key, entry] of this.series) {
+      const prefix = key ? `${key},` : '';
+      this.buckets.forEach((bound, index) => {
+        lines.push(sample(`${this.name}_bucket`, `${prefix}le="${bound}"`, entry.counts[index]));
+      });
+      lines.push(sample(`${this.name}_bucket`, `${prefix}le="+Inf"`, entry.count));
+      lines.push(sample(`${this.name}_sum`, key, entry.sum));
+      lines.push(sample(`${this.name}_count`, key, entry.count));
+    }
+    return lines;
+  }
+}
+
+/** Values read at scrape time from state that already exists, e.g. the video cache's stats. */
+export class Collected {
+  constructor(
+    readonly name: string,
+    readonly help: string,
+    private type: 'gauge' | 'counter',
+    private collect: () => Array<[Labels, number]>
+  ) {}
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`];
+    for (const [labels, value] of this.collect()) lines.push(sample(this.name, labelKey(labels), value));
+    return lines;
+  }
+}
+
+function ratio(hits: number, misses: number): number {
+  return hits + misses > 0 ? hits / (hits + misses) : 0;
+}
+
+/**
+ * Render subsystem metrics in the Prometheus text exposition format, served by
+ * /api/metrics. Everything is per Node process; renders from the BullMQ consumer
+ * (scripts/render_queue_worker.py) are not counted here.
+ */
+export class RenderMetrics {
+  readonly renderDuration = new Histogram(
+    'render_duration_seconds', 'Time from a render starting on a worker to its result, by op and quality.', DURATION_BUCKETS
+  );
+  readonly prepDuration = new Histogram(
+    'render_prep_seconds', 'Time a render spent generating Text/MathTex assets before its first frame, by quality.',
+    DURATION_BUCKETS
+  );
+  readonly queueWait = new Histogram(
+    'render_queue_wait_seconds', 'Time a render waited in the scheduler before starting, by priority.', WAIT_BUCKETS
+  );
+  readonly renders = new Counter('render_jobs_total', 'Renders finished, by op, quality and outcome.');
+  readonly failures = new Counter('render_failures_total', 'Renders that failed or were turned away, by op and cause.');
+  readonly timeouts = new Counter('render_timeouts_total', 'Renders killed for running past their timeout, by op.');
+  readonly frames = new Counter('render_frames_total', 'Frames rendered (held frames included), by quality.');
+  readonly bytesWritten = new Counter('render_bytes_written_total', 'Bytes of video written by renders, by quality.');
+  readonly assetCacheLookups = new Counter(
+    'render_asset_cache_lookups_total', 'TeX and Text SVG cache lookups in the render workers, by cache and result.'
+  );
+  private collected: Collected[] = [];
+
+  constructor() {
+    this.collected.push(new Collected(
+      'render_asset_cache_hit_ratio', 'Share of TeX and Text SVG cache lookups that were hits since start.', 'gauge',
+      () => ['tex', 'text'].map(cache => [{ cache }, ratio(
+        this.assetCacheLookups.get({ cache, result: 'hit' }),
+        this.assetCacheLookups.get({ cache, result: 'miss' })
+      )])
+    ));
+  }
+
+  /** Register state owned by another module (video cache, scheduler) to be read on every scrape. */
+  collect(name: string, help: string, type: 'gauge' | 'counter', collect: () => Array<[Labels, number]>) {
+    this.collected = this.collected.filter(metric => metric.name !== name);
+    this.collected.push(new Collected(name, help, type, collect));
+  }
+
+  /** Record the counts a render_worker.py result carries. */
+  recordResult(op: string, quality: string, seconds: number, result: Record<string, unknown>) {
+    this.renderDuration.observe({ op, quality }, seconds);
+    this.renders.inc({ op, quality, outcome: 'ok' });
+    // A batch carries one render result per item, and its own failed items.
+    const batchItems = Array.isArray(result.items)
+      ? result.items as Array<{ ok: boolean; result?: Record<string, unknown>; reason?: string }>
+      : null;
+    for (const item of batchItems || []) {
+      if (!item.ok) this.failures.inc({ op: 'render', reason: item.reason || 'render_error' });
+    }
+    const items = batchItems ? batchItems.map(item => item.result || {}) : [result];
+    for (const item of items) {
+      if (typeof item.prep_seconds === 'number') this.prepDuration.observe({ quality }, item.prep_seconds);
+      if (typeof item.frames === 'number') this.frames.inc({ quality }, item.frames);
+      if (typeof item.bytes_written === 'number') this.bytesWritten.inc({ quality }, item.bytes_written);
+      const lookups = item.cache_lookups as Record<string, number> | undefined;
+      if (!lookups) continue;
+      for (const cache of ['tex', 'text']) {
+        this.assetCacheLookups.inc({ cache, result: 'hit' }, lookups[`${cache}_hits`] ?? 0);
+        this.assetCacheLookups.inc({ cache, result: 'miss' }, lookups[`${cache}_misses`] ?? 0);
+      }
+    }
+  }
+
+  recordFailure(op: string, quality: string, reason: string, seconds?: number) {
+    this.failures.inc({ op, reason });
+    if (seconds !== undefined) {
+      this.renderDuration.observe({ op, quality }, seconds);
+      this.renders.inc({ op, quality, outcome: 'error' });
+    }
+    if (reason === 'timeout') this.timeouts.inc({ op });
+  }
+
+  render(): string {
+    const metrics = [
+      this.renderDuration, this.prepDuration, this.queueWait, this.renders, this.failures, this.timeouts,
+      this.frames, this.bytesWritten, this.assetCacheLookups, ...this.collected
+    ];
+    return metrics.flatMap(metric => metric.render()).join('\n') + '\n';
+  }
+}
+
+let metrics: RenderMetrics | null = null;
+
+export function getRenderMetrics() {
+  if (!metrics) {
+    metrics = new RenderMetrics();
+  }
+  return metrics;
+}
@@ -0,0 +1,302 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import readline from 'readline';
+import { getRenderMetrics } from './render-metrics';
+
+export interface RenderPoolOptions {
+  size: number;
+  maxJobsPerWorker: number;
+  healthCheckIntervalMs: number;
+  healthCheckTimeoutMs: number;
+  jobTimeoutMs: number;
+  pythonPath: string;
+  workerScript: string;
+}
+
+export interface RenderJob {
+  op?: string;
+  [key: string]: unknown;
+}
+
+interface PendingJob {
+  resolve: (result: Record<string, unknown>) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+interface QueuedJob {
+  job: RenderJob;
+  timeoutMs: number;
+  resolve: (result: Record<string, unknown>) => void;
+  reject: (error: Error) => void;
+}
+
+export class RenderJobError extends Error {
+  constructor(message: string, public reason: string) {
+    super(message);
+    this.name = 'RenderJobError';
+  }
+}
+
+// Respawn delay after a worker dies before it was ready, doubling up to the maximum.
+const RESPAWN_BACKOFF_MS = 1000;
+const RESPAWN_BACKOFF_MAX_MS = 60000;
+
+function getDefaultOptions(): RenderPoolOptions {
+  return {
+    size: parseInt(process.env.RENDER_POOL_SIZE || '2', 10),
+    maxJobsPerWorker: parseInt(process.env.RENDER_MAX_JOBS_PER_WORKER || '50', 10),
+    healthCheckIntervalMs: parseInt(process.env.RENDER_HEALTHCHECK_INTERVAL_MS || '30000', 10),
+    healthCheckTimeoutMs: parseInt(process.env.RENDER_HEALTHCHECK_TIMEOUT_MS || '5000', 10),
+    jobTimeoutMs: parseInt(process.env.RENDER_JOB_TIMEOUT_MS || '60000', 10),
+    pythonPath: process.env.RENDER_PYTHON || 'python3',
+    workerScript: path.join(process.cwd(), 'scripts', 'render_worker.py'),
+  };
+}
+
+class RenderWorker {
+  private proc: ChildProcessWithoutNullStreams;
+  private pending = new Map<string, PendingJob>();
+  private nextId = 0;
+  readonly ready: Promise<void>;
+  jobsCompleted = 0;
+  isReady = false;
+  busy = false;
+  exited = false;
+  // Killed but not yet exited; takes no new jobs.
+  retiring = false;
+
+  constructor(private options: RenderPoolOptions, private onExit: (worker: RenderWorker) => void) {
+    this.proc = spawn(options.pythonPath, [options.workerScript], {
+      stdio: ['pipe', 'pipe', 'pipe'],
+    });
+
+    this.proc.stderr.on('data', (chunk) => {
+      console.error(`[render-worker ${this.proc.pid}]`, chunk.toString().trimEnd());
+    });
+
+    let markReady: () => void;
+    let failReady: (error: Error) => void;
+    this.ready = new Promise((resolve, reject) => {
+      markReady = resolve;
+      failReady = reject;
+    });
+
+    const lines = readline.createInterface({ input: this.proc.stdout });
+    lines.on('line', (line) => {
+      let message: { event?: string; id?: string; ok?: boolean; result?: Record<string, unknown>; error?: string; reason?: string };
+      try {
+        message = JSON.parse(line);
+      } catch {
+        console.error('Render worker sent invalid message:', line);
+        return;
+      }
+
+      if (message.event === 'ready') {
+        this.isReady = true;
+        markReady();
+        return;
+      }
+
+      const pending = message.id ? this.pending.get(message.id) : undefined;
+      if (!pending || !message.id) return;
+      clearTimeout(pending.timer);
+      this.pending.delete(message.id);
+
+      if (message.ok) {
+        pending.resolve(message.result || {});
+      } else {
+        pending.reject(new RenderJobError(message.error || 'Render failed', message.reason || 'render_error'));
+      }
+    });
+
+    const handleExit = (cause: string) => {
+      // A failed spawn may report both 'error' and 'exit'.
+      if (this.exited) return;
+      this.exited = true;
+      failReady(new RenderJobError(`Render worker exited during startup (${cause})`, 'worker_exit'));
+      for (const pending of this.pending.values()) {
+        clearTimeout(pending.timer);
+        pending.reject(new RenderJobError(`Render worker exited (${cause})`, 'worker_exit'));
+      }
+      this.pending.clear();
+      this.onExit(this);
+    };
+
+    this.proc.on('exit', (code, signal) => handleExit(String(code ?? signal)));
+    // Spawn failures (e.g. a bad RENDER_PYTHON) arrive here, not as 'exit'.
+    this.proc.on('error', (error) => {
+      console.error('Render worker process error:', error);
+      handleExit(error.message);
+    });
+    // EPIPE when writing to a worker that has just died; 'exit' follows.
+    this.proc.stdin.on('error', (error) => {
+      console.error(`[render-worker ${this.proc.pid}] stdin error:`, error.message);
+      this.kill();
+    });
+  }
+
+  get pid() {
+    return this.proc.pid;
+  }
+
+  async send(job: RenderJob, timeoutMs: number): Promise<Record<string, unknown>> {
+    await this.ready;
+    if (this.exited) {
+      throw new RenderJobError('Render worker exited', 'worker_exit');
+    }
+    const id = `${this.proc.pid}-${this.nextId++}`;
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new RenderJobError(`Render job timed out after ${timeoutMs}ms`, 'timeout'));
+        // A worker that missed its deadline may be wedged in Cairo or LaTeX.
+        this.kill();
+      }, timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      this.proc.stdin.write(JSON.stringify({ ...job, id }) + '\n');
+    });
+  }
+
+  kill() {
+    this.retiring = true;
+    if (!this.exited) {
+      this.proc.kill('SIGKILL');
+    }
+  }
+}
+
+export class RenderPool {
+  private workers: RenderWorker[] = [];
+  private queue: QueuedJob[] = [];
+  private healthTimer: NodeJS.Timeout | null = null;
+  private closed = false;
+  // Workers in a row that died before becoming ready.
+  private startupFailures = 0;
+
+  constructor(private options: RenderPoolOptions = getDefaultOptions()) {
+    for (let i = 0; i < options.size; i++) {
+      this.spawnWorker();
+    }
+    if (options.healthCheckIntervalMs > 0) {
+      this.healthTimer = setInterval(() => this.checkHealth(), options.healthCheckIntervalMs);
+      this.healthTimer.unref();
+    }
+  }
+
+  run(job: RenderJob, timeoutMs = this.options.jobTimeoutMs): Promise<Record<string, unknown>> {
+    if (this.closed) {
+      return Promise.reject(new RenderJobError('Render pool is closed', 'pool_closed'));
+    }
+    return new Promise((resolve, reject) => {
+      this.queue.push({ job, timeoutMs, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  stats() {
+    return {
+      workers: this.workers.length,
+      busy: this.workers.filter(worker => worker.busy).length,
+      queued: this.queue.length,
+    };
+  }
+
+  close() {
+    this.closed = true;
+    if (this.healthTimer) clearInterval(this.healthTimer);
+    for (const queued of this.queue) {
+      queued.reject(new RenderJobError('Render pool is closed', 'pool_closed'));
+    }
+    this.queue = [];
+    for (const worker of this.workers) {
+      worker.kill();
+    }
+  }
+
+  private spawnWorker() {
+    const worker = new RenderWorker(this.options, (exited) => {
+      this.workers = this.workers.filter(w => w !== exited);
+      if (this.closed) return;
+      if (!exited.isReady) {
+        this.startupFailures++;
+        if (!this.workers.some(w => w.isReady)) {
+          // Nothing can run them until a worker starts, which may be never (e.g. manim missing).
+          for (const queued of this.queue) {
+            queued.reject(new RenderJobError('Render workers failed to start', 'worker_exit'));
+          }
+          this.queue = [];
+        }
+      }
+      // Back off when workers keep dying on startup instead of respawning in a hot loop.
+      const delayMs = this.startupFailures > 0
+        ? Math.min(RESPAWN_BACKOFF_MS * 2 ** (this.startupFailures - 1), RESPAWN_BACKOFF_MAX_MS)
+        : 0;
+      setTimeout(() => {
+        if (!this.closed && this.workers.length < this.options.size) {
+          this.spawnWorker();
+          this.dispatch();
+        }
+      }, delayMs).unref();
+    });
+    worker.ready.then(() => {
+      this.startupFailures = 0;
+    }, () => {});
+    this.workers.push(worker);
+    return worker;
+  }
+
+  private dispatch() {
+    while (this.queue.length > 0) {
+      const worker = this.workers.find(w => !w.busy && !w.exited && !w.retiring);
+      if (!worker) return;
+
+      const queued = this.queue.shift()!;
+      worker.busy = true;
+      worker.send(queued.job, queued.timeoutMs)
+        .then(queued.resolve, queued.reject)
+        .finally(() => {
+          worker.busy = false;
+          worker.jobsCompleted++;
+          if (worker.jobsCompleted >= this.options.maxJobsPerWorker) {
+            // Recycle long-lived workers so leaks in manim/Cairo stay bounded.
+            console.log(`Recycling render worker ${worker.pid} after ${worker.jobsCompleted} jobs`);
+            worker.kill();
+          }
+          this.dispatch();
+        });
+    }
+  }
+
+  private checkHealth() {
+    for (const worker of this.workers) {
+      if (worker.busy || worker.exited || worker.retiring || !worker.isReady) continue;
+      worker.busy = true;
+      worker.send({ op: 'ping' }, this.options.healthCheckTimeoutMs)
+        .catch((error) => {
+          console.error(`Render worker ${worker.pid} failed health check:`, error);
+          worker.kill();
+        })
+        .finally(() => {
+          worker.busy = false;
+          this.dispatch();
+        });
+    }
+  }
+}
+
+let pool: RenderPool | null = null;
+
+export function getRenderPool() {
+  if (!pool) {
+    pool = new RenderPool();
+    const current = pool;
+    getRenderMetrics().collect('render_workers', 'Warm render_worker.py processes, by state.', 'gauge', () => {
+      const stats = current.stats();
+      return [[{ state: 'busy' }, stats.busy], [{ state: 'idle' }, stats.workers - stats.busy]];
+    });
+  }
+  return pool;
+}
@@ -0,0 +1,269 @@
+import fs from 'fs';
+import os from 'os';
+import { getRenderMetrics } from './render-metrics';
+import { getRenderPool, RenderJob, RenderJobError } from './render-pool';
+
+export type RenderPlan = 'free' | 'plus';
+
+export interface ScheduleOptions {
+  plan?: string;
+  // Renders nobody is waiting on (full-quality upgrades) go behind every interactive request.
+  background?: boolean;
+  deadlineMs?: number;
+  // Longest the worker may spend on this job once started; defaults to RENDER_JOB_TIMEOUT_MS.
+  timeoutMs?: number;
+  // Groups renders with similar cost for the duration estimate, e.g. "render:low".
+  estimateKey?: string;
+}
+
+export interface RenderSchedulerOptions {
+  maxConcurrent: number;
+  coresPerRender: number;
+  memoryPerRenderBytes: number;
+  maxQueued: number;
+  defaultDeadlineMs: number;
+  defaultEstimateMs: number;
+}
+
+interface WaitingRender {
+  job: RenderJob;
+  priority: number;
+  deadline: number;
+  timeoutMs: number;
+  // Render processes the job runs at once (parallel segment renders use several).
+  cost: number;
+  estimateKey: string;
+  enqueuedAt: number;
+  timer: NodeJS.Timeout;
+  resolve: (result: Record<string, unknown>) => void;
+  reject: (error: Error) => void;
+}
+
+const PLAN_PRIORITY: Record<RenderPlan, number> = {
+  plus: 0,
+  free: 1
+};
+const BACKGROUND_PRIORITY = 2;
+const PRIORITY_NAMES = ['plus', 'free', 'background'];
+
+function renderCost(job: RenderJob): number {
+  return Math.max(1, Number(job.parallel) || 1);
+}
+
+function jobLabels(job: RenderJob) {
+  return { op: String(job.op || 'render'), quality: String(job.quality || 'none') };
+}
+
+/**
+ * Memory a new render can get without swapping. On Linux that is MemAvailable, which
+ * counts reclaimable page cache. os.freemem() reports MemFree on Node releases older
+ * than 20 (libuv < 1.45), which leaves the page cache out and reads far too low.
+ */
+function availableMemoryBytes(): number {
+  try {
+    const match = fs.readFileSync('/proc/meminfo', 'utf8').match(/^MemAvailable:\s+(\d+) kB$/m);
+    if (match) return parseInt(match[1], 10) * 1024;
+  } catch {
+    // Not Linux.
+  }
+  return os.freemem();
+}
+
+function getDefaultOptions(): RenderSchedulerOptions {
+  return {
+    maxConcurrent: parseInt(process.env.RENDER_POOL_SIZE || '2', 10),
+    coresPerRender: parseFloat(process.env.RENDER_CORES_PER_JOB || '1'),
+    memoryPerRenderBytes: parseInt(process.env.RENDER_MEMORY_PER_JOB_MB || '768', 10) * 1024 * 1024,
+    maxQueued: parseInt(process.env.RENDER_MAX_QUEUED || '20', 10),
+    defaultDeadlineMs: parseInt(process.env.RENDER_JOB_TIMEOUT_MS || '60000', 10),
+    defaultEstimateMs: parseInt(process.env.RENDER_ESTIMATE_MS || '15000', 10),
+  };
+}
+
+/**
+ * Admission control in front of the render pool. Runs at most as many renders as
+ * the cores and free memory allow, orders the rest by plan and deadline, and turns
+ * away a render as soon as it is clear it would miss its deadline.
+ */
+export class RenderScheduler {
+  private waiting: WaitingRender[] = [];
+  private running = 0;
+  // Render processes the running renders use, charged against cores and memory.
+  private runningCost = 0;
+  private estimates = new Map<string, number>();
+  private stats = { admitted: 0, rejected: 0, expired: 0, evicted: 0 };
+  // Largest worker + ffmpeg RSS a render has reported, to size RENDER_MEMORY_PER_JOB_MB against.
+  private peakRenderMemoryBytes = 0;
+
+  constructor(private options: RenderSchedulerOptions = getDefaultOptions()) {}
+
+  /** Render processes the cores and free memory allow at once. */
+  private processSlots(): number {
+    const byCpu = Math.floor(os.cpus().length / this.options.coresPerRender);
+    // Running renders already hold their memory, so count it as available to them.
+    const byMemory = Math.floor(
+      (availableMemoryBytes() + this.runningCost * this.options.memoryPerRenderBytes) / this.options.memoryPerRenderBytes
+    );
+    return Math.min(byCpu, byMemory);
+  }
+
+  /** Single-process renders that can run at once right now, never less than one. */
+  capacity(): number {
+    return Math.max(1, Math.min(this.options.maxConcurrent, this.processSlots()));
+  }
+
+  /** Whether a render using `cost` processes can start now; one render may always run. */
+  private fits(cost: number): boolean {
+    if (this.running === 0) return true;
+    return this.running < this.options.maxConcurrent && this.runningCost + cost <= this.processSlots();
+  }
+
+  estimate(key: string): number {
+    return this.estimates.get(key) ?? this.options.defaultEstimateMs;
+  }
+
+  /** How long a render with this priority and deadline would wait before starting. */
+  estimateWaitMs(priority: number, deadline: number): number {
+    const capacity = this.capacity();
+    const ahead = this.waiting.filter(w => w.priority < priority || (w.priority === priority && w.deadline <= deadline));
+    const busy = this.runningCost + ahead.reduce((sum, w) => sum + w.cost, 0);
+    if (busy < capacity) return 0;
+    const averageMs = ahead.reduce((sum, w) => sum + this.estimate(w.estimateKey), 0) / Math.max(ahead.length, 1)
+      || this.options.defaultEstimateMs;
+    return Math.floor((busy - capacity) / capacity + 1) * averageMs;
+  }
+
+  run(job: RenderJob, options: ScheduleOptions = {}): Promise<Record<string, unknown>> {
+    const now = Date.now();
+    const plan: RenderPlan = options.plan === 'plus' ? 'plus' : 'free';
+    const priority = options.background ? BACKGROUND_PRIORITY : PLAN_PRIORITY[plan];
+    const deadline = now + (options.deadlineMs ?? this.options.defaultDeadlineMs);
+    const estimateKey = options.estimateKey || String(job.op || 'render');
+
+    const { op, quality } = jobLabels(job);
+    const finishAt = now + this.estimateWaitMs(priority, deadline) + this.estimate(estimateKey);
+    if (finishAt > deadline) {
+      this.stats.rejected++;
+      getRenderMetrics().recordFailure(op, quality, 'deadline');
+      return Promise.reject(new RenderJobError(
+        `Render would finish ${finishAt - deadline}ms after its deadline`,
+        'deadline'
+      ));
+    }
+
+    if (this.waiting.length >= this.options.maxQueued) {
+      // Make room by dropping the least urgent waiting render, if this one outranks it.
+      const last = this.waiting[this.waiting.length - 1];
+      if (last.priority <= priority) {
+        this.stats.rejected++;
+        getRenderMetrics().recordFailure(op, quality, 'queue_full');
+        return Promise.reject(new RenderJobError('Render queue is full', 'queue_full'));
+      }
+      this.waiting.pop();
+      clearTimeout(last.timer);
+      this.stats.evicted++;
+      getRenderMetrics().recordFailure(jobLabels(last.job).op, jobLabels(last.job).quality, 'queue_full');
+      last.reject(new RenderJobError('Render was displaced by a higher-priority request', 'queue_full'));
+    }
+
+    return new Promise((resolve, reject) => {
+      const entry: WaitingRender = {
+        job,
+        priority,
+        deadline,
+        timeoutMs: options.timeoutMs ?? this.options.defaultDeadlineMs,
+        cost: renderCost(job),
+        estimateKey,
+        enqueuedAt: now,
+        resolve,
+        reject,
+        // Give up once starting could no longer finish in time.
+        timer: setTimeout(() => {
+          this.waiting = this.waiting.filter(w => w !== entry);
+          this.stats.expired++;
+          getRenderMetrics().recordFailure(op, quality, 'deadline');
+          reject(new RenderJobError('Render could not start before its deadline', 'deadline'));
+        }, Math.max(0, deadline - now - this.estimate(estimateKey))),
+      };
+      entry.timer.unref();
+      this.insert(entry);
+      this.dispatch();
+    });
+  }
+
+  getStats() {
+    return {
+      ...this.stats,
+      running: this.running,
+      waiting: this.waiting.length,
+      capacity: this.capacity(),
+      peakRenderMemoryBytes: this.peakRenderMemoryBytes,
+    };
+  }
+
+  private insert(entry: WaitingRender) {
+    const index = this.waiting.findIndex(w =>
+      w.priority > entry.priority || (w.priority === entry.priority && w.deadline > entry.deadline)
+    );
+    if (index === -1) {
+      this.waiting.push(entry);
+    } else {
+      this.waiting.splice(index, 0, entry);
+    }
+  }
+
+  private dispatch() {
+    // Strictly in order: a large render at the head waits for room rather than being overtaken.
+    while (this.waiting.length > 0 && this.fits(this.waiting[0].cost)) {
+      const entry = this.waiting.shift()!;
+      clearTimeout(entry.timer);
+      this.running++;
+      this.runningCost += entry.cost;
+      this.stats.admitted++;
+
+      const startedAt = Date.now();
+      const { op, quality } = jobLabels(entry.job);
+      const metrics = getRenderMetrics();
+      metrics.queueWait.observe({ priority: PRIORITY_NAMES[entry.priority] }, (startedAt - entry.enqueuedAt) / 1000);
+      // The pool kills the worker at the deadline rather than letting it burn a core for nothing.
+      const timeoutMs = Math.max(Math.min(entry.deadline - startedAt, entry.timeoutMs), 1000);
+      getRenderPool().run(entry.job, timeoutMs)
+        .then((result) => {
+          const previous = this.estimate(entry.estimateKey);
+          // Exponential moving average, like the upgrade ETA in video-generator.ts.
+          this.estimates.set(entry.estimateKey, Math.round(previous * 0.8 + (Date.now() - startedAt) * 0.2));
+          metrics.recordResult(op, quality, (Date.now() - startedAt) / 1000, result);
+          const memory = result.memory as { peak_total_bytes?: number } | undefined;
+          if (memory?.peak_total_bytes) {
+            this.peakRenderMemoryBytes = Math.max(this.peakRenderMemoryBytes, memory.peak_total_bytes);
+          }
+          entry.resolve(result);
+        }, (error) => {
+          const reason = error instanceof RenderJobError ? error.reason : 'render_error';
+          metrics.recordFailure(op, quality, reason, (Date.now() - startedAt) / 1000);
+          entry.reject(error);
+        })
+        .finally(() => {
+          this.running--;
+          this.runningCost -= entry.cost;
+          this.dispatch();
+        });
+    }
+  }
+}
+
+let scheduler: RenderScheduler | null = null;
+
+export function getRenderScheduler() {
+  if (!scheduler) {
+    scheduler = new RenderScheduler();
+    const current = scheduler;
+    getRenderMetrics().collect('render_scheduler_renders', 'Renders running and waiting in the scheduler.', 'gauge', () => {
+      const stats = current.getStats();
+      return [[{ state: 'running' }, stats.running], [{ state: 'waiting' }, stats.waiting]];
+    });
+    getRenderMetrics().collect('render_scheduler_capacity', 'Renders the cores and free memory allow at once.', 'gauge',
+      () => [[{}, current.capacity()]]);
+  }
+  return scheduler;
+}
@@ -0,0 +1,185 @@
+import crypto from 'crypto';
+import fs from 'fs/promises';
+import path from 'path';
+import { getRenderMetrics } from './render-metrics';
+import type { StepSolutionSpec } from './video-generator';
+
+export interface VideoCacheStats {
+  hits: number;
+  misses: number;
+  inflightJoins: number;
+  evictions: number;
+}
+
+function canonicalJson(value: unknown): string {
+  if (Array.isArray(value)) {
+    return `[${value.map(canonicalJson).join(',')}]`;
+  }
+  if (value !== null && typeof value === 'object') {
+    const entries = Object.entries(value as Record<string, unknown>)
+      .filter(([, entry]) => entry !== undefined)
+      .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+    return `{${entries.map(([key, entry]) => `${JSON.stringify(key)}:${canonicalJson(entry)}`).join(',')}}`;
+  }
+  return JSON.stringify(value);
+}
+
+/**
+ * Key a video on the spec it is rendered from, so two requests share a video
+ * exactly when they would render the same scene. Same hash as spec_hash() in
+ * scripts/step_spec.py: the output name is ignored.
+ */
+export function videoCacheKey(spec: StepSolutionSpec): string {
+  const content: Partial<StepSolutionSpec> = { ...spec };
+  delete content.name;
+  return crypto.createHash('sha256').update(`${spec.version}:${canonicalJson(content)}`).digest('hex');
+}
+
+export class VideoCache {
+  private inflight = new Map<string, Promise<string>>();
+  private stats: VideoCacheStats = { hits: 0, misses: 0, inflightJoins: 0, evictions: 0 };
+
+  constructor(
+    private dir: string,
+    private publicPrefix: string,
+    private maxBytes: number
+  ) {}
+
+  getStats(): VideoCacheStats {
+    return { ...this.stats };
+  }
+
+  urlFor(key: string, ext = 'mp4'): string {
+    return `${this.publicPrefix}/${key}.${ext}`;
+  }
+
+  pathFor(key: string, ext = 'mp4'): string {
+    return path.join(this.dir, `${key}.${ext}`);
+  }
+
+  async lookup(key: string, ext = 'mp4'): Promise<string | null> {
+    const filePath = this.pathFor(key, ext);
+    try {
+      const now = new Date();
+      // mtime doubles as the LRU clock, so touch the entry on every hit.
+      await fs.utimes(filePath, now, now);
+      return this.urlFor(key, ext);
+    } catch {
+      return null;
+    }
+  }
+
+  /**
+   * lookup() for a request that is served straight from the cache on a hit, counted
+   * towards the hit ratio. Misses are left to the getOrCreate() that follows, unless
+   * `countMiss` says none does.
+   */
+  async serve(key: string, ext = 'mp4', countMiss = false): Promise<string | null> {
+    const url = await this.lookup(key, ext);
+    if (url) {
+      this.stats.hits++;
+    } else if (countMiss) {
+      this.stats.misses++;
+    }
+    return url;
+  }
+
+  /**
+   * Return the cached file for `key`, or run `render` once to produce it.
+   * Concurrent callers for the same key share a single in-flight render.
+   */
+  async getOrCreate(key: string, render: (tmpPath: string) => Promise<void>, ext = 'mp4'): Promise<string> {
+    const cached = await this.lookup(key, ext);
+    if (cached) {
+      this.stats.hits++;
+      return cached;
+    }
+
+    const inflightKey = `${key}.${ext}`;
+    const existing = this.inflight.get(inflightKey);
+    if (existing) {
+      this.stats.inflightJoins++;
+      return existing;
+    }
+
+    this.stats.misses++;
+    const task = this.produce(key, ext, render).finally(() => {
+      this.inflight.delete(inflightKey);
+    });
+    this.inflight.set(inflightKey, task);
+    return task;
+  }
+
+  private async produce(key: string, ext: string, render: (tmpPath: string) => Promise<void>): Promise<string> {
+    await fs.mkdir(this.dir, { recursive: true });
+    const finalPath = this.pathFor(key, ext);
+    const tmpPath = path.join(this.dir, `.${key}.${process.pid}.${Date.now()}.${ext}`);
+
+    try {
+      await render(tmpPath);
+      await fs.rename(tmpPath, finalPath);
+    } finally {
+      await fs.rm(tmpPath, { force: true });
+    }
+
+    await this.prune(finalPath);
+    return this.urlFor(key, ext);
+  }
+
+  /** Evict least recently used files until the store fits maxBytes, sparing `keep`. */
+  async prune(keep?: string) {
+    let names: string[];
+    try {
+      names = await fs.readdir(this.dir);
+    } catch {
+      return;
+    }
+    const entries: Array<{ filePath: string; size: number; mtimeMs: number }> = [];
+    for (const name of names) {
+      if (name.startsWith('.')) continue;
+      const filePath = path.join(this.dir, name);
+      try {
+        const stat = await fs.stat(filePath);
+        if (stat.isFile()) entries.push({ filePath, size: stat.size, mtimeMs: stat.mtimeMs });
+      } catch {
+        // Removed by a concurrent eviction.
+      }
+    }
+
+    let total = entries.reduce((sum, entry) => sum + entry.size, 0);
+    entries.sort((a, b) => a.mtimeMs - b.mtimeMs);
+    for (const entry of entries) {
+      if (total <= this.maxBytes) break;
+      if (entry.filePath === keep) continue;
+      await fs.rm(entry.filePath, { force: true });
+      total -= entry.size;
+      this.stats.evictions++;
+    }
+  }
+}
+
+let videoCache: VideoCache | null = null;
+
+export function getVideoCache() {
+  if (!videoCache) {
+    videoCache = new VideoCache(
+      path.join(process.cwd(), 'public', 'videos', 'cache'),
+      '/videos/cache',
+      parseInt(process.env.VIDEO_CACHE_MAX_BYTES || String(2 * 1024 * 1024 * 1024), 10)
+    );
+    const cache = videoCache;
+    const metrics = getRenderMetrics();
+    metrics.collect('video_cache_lookups_total', 'Video cache lookups that decide between serving and rendering, by result.', 'counter', () => {
+      const stats = cache.getStats();
+      return [[{ result: 'hit' }, stats.hits], [{ result: 'miss' }, stats.misses], [{ result: 'inflight_join' }, stats.inflightJoins]];
+    });
+    metrics.collect('video_cache_hit_ratio', 'Share of video cache lookups served without a new render.', 'gauge', () => {
+      const stats = cache.getStats();
+      const total = stats.hits + stats.misses + stats.inflightJoins;
+      return [[{}, total > 0 ? (stats.hits + stats.inflightJoins) / total : 0]];
+    });
+    metrics.collect('video_cache_evictions_total', 'Files evicted from the video cache to stay under its size limit.',
+      'counter', () => [[{}, cache.getStats().evictions]]);
+  }
+  return videoCache;
+}
@@ -1,9 +1,10 @@
-import { exec } from 'child_process';
-import { promisify } from 'util';
+import { createHash } from 'crypto';
 import fs from 'fs/promises';
+import os from 'os';
 import path from 'path';
-
-const execAsync = promisify(exec);
+import { RenderJobError } from './render-pool';
+import { getRenderScheduler, ScheduleOptions } from './render-scheduler';
+import { getVideoCache, videoCacheKey } from './video-cache';
 
 export interface VideoGenerationRequest {
   problem: string;
@@ -12,86 +13,643 @@ export interface VideoGenerationRequest {
   responseType: string;
 }
 
-export async function generateMathVideo(request: VideoGenerationRequest): Promise<string> {
-  const { problem, solution, subject, responseType } = request;
-  
-  const timestamp = Date.now();
-  const videoId = `math_${timestamp}`;
-  const scriptPath = `/tmp/${videoId}.py`;
-  const outputDir = path.join(process.cwd(), 'public', 'videos');
-  
-  await fs.mkdir(outputDir, { recursive: true });
-  
-  const pythonScript = generateManimScript(problem, solution, subject, responseType, videoId);
-  
-  await fs.writeFile(scriptPath, pythonScript);
+export interface SpecElement {
+  id: string;
+  type: 'text' | 'tex' | 'rectangle' | 'surround' | 'star' | 'group';
+  content?: string;
+  font_size?: number;
+  color?: string;
+  weight?: string;
+  members?: string[];
+  place?: Array<{ op: string; [key: string]: unknown }>;
+  [key: string]: unknown;
+}
+
+export interface StepSolutionSpec {
+  version: number;
+  name: string;
+  background?: string;
+  elements: SpecElement[];
+  timeline: Array<{
+    play?: Array<{ anim: string; target: string; to?: string; fps?: number }>;
+    wait?: number;
+  }>;
+}
+
+export type VideoTier = 'preview' | 'full';
+
+export interface VideoRenderOptions {
+  // The requesting user's plan; 'plus' renders are scheduled ahead of 'free' ones.
+  plan?: string;
+}
+
+export interface VideoGenerationResult {
+  key: string;
+  url: string;
+  tier: VideoTier;
+  upgradeExpectedAt: string | null;
+  streamUrl: string | null;
+  renditionsUrl: string | null;
+  // Chrome trace of the render that produced `url`, when VIDEO_TRACE=1.
+  traceUrl: string | null;
+}
+
+export interface VideoStatus {
+  key: string;
+  url: string;
+  tier: VideoTier;
+  upgradeExpectedAt: string | null;
+  streamUrl: string | null;
+  renditionsUrl?: string | null;
+  traceUrl?: string | null;
+  upgradeFailed?: boolean;
+}
+
+export interface VideoRendition {
+  name: string;
+  url: string;
+  width: number;
+  height: number;
+  codec: string;
+  mimeType: string;
+  bytes: number;
+}
+
+export interface RenditionManifest {
+  key: string;
+  tier: VideoTier;
+  renditions: VideoRendition[];
+}
+
+type RenderedRendition = Omit<VideoRendition, 'url'> & { path: string };
+
+export interface VideoBatchOptions extends VideoRenderOptions {
+  tier?: VideoTier;
+}
+
+export interface VideoBatchEntry {
+  index: number;
+  key: string;
+  url: string | null;
+  // Already in the video cache before the batch ran.
+  cached: boolean;
+  error: string | null;
+  // renderQueue job producing the video, when the batch went through RENDER_QUEUE.
+  jobId: string | null;
+}
+
+export interface VideoBatchManifest {
+  batchKey: string;
+  tier: VideoTier;
+  createdAt: string;
+  renderSeconds: number;
+  videos: VideoBatchEntry[];
+}
+
+// Must match SCENE_TEMPLATE_VERSION in scripts/step_spec.py.
+export const SCENE_TEMPLATE_VERSION = 1;
+
+export const TIER_QUALITY: Record<VideoTier, string> = {
+  preview: 'low',
+  full: 'high'
+};
+
+interface PendingUpgrade {
+  previewUrl: string;
+  streamUrl: string | null;
+  expectedAt: number;
+  failed: boolean;
+}
+
+const pendingUpgrades = new Map<string, PendingUpgrade>();
+const parallelSegments = parseInt(process.env.RENDER_PARALLEL_SEGMENTS || '0', 10);
+// Segments finish out of order in parallel mode, so only serial renders stream.
+const streamingEnabled = process.env.VIDEO_STREAMING !== '0' && parallelSegments <= 1;
+const STREAM_RETENTION_MS = 10 * 60 * 1000;
+// How long getVideoStatus keeps reporting upgradeFailed before the entry is dropped.
+const FAILED_UPGRADE_RETENTION_MS = 10 * 60 * 1000;
+// Encode in one ffmpeg process straight into the video cache instead of partial movies + copy.
+const singleEncoder = process.env.VIDEO_SINGLE_ENCODER === '1';
+// Extra full-tier encodes from the same frames, e.g. "360p-webm,720p" (RENDITIONS in scripts/single_encoder.py).
+const renditionNames = (process.env.VIDEO_RENDITIONS || '').split(',').map(name => name.trim()).filter(Boolean);
+// A streamed render keeps the partial-movie path, which writes no renditions, so
+// configured renditions take precedence over streaming the upgrade.
+const streamUpgrades = streamingEnabled && !(singleEncoder && renditionNames.length > 0);
+if (renditionNames.length > 0 && !singleEncoder) {
+  console.warn('VIDEO_RENDITIONS is ignored without VIDEO_SINGLE_ENCODER=1');
+}
+if (singleEncoder && streamUpgrades) {
+  console.warn('VIDEO_SINGLE_ENCODER=1 only applies to previews while full-quality upgrades stream over HLS; '
+    + 'set VIDEO_STREAMING=0 (or VIDEO_RENDITIONS) to use it for upgrades');
+}
+// Write a per-animation Chrome trace next to every rendered video.
+const traceEnabled = process.env.VIDEO_TRACE === '1';
+// Per-render memory budget (MB) for the worker process and its ffmpeg children; 0 means none.
+const memoryBudgetMb = parseInt(process.env.RENDER_MEMORY_BUDGET_MB || '0', 10);
+// Processes per render worker that generate Text/MathTex SVGs before frames are rendered; 0 means inline.
+const prepWorkers = parseInt(process.env.RENDER_PREP_WORKERS || '0', 10);
+let fullRenderEstimateMs = parseInt(process.env.VIDEO_UPGRADE_ESTIMATE_MS || '45000', 10);
+// How long a request may wait for its preview, and how long an upgrade may take before it is dropped.
+const previewDeadlineMs = parseInt(process.env.RENDER_PREVIEW_DEADLINE_MS || process.env.RENDER_JOB_TIMEOUT_MS || '60000', 10);
+const upgradeDeadlineMs = parseInt(process.env.RENDER_UPGRADE_DEADLINE_MS || '600000', 10);
+// Finished plays of a render are kept here until it succeeds, so a retry after a timeout resumes.
+const checkpointRoot = process.env.RENDER_CHECKPOINT_DIR || path.join(os.tmpdir(), 'render-checkpoints');
+// A whole problem set may take much longer than one render, so it gets its own limit.
+const batchTimeoutMs = parseInt(process.env.RENDER_BATCH_TIMEOUT_MS || '3600000', 10);
+// Videos per worker job in a batch; a worker is free for interactive renders between jobs.
+const batchChunkSize = Math.max(1, parseInt(process.env.RENDER_BATCH_CHUNK || '5', 10));
+
+function tierKey(key: string, tier: VideoTier): string {
+  return `${key}-${tier}`;
+}
+
+function renditionsKey(key: string, tier: VideoTier): string {
+  return `${tierKey(key, tier)}-renditions`;
+}
+
+function traceKey(key: string, tier: VideoTier): string {
+  return `${tierKey(key, tier)}-trace`;
+}
+
+function batchManifestKey(batchKey: string): string {
+  return `${batchKey}-batch`;
+}
+
+async function lookupTrace(key: string, tier: VideoTier): Promise<string | null> {
+  return traceEnabled ? getVideoCache().lookup(traceKey(key, tier), 'json') : null;
+}
+
+function renditionExt(name: string): string {
+  return name.endsWith('-webm') ? 'webm' : 'mp4';
+}
+
+/** Where the VIDEO_RENDITIONS encodes of a render go; only the full tier has them. */
+export function renditionTargets(key: string, tier: VideoTier): Array<{ name: string; path: string }> {
+  if (tier !== 'full') return [];
+  const cache = getVideoCache();
+  return renditionNames.map(name => ({
+    name,
+    path: cache.pathFor(`${tierKey(key, tier)}-${name}`, renditionExt(name))
+  }));
+}
+
+export function renditionsManifestPath(key: string, tier: VideoTier): string {
+  return getVideoCache().pathFor(renditionsKey(key, tier), 'json');
+}
+
+/** The video cache key of a request: the hash of the spec it renders. */
+export function requestKey(request: VideoGenerationRequest): string {
+  return videoCacheKey(buildSolutionSpec(request.problem, request.solution, request.subject, request.responseType, ''));
+}
+
+/**
+ * Serve a fast low-quality preview first, then upgrade to 1080p60 in the background.
+ * Poll getVideoStatus(key) to find out when the full-quality file replaces the preview.
+ */
+export async function generateMathVideo(
+  request: VideoGenerationRequest,
+  options: VideoRenderOptions = {}
+): Promise<VideoGenerationResult> {
+  const key = requestKey(request);
   
   try {
-    const { stdout, stderr } = await execAsync(
-      `cd /tmp && python3 ${scriptPath}`,
-      { timeout: 60000 } // 60 second timeout
-    );
-    
-    console.log('Manim output:', stdout);
-    if (stderr) console.error('Manim stderr:', stderr);
-    
-    const generatedVideoPath = `/tmp/media/videos/1080p60/${videoId}.mp4`;
-    const finalVideoPath = path.join(outputDir, `${videoId}.mp4`);
-    
-    await fs.copyFile(generatedVideoPath, finalVideoPath);
+    // A miss is counted by the preview's getOrCreate.
+    const fullUrl = await getVideoCache().serve(tierKey(key, 'full'));
+    if (fullUrl) {
+      const renditionsUrl = await getVideoCache().lookup(renditionsKey(key, 'full'), 'json');
+      const traceUrl = await lookupTrace(key, 'full');
+      return { key, url: fullUrl, tier: 'full', upgradeExpectedAt: null, streamUrl: null, renditionsUrl, traceUrl };
+    }
     
-    await fs.unlink(scriptPath);
-    await fs.rm('/tmp/media', { recursive: true, force: true });
+    // Rejected up front when the queue can't produce it in time, instead of timing out later.
+    const previewUrl = await renderTier(request, key, 'preview', null, {
+      plan: options.plan,
+      deadlineMs: previewDeadlineMs
+    });
+    const upgrade = scheduleUpgrade(request, key, previewUrl);
     
-    return `/videos/${videoId}.mp4`;
+    return {
+      key,
+      url: previewUrl,
+      tier: 'preview',
+      upgradeExpectedAt: new Date(upgrade.expectedAt).toISOString(),
+      streamUrl: upgrade.streamUrl,
+      renditionsUrl: null,
+      traceUrl: await lookupTrace(key, 'preview')
+    };
   } catch (error) {
     console.error('Video generation error:', error);
     throw new Error('Failed to generate video');
   }
 }
 
-function generateManimScript(
+/**
+ * Render a PNG of the final frame (or of the state after `step` timeline steps) without
+ * running any animation frames or ffmpeg. Cached next to the videos.
+ */
+export async function generateVideoPoster(
+  request: VideoGenerationRequest,
+  step?: number,
+  options: VideoRenderOptions = {}
+): Promise<string> {
+  const key = requestKey(request);
+  // "step" in the key: posters cached when a step counted plays (waits included) show other states.
+  const posterKey = step === undefined ? `${key}-poster` : `${key}-poster-step${step}`;
+  
+  return getVideoCache().getOrCreate(posterKey, async (tmpPath) => {
+    const videoId = `math_${key.slice(0, 16)}_poster`;
+    const mediaDir = `/tmp/media_${videoId}_${Date.now()}`;
+    const spec = buildSolutionSpec(request.problem, request.solution, request.subject, request.responseType, videoId);
+    
+    try {
+      const result = await getRenderScheduler().run({
+        op: 'poster',
+        spec,
+        media_dir: mediaDir,
+        quality: 'high',
+        step: step ?? null,
+        fit_layout: true
+      }, { plan: options.plan, deadlineMs: previewDeadlineMs, estimateKey: 'poster' });
+      await fs.copyFile(result.path as string, tmpPath);
+    } finally {
+      await fs.rm(mediaDir, { recursive: true, force: true });
+    }
+  }, 'png');
+}
+
+/**
+ * Export the scene as SVG paths plus a keyed animation timeline for
+ * TimelinePlayer. Only the TeX/Text compile runs on the server; no frames are
+ * rasterized or encoded.
+ */
+export async function generateVideoTimeline(
+  request: VideoGenerationRequest,
+  options: VideoRenderOptions = {}
+): Promise<string> {
+  const key = requestKey(request);
+  
+  return getVideoCache().getOrCreate(`${key}-timeline`, async (tmpPath) => {
+    const videoId = `math_${key.slice(0, 16)}_timeline`;
+    const mediaDir = `/tmp/media_${videoId}_${Date.now()}`;
+    const spec = buildSolutionSpec(request.problem, request.solution, request.subject, request.responseType, videoId);
+    
+    try {
+      const result = await getRenderScheduler().run({
+        op: 'timeline',
+        spec,
+        media_dir: mediaDir,
+        fit_layout: true
+      }, { plan: options.plan, deadlineMs: previewDeadlineMs, estimateKey: 'timeline' });
+      await fs.copyFile(result.path as string, tmpPath);
+    } finally {
+      await fs.rm(mediaDir, { recursive: true, force: true });
+    }
+  }, 'json');
+}
+
+/** Identifies a problem set's manifest; the same requests in the same order give the same key. */
+export function videoBatchKey(requests: VideoGenerationRequest[], tier: VideoTier = 'full'): string {
+  return createHash('sha256').update([tier, ...requests.map(requestKey)].join('\n')).digest('hex');
+}
+
+export function videoBatchManifestUrl(requests: VideoGenerationRequest[], tier: VideoTier = 'full'): string {
+  return getVideoCache().urlFor(batchManifestKey(videoBatchKey(requests, tier)), 'json');
+}
+
+/** One entry per request, with the URL of every video already in the cache. */
+export async function videoBatchEntries(
+  requests: VideoGenerationRequest[],
+  tier: VideoTier = 'full'
+): Promise<VideoBatchEntry[]> {
+  const cache = getVideoCache();
+  return Promise.all(requests.map(async (request, index) => {
+    const key = requestKey(request);
+    const url = await cache.serve(tierKey(key, tier), 'mp4', true);
+    return { index, key, url, cached: url !== null, error: null, jobId: null };
+  }));
+}
+
+export async function writeVideoBatchManifest(
+  requests: VideoGenerationRequest[],
+  tier: VideoTier,
+  videos: VideoBatchEntry[],
+  startedAt: number
+): Promise<VideoBatchManifest> {
+  const manifest: VideoBatchManifest = {
+    batchKey: videoBatchKey(requests, tier),
+    tier,
+    createdAt: new Date().toISOString(),
+    renderSeconds: (Date.now() - startedAt) / 1000,
+    videos
+  };
+  await writeCacheJson(batchManifestKey(manifest.batchKey), manifest);
+  return manifest;
+}
+
+/**
+ * Pre-render videos for a whole problem set on this process's render pool. Videos
+ * not already cached go to a warm worker a few at a time (RENDER_BATCH_CHUNK), so
+ * each chunk compiles its TeX once while interactive renders still get the worker
+ * between chunks. Each video lands in the cache as soon as it is rendered. The
+ * manifest lists a URL (or error) per request, in order, at videoBatchManifestUrl().
+ * With RENDER_QUEUE=1 use addVideoBatchJobs() in queue.ts instead.
+ */
+export async function renderVideoBatch(
+  requests: VideoGenerationRequest[],
+  options: VideoBatchOptions = {}
+): Promise<VideoBatchManifest> {
+  const tier = options.tier ?? 'full';
+  const batchKey = videoBatchKey(requests, tier);
+  const cache = getVideoCache();
+  const videos = await videoBatchEntries(requests, tier);
+
+  // Identical problems on one sheet are rendered once.
+  const pending = [...new Set(videos.filter(video => !video.cached).map(video => video.key))];
+  const requestByKey = new Map(videos.map(video => [video.key, requests[video.index]]));
+  const mediaDir = `/tmp/media_batch_${batchKey.slice(0, 16)}_${Date.now()}`;
+  const startedAt = Date.now();
+  const deadline = startedAt + batchTimeoutMs;
+  const outcomes = new Map<string, { url: string | null; error: string | null }>();
+  try {
+    for (let start = 0; start < pending.length; start += batchChunkSize) {
+      const chunk = pending.slice(start, start + batchChunkSize);
+      try {
+        const remainingMs = deadline - Date.now();
+        const result = await getRenderScheduler().run({
+          op: 'batch',
+          jobs: chunk.map((key) => {
+            const request = requestByKey.get(key) as VideoGenerationRequest;
+            const videoId = `math_${key.slice(0, 16)}_${tier}`;
+            const itemDir = path.join(mediaDir, key.slice(0, 16));
+            return {
+              id: key,
+              spec: buildSolutionSpec(request.problem, request.solution, request.subject, request.responseType, videoId),
+              media_dir: itemDir,
+              quality: TIER_QUALITY[tier],
+              output_path: singleEncoder ? path.join(itemDir, `${videoId}.mp4`) : null,
+              // The worker copies each video into the cache as soon as it is done.
+              publish_path: cache.pathFor(tierKey(key, tier)),
+              memory_budget_mb: memoryBudgetMb || null,
+              prep_workers: prepWorkers,
+              fit_layout: true
+            };
+          })
+        }, {
+          plan: options.plan,
+          // Nobody is waiting on it, so it goes behind interactive renders and upgrades alike.
+          background: true,
+          deadlineMs: remainingMs,
+          timeoutMs: remainingMs,
+          estimateKey: `batch:${TIER_QUALITY[tier]}`
+        });
+
+        for (const item of result.items as Array<{ id: string; ok: boolean; error?: string }>) {
+          outcomes.set(item.id, item.ok
+            ? { url: cache.urlFor(tierKey(item.id, tier)), error: null }
+            : { url: null, error: item.error || 'Render failed' });
+        }
+      } catch (error) {
+        console.error('Video batch chunk failed:', error);
+        const message = error instanceof Error ? error.message : String(error);
+        // Videos the worker finished before it timed out or died are already in the cache.
+        for (const key of chunk) {
+          const url = await cache.lookup(tierKey(key, tier));
+          outcomes.set(key, { url, error: url ? null : message });
+        }
+      }
+    }
+  } finally {
+    await fs.rm(mediaDir, { recursive: true, force: true });
+  }
+  // The worker wrote straight into the cache directory, so keep it within budget here.
+  await cache.prune();
+
+  for (const video of videos) {
+    const outcome = outcomes.get(video.key);
+    if (outcome) Object.assign(video, outcome);
+  }
+  const manifest = await writeVideoBatchManifest(requests, tier, videos, startedAt);
+  const failed = videos.filter(video => video.error).length;
+  console.log(`Video batch ${batchKey.slice(0, 16)}: ${videos.length} videos, ${pending.length} rendered, ${failed} failed`);
+  return manifest;
+}
+
+export async function getVideoStatus(key: string): Promise<VideoStatus | null> {
+  const fullUrl = await getVideoCache().lookup(tierKey(key, 'full'));
+  if (fullUrl) {
+    const renditionsUrl = await getVideoCache().lookup(renditionsKey(key, 'full'), 'json');
+    const traceUrl = await lookupTrace(key, 'full');
+    return { key, url: fullUrl, tier: 'full', upgradeExpectedAt: null, streamUrl: null, renditionsUrl, traceUrl };
+  }
+  
+  const upgrade = pendingUpgrades.get(key);
+  if (!upgrade) return null;
+  
+  return {
+    key,
+    url: upgrade.previewUrl,
+    tier: 'preview',
+    upgradeExpectedAt: upgrade.failed ? null : new Date(upgrade.expectedAt).toISOString(),
+    streamUrl: upgrade.failed ? null : upgrade.streamUrl,
+    upgradeFailed: upgrade.failed
+  };
+}
+
+function scheduleUpgrade(request: VideoGenerationRequest, key: string, previewUrl: string): PendingUpgrade {
+  const existing = pendingUpgrades.get(key);
+  if (existing && !existing.failed) return existing;
+  
+  const startedAt = Date.now();
+  const streamDir = streamUpgrades ? path.join(process.cwd(), 'public', 'videos', 'stream', key) : null;
+  const upgrade: PendingUpgrade = {
+    previewUrl,
+    streamUrl: streamDir ? `/videos/stream/${key}/index.m3u8` : null,
+    expectedAt: startedAt + fullRenderEstimateMs,
+    failed: false
+  };
+  pendingUpgrades.set(key, upgrade);
+  
+  // Background priority: when the queue can't fit the upgrade before its deadline the
+  // scheduler rejects it and the request stays on the preview tier.
+  // The kill timeout would otherwise default to RENDER_JOB_TIMEOUT_MS, far below the deadline.
+  renderTier(request, key, 'full', streamDir, {
+    background: true,
+    deadlineMs: upgradeDeadlineMs,
+    timeoutMs: upgradeDeadlineMs
+  })
+    .then(() => {
+      // Exponential moving average keeps the ETA close to recent render times.
+      fullRenderEstimateMs = Math.round(fullRenderEstimateMs * 0.8 + (Date.now() - startedAt) * 0.2);
+      pendingUpgrades.delete(key);
+    })
+    .finally(() => {
+      if (streamDir) {
+        // Give players that are mid-stream time to finish before removing the segments.
+        setTimeout(() => {
+          fs.rm(streamDir, { recursive: true, force: true }).catch(() => {});
+        }, STREAM_RETENTION_MS).unref();
+      }
+    })
+    .catch((error) => {
+      if (error instanceof RenderJobError && (error.reason === 'deadline' || error.reason === 'queue_full')) {
+        console.log(`Full-quality upgrade for ${key} not scheduled (${error.reason}); keeping the preview`);
+      } else if (error instanceof RenderJobError && error.reason === 'memory_budget') {
+        console.warn(`Full-quality upgrade for ${key} went over RENDER_MEMORY_BUDGET_MB; keeping the preview`);
+      } else {
+        console.error('Full-quality video upgrade failed:', error);
+      }
+      upgrade.failed = true;
+      setTimeout(() => {
+        // A retry may have replaced the entry in the meantime.
+        if (pendingUpgrades.get(key) === upgrade) pendingUpgrades.delete(key);
+      }, FAILED_UPGRADE_RETENTION_MS).unref();
+    });
+  
+  return upgrade;
+}
+
+async function renderTier(
+  request: VideoGenerationRequest,
+  key: string,
+  tier: VideoTier,
+  streamDir: string | null = null,
+  schedule: ScheduleOptions = {}
+): Promise<string> {
+  const { problem, solution, subject, responseType } = request;
+  const videoId = `math_${key.slice(0, 16)}_${tier}`;
+  
+  const cache = getVideoCache();
+  let renditions: RenderedRendition[] | null = null;
+  
+  const url = await cache.getOrCreate(tierKey(key, tier), async (tmpPath) => {
+    const mediaDir = `/tmp/media_${videoId}_${Date.now()}`;
+    const spec = buildSolutionSpec(problem, solution, subject, responseType, videoId);
+    
+    // HLS streaming publishes partial movies, so a streamed render keeps that path.
+    const directOutput = singleEncoder && !streamDir;
+    // Renditions come out of the same ffmpeg process, so they need the single encoder.
+    const extraRenditions = directOutput ? renditionTargets(key, tier) : [];
+    
+    try {
+      const result = await getRenderScheduler().run({
+        op: 'render',
+        spec,
+        media_dir: mediaDir,
+        quality: TIER_QUALITY[tier],
+        // Full-quality renders can be split across a process pool on many-core boxes.
+        parallel: tier === 'full' ? parallelSegments : 0,
+        stream_dir: streamDir,
+        output_path: directOutput ? tmpPath : null,
+        renditions: extraRenditions,
+        trace_path: traceEnabled ? cache.pathFor(traceKey(key, tier), 'json') : null,
+        memory_budget_mb: memoryBudgetMb || null,
+        prep_workers: prepWorkers,
+        // The single encoder has no partial movies to keep.
+        checkpoint_dir: directOutput ? null : path.join(checkpointRoot, tierKey(key, tier)),
+        // Steps are stacked without bounds checks; let the worker paginate or scale them.
+        fit_layout: true
+      }, { ...schedule, estimateKey: `render:${TIER_QUALITY[tier]}` });
+      
+      console.log(`Manim ${tier} render finished:`, result);
+      if (!directOutput) {
+        await fs.copyFile(result.path as string, tmpPath);
+      }
+      if (extraRenditions.length > 0) {
+        renditions = result.renditions as RenderedRendition[];
+      }
+    } finally {
+      await fs.rm(mediaDir, { recursive: true, force: true });
+    }
+  });
+  
+  if (renditions) {
+    await writeRenditionManifest(key, tier, url, renditions);
+  }
+  return url;
+}
+
+/** Written once the main file has its final name, so every URL in the manifest resolves. */
+async function writeRenditionManifest(
+  key: string,
+  tier: VideoTier,
+  mainUrl: string,
+  files: RenderedRendition[]
+): Promise<void> {
+  const cache = getVideoCache();
+  const manifest: RenditionManifest = {
+    key,
+    tier,
+    renditions: files.map(({ path: filePath, ...file }) => ({
+      ...file,
+      url: file.name === 'main'
+        ? mainUrl
+        : cache.urlFor(`${tierKey(key, tier)}-${file.name}`, path.extname(filePath).slice(1))
+    }))
+  };
+  await writeCacheJson(renditionsKey(key, tier), manifest);
+}
+
+async function writeCacheJson(cacheKey: string, data: unknown): Promise<string> {
+  const cache = getVideoCache();
+  const finalPath = cache.pathFor(cacheKey, 'json');
+  const tmpPath = path.join(path.dirname(finalPath), `.${path.basename(finalPath)}.${process.pid}`);
+  await fs.mkdir(path.dirname(finalPath), { recursive: true });
+  await fs.writeFile(tmpPath, JSON.stringify(data));
+  await fs.rename(tmpPath, finalPath);
+  return cache.urlFor(cacheKey, 'json');
+}
+
+export function buildSolutionSpec(
   problem: string, 
   solution: string, 
   subject: string, 
   responseType: string,
   videoId: string
-): string {
+): StepSolutionSpec {
   const steps = parseSolutionSteps(solution);
   
-  return `#!/usr/bin/env python3
-from manim import *
-import os
-
-class ${videoId}(Scene):
-    def construct(self):
-        # Title based on response type
-        title_text = "${getTitle(responseType, subject)}"
-        title = Text(title_text, font_size=48, color=BLUE)
-        title.to_edge(UP)
-        self.play(Write(title))
-        self.wait(1)
-        
-        # Problem statement
-        problem_text = "${escapePythonString(problem)}"
-        problem = Text(problem_text, font_size=32, color=WHITE)
-        problem.next_to(title, DOWN, buff=1)
-        self.play(Write(problem))
-        self.wait(2)
-        
-        ${generateAnimationSteps(steps)}
-        
-        # Final pause
-        self.wait(3)
-
-if __name__ == "__main__":
-    # Create output directory
-    os.makedirs("/tmp/media/videos/1080p60", exist_ok=True)
-    
-    # Render the scene
-    scene = ${videoId}()
-    scene.render()
-`;
+  const elements: SpecElement[] = [
+    {
+      id: 'title',
+      type: 'text',
+      content: getTitle(responseType, subject),
+      font_size: 48,
+      color: 'BLUE',
+      place: [{ op: 'to_edge', edge: 'UP' }]
+    },
+    {
+      id: 'problem',
+      type: 'text',
+      content: problem,
+      font_size: 32,
+      color: 'WHITE',
+      place: [{ op: 'next_to', target: 'title', direction: 'DOWN', buff: 1 }]
+    }
+  ];
+  
+  const timeline: StepSolutionSpec['timeline'] = [
+    { play: [{ anim: 'write', target: 'title' }], wait: 1 },
+    { play: [{ anim: 'write', target: 'problem' }], wait: 2 }
+  ];
+  
+  let yPosition = -1;
+  steps.forEach((step, index) => {
+    elements.push({
+      id: `step${index}`,
+      type: 'text',
+      content: step,
+      font_size: 28,
+      color: 'GREEN',
+      place: [{ op: 'shift', by: [0, -yPosition] }]
+    });
+    timeline.push({ play: [{ anim: 'write', target: `step${index}` }], wait: 2 });
+    yPosition += 0.8;
+  });
+  
+  // Final pause
+  timeline.push({ wait: 3 });
+  
+  return { version: SCENE_TEMPLATE_VERSION, name: videoId, elements, timeline };
 }
 
 function parseSolutionSteps(solution: string): string[] {
@@ -108,26 +666,3 @@ function getTitle(responseType: string, subject: string): string {
   };
   return titles[responseType] || `${subject}の解説`;
 }
-
-function escapePythonString(str: string): string {
-  return str.replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
-}
-
-function generateAnimationSteps(steps: string[]): string {
-  let animations = '';
-  let yPosition = -1;
-  
-  steps.forEach((step, index) => {
-    const stepVar = `step${index}`;
-    animations += `
-        # Step ${index + 1}
-        ${stepVar} = Text("${escapePythonString(step)}", font_size=28, color=GREEN)
-        ${stepVar}.shift(DOWN * ${yPosition})
-        self.play(Write(${stepVar}))
-        self.wait(2)
-    `;
-    yPosition += 0.8;
-  });
-  
-  return animations;
-}